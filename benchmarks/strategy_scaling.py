@@ -0,0 +1,316 @@
+"""Time every assignment strategy across sizes and constraint densities.
+
+Run from the repository root:
+
+    python -m benchmarks.strategy_scaling --output results.json
+    python -m benchmarks.strategy_scaling --sizes 1000 100000 --strategies random matching
+    python -m benchmarks.strategy_scaling --compare baseline.json
+
+Each case builds synthetic employees, `history` past years (each a random
+single-cycle assignment) and `exclusions` random do-not-pair entries per
+employee, then calls strategy.generate() directly. Wall time is the median
+over the repeats. Peak memory is measured in one extra run under
+tracemalloc, because tracing slows the timed runs down.
+"""
+
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+import platform
+import statistics
+import tracemalloc
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.config import Config
+from src.constraints import AssignmentConstraints, PairExclusionIndex
+from src.exceptions import SecretSantaException
+from src.main import STRATEGIES
+from src.models import Employee
+
+
+DEFAULT_SIZES = [10, 100, 1_000, 10_000, 100_000, 1_000_000]
+# (past years of history, do-not-pair entries per employee)
+DEFAULT_DENSITIES = [(0, 0.0), (1, 0.0), (3, 0.1), (5, 1.0)]
+
+# Largest n worth running per strategy; dense or O(n) per-step strategies
+# would take hours (or all memory) beyond these
+MAX_SIZE = {
+    'min-cost': 100_000,
+    'mcmc': 100_000,
+    'batched': 1_000_000,
+}
+
+# Wall time above baseline * this is reported as a regression
+MAX_SLOWDOWN = 1.5
+
+
+def synthetic_constraints(
+    size: int,
+    history: int,
+    exclusions: float,
+    seed: int
+) -> Tuple[List[Employee], AssignmentConstraints]:
+    rng = random.Random(seed)
+    employees = [
+        Employee(name=f"Employee {i}", email=f"employee{i}@example.com")
+        for i in range(size)
+    ]
+    constraints = AssignmentConstraints(employees)
+
+    for _ in range(history):
+        # Sattolo's shuffle: a derangement like a real past year
+        children = list(range(size))
+        for i in range(size - 1, 0, -1):
+            j = rng.randrange(i)
+            children[i], children[j] = children[j], children[i]
+        constraints.add_history_year(
+            (employees[giver], employees[child])
+            for giver, child in enumerate(children)
+        )
+
+    pairs = int(size * exclusions)
+    if pairs:
+        constraints.do_not_pair = PairExclusionIndex(size, (
+            (rng.randrange(size), rng.randrange(size)) for _ in range(pairs)
+        ))
+
+    return employees, constraints
+
+
+def run_case(
+    name: str,
+    size: int,
+    history: int,
+    exclusions: float,
+    repeats: int,
+    measure_memory: bool
+) -> Dict[str, Any]:
+    employees, constraints = synthetic_constraints(size, history, exclusions, size)
+    config = Config()
+
+    times: List[float] = []
+    attempts: List[int] = []
+    successes = 0
+    error: Optional[str] = None
+
+    for repeat in range(repeats):
+        config.random_seed = repeat
+        try:
+            strategy = STRATEGIES[name](config)
+        except SecretSantaException as e:
+            # e.g. the batched sampler without NumPy installed
+            return {'skipped': str(e)}
+
+        start = time.perf_counter()
+        try:
+            strategy.generate(employees, {}, constraints)
+            successes += 1
+        except SecretSantaException as e:
+            error = str(e)
+        times.append(time.perf_counter() - start)
+        if strategy.last_stats is not None:
+            attempts.append(strategy.last_stats.attempts)
+
+    peak = None
+    if measure_memory:
+        config.random_seed = repeats
+        strategy = STRATEGIES[name](config)
+        tracemalloc.start()
+        try:
+            strategy.generate(employees, {}, constraints)
+        except SecretSantaException:
+            pass
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return {
+        'seconds': statistics.median(times),
+        'attempts': statistics.median(attempts) if attempts else None,
+        'peak_bytes': peak,
+        'success_rate': successes / repeats,
+        'error': error,
+    }
+
+
+def run_benchmarks(
+    strategies: List[str],
+    sizes: List[int],
+    densities: List[Tuple[int, float]],
+    repeats: int,
+    measure_memory: bool
+) -> List[Dict[str, Any]]:
+    results = []
+    for size in sizes:
+        for history, exclusions in densities:
+            for name in strategies:
+                case = {
+                    'strategy': name,
+                    'n': size,
+                    'history': history,
+                    'exclusions': exclusions,
+                }
+                if size > MAX_SIZE.get(name, size):
+                    case['skipped'] = f"n above {MAX_SIZE[name]}"
+                else:
+                    case.update(run_case(
+                        name, size, history, exclusions, repeats, measure_memory
+                    ))
+                results.append(case)
+                print(_format_row(case), file=sys.stderr, flush=True)
+    return results
+
+
+def compare(
+    results: List[Dict[str, Any]],
+    baseline: List[Dict[str, Any]]
+) -> List[str]:
+    def key(case):
+        return (case['strategy'], case['n'], case['history'], case['exclusions'])
+
+    before = {key(case): case for case in baseline if 'seconds' in case}
+    regressions = []
+    for case in results:
+        old = before.get(key(case))
+        if old is None or 'seconds' not in case:
+            continue
+        case['baseline_seconds'] = old['seconds']
+        if case['seconds'] > old['seconds'] * MAX_SLOWDOWN:
+            regressions.append(
+                f"{case['strategy']} n={case['n']} history={case['history']} "
+                f"exclusions={case['exclusions']}: {old['seconds']:.4f}s -> "
+                f"{case['seconds']:.4f}s"
+            )
+    return regressions
+
+
+def _format_row(case: Dict[str, Any]) -> str:
+    head = (
+        f"{case['strategy']:<10} {case['n']:>9} "
+        f"{case['history']:>7} {case['exclusions']:>10}"
+    )
+    if 'skipped' in case:
+        return f"{head}  skipped: {case['skipped']}"
+
+    attempts = '-' if case['attempts'] is None else f"{case['attempts']:g}"
+    memory = (
+        '-' if case['peak_bytes'] is None
+        else f"{case['peak_bytes'] / 2 ** 20:.1f}"
+    )
+    row = (
+        f"{head} {case['seconds']:>10.4f} {attempts:>8} {memory:>9} "
+        f"{case['success_rate']:>8.0%}"
+    )
+    if 'baseline_seconds' in case:
+        row += f" {case['seconds'] / case['baseline_seconds']:>7.2f}x"
+    return row
+
+
+def format_table(results: List[Dict[str, Any]]) -> str:
+    header = (
+        f"{'strategy':<10} {'n':>9} {'history':>7} {'exclusions':>10} "
+        f"{'seconds':>10} {'attempts':>8} {'peak MiB':>9} {'success':>8}"
+    )
+    if any('baseline_seconds' in case for case in results):
+        header += f" {'vs base':>8}"
+    lines = [header, '-' * len(header)]
+    lines.extend(_format_row(case) for case in results)
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark assignment strategies across n and constraint density'
+    )
+    parser.add_argument(
+        '--strategies',
+        nargs='+',
+        choices=sorted(STRATEGIES),
+        default=sorted(STRATEGIES),
+        help='Strategies to run (default: all)'
+    )
+    parser.add_argument(
+        '--sizes',
+        type=int,
+        nargs='+',
+        default=DEFAULT_SIZES,
+        help='Employee counts (default: 10 to 1,000,000)'
+    )
+    parser.add_argument(
+        '--density',
+        action='append',
+        metavar='YEARS:EXCLUSIONS',
+        help='Past years and do-not-pair entries per employee, e.g. 3:0.5 '
+             '(may be repeated)'
+    )
+    parser.add_argument(
+        '--repeats',
+        type=int,
+        default=3,
+        help='Timed runs per case (default: 3)'
+    )
+    parser.add_argument(
+        '--no-memory',
+        action='store_true',
+        help='Skip the extra tracemalloc run per case'
+    )
+    parser.add_argument(
+        '--output',
+        type=Path,
+        help='Write results as JSON'
+    )
+    parser.add_argument(
+        '--compare',
+        type=Path,
+        help='Earlier JSON results; exit 1 if any case is '
+             f'{MAX_SLOWDOWN}x slower'
+    )
+
+    args = parser.parse_args()
+
+    densities = DEFAULT_DENSITIES
+    if args.density:
+        densities = []
+        for density in args.density:
+            years, _, exclusions = density.partition(':')
+            densities.append((int(years), float(exclusions or 0)))
+
+    # Strategies log every run at INFO; only warnings matter here
+    logging.basicConfig(level=logging.WARNING)
+
+    results = run_benchmarks(
+        args.strategies,
+        args.sizes,
+        densities,
+        args.repeats,
+        not args.no_memory
+    )
+
+    regressions: List[str] = []
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())['results']
+        regressions = compare(results, baseline)
+
+    print(format_table(results))
+
+    if args.output:
+        args.output.write_text(json.dumps({
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'repeats': args.repeats,
+            'results': results,
+        }, indent=2))
+
+    if regressions:
+        print(f"\n{len(regressions)} regressions over {MAX_SLOWDOWN}x:")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
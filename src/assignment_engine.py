@@ -1,112 +1,1174 @@
 import random
+import time
 import logging
-from typing import List, Dict, Set, Optional
+import multiprocessing
+from array import array
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, List, Dict, Optional, Sequence, Set, Tuple
 from abc import ABC, abstractmethod
-from .models import Employee, Assignment
+from .models import (
+    Assignment,
+    AssignmentBatch,
+    AssignmentStats,
+    Employee,
+    EmployeeTable,
+    MixingDiagnostics
+)
+from .constraints import (
+    AssignmentConstraints,
+    CycleTracker,
+    PairExclusionIndex,
+    ReportingLines
+)
+from .matching import (
+    UNMATCHED,
+    block_matching,
+    hall_violation,
+    maximum_matching,
+    min_cost_matching,
+    min_cost_transport,
+    regular_assignment,
+    unreachable
+)
+from .scoring import AssignmentScore, AttributeDistanceScore
 from .exceptions import (
     AssignmentError,
+    InfeasibleAssignmentError,
     InsufficientEmployeesError,
-    NoValidAssignmentError
+    NoValidAssignmentError,
+    ValidationError
 )
 from .config import Config
 
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
 
 logger = logging.getLogger(__name__)
 
 
+# Employees named in an infeasibility report before truncating
+MAX_REPORTED = 10
+
+
+def _describe(constraints: AssignmentConstraints, indices: List[int]) -> str:
+    names = [constraints.table.names[i] for i in indices[:MAX_REPORTED]]
+    if len(indices) > MAX_REPORTED:
+        names.append(f"and {len(indices) - MAX_REPORTED} more")
+    return ', '.join(names) or 'nobody'
+
+
+def _hall_violation_error(
+    constraints: AssignmentConstraints,
+    children: List[int]
+) -> InfeasibleAssignmentError:
+    givers, reachable = hall_violation(constraints, children)
+    return InfeasibleAssignmentError(
+        f"No valid assignment exists: {len(givers)} employees "
+        f"({_describe(constraints, givers)}) can only give to "
+        f"{len(reachable)} people ({_describe(constraints, reachable)})"
+    )
+
+
+def _build_assignments(
+    table: EmployeeTable,
+    children: List[int],
+    gifts: int = 1
+) -> AssignmentBatch:
+    # Giver-major children, gifts per giver
+    if gifts == 1:
+        givers = array('i', range(len(children)))
+    else:
+        givers = array('i', (slot // gifts for slot in range(len(children))))
+    return AssignmentBatch(table, givers, array('i', children))
+
+
+def _short_cycle_through(children: List[int], givers: List[int], length: int) -> bool:
+    # Whether a loop shorter than length passes through any of givers
+    for start in set(givers):
+        node = children[start]
+        for _ in range(length - 1):
+            if node == start:
+                return True
+            node = children[node]
+    return False
+
+
+class _BatchChildren:
+    # A batch's children indexed by giver id, -1 for ids not giving, for
+    # updating it in place. Indexes the batch on first use.
+    
+    def __init__(self, batch: AssignmentBatch):
+        self.batch = batch
+        if batch.rows is None:
+            size = len(batch.table)
+            batch.rows = array('i', [-1]) * size
+            batch.giver_of = array('i', [-1]) * size
+            for row, (giver, child) in enumerate(zip(batch.givers, batch.children)):
+                batch.rows[giver] = row
+                batch.giver_of[child] = giver
+    
+    def __getitem__(self, giver: int) -> int:
+        row = self.batch.rows[giver]
+        return self.batch.children[row] if row >= 0 else -1
+    
+    def __setitem__(self, giver: int, child: int) -> None:
+        batch = self.batch
+        row = batch.rows[giver]
+        if row < 0:
+            batch.rows[giver] = len(batch.givers)
+            batch.givers.append(giver)
+            batch.children.append(child)
+        else:
+            batch.children[row] = child
+        batch.giver_of[child] = giver
+    
+    def remove(self, giver: int) -> None:
+        # Move the last assignment into the giver's slot
+        batch = self.batch
+        row = batch.rows[giver]
+        last = batch.givers.pop()
+        last_child = batch.children.pop()
+        if last != giver:
+            batch.givers[row] = last
+            batch.children[row] = last_child
+            batch.rows[last] = row
+        batch.rows[giver] = -1
+        batch.giver_of[giver] = -1
+    
+    def grow(self) -> None:
+        # Make room for an id just appended to the table
+        self.batch.rows.append(-1)
+        self.batch.giver_of.append(-1)
+
+
 class AssignmentStrategy(ABC):
+    # Whether generate() honours constraints.min_cycle_length
+    supports_cycle_rules = False
+    # Counters from the last generate() call, for strategies that retry
+    # (None for the others)
+    last_stats: Optional[AssignmentStats] = None
+    # Wall-clock seconds solve() may take, None for no limit. The engine
+    # sets started (a perf_counter time) to the start of the run before
+    # each pre-check, so one budget covers the pre-checks and every group.
+    budget: Optional[float] = None
+    started: Optional[float] = None
     
-    @abstractmethod
     def generate(
         self,
-        employees: List[Employee],
-        previous_assignments: Dict[Employee, Employee]
-    ) -> List[Assignment]:
+        employees: Sequence[Employee],
+        previous_assignments: Dict[Employee, Employee],
+        constraints: Optional[AssignmentConstraints] = None
+    ) -> AssignmentBatch:
+        if len(employees) < self.config.min_employees:
+            raise InsufficientEmployeesError(
+                f"Need at least {self.config.min_employees} employees"
+            )
+        
+        constraints = constraints or AssignmentConstraints(
+            employees,
+            previous_assignments
+        )
+        return _build_assignments(constraints.table, self.solve(constraints))
+    
+    @abstractmethod
+    def solve(self, constraints: AssignmentConstraints) -> List[int]:
+        # Child id for every giver id
         pass
 
 
 class RandomDerangementStrategy(AssignmentStrategy):
+    supports_cycle_rules = True
+    # Random probes into the pool before falling back to a linear scan
+    SAMPLE_TRIES = 32
+    # Random swap partners tried per conflict when repairing the fast path
+    REPAIR_TRIES = 32
+    # Attempt batches queued per worker; smaller batches cancel sooner
+    BATCHES_PER_WORKER = 4
+    # Givers placed between clock checks when an attempt has a deadline
+    CLOCK_CHECK_INTERVAL = 1024
+    
     def __init__(self, config: Optional[Config] = None):
         
         self.config = config or Config()
         self.max_attempts = self.config.max_assignment_attempts
+        self.rng = random.Random(self.config.random_seed)
+        self.last_stats = AssignmentStats(strategy=type(self).__name__)
     
-    def generate(
+    def solve(self, constraints: AssignmentConstraints) -> List[int]:
+        logger.info(
+            f"Generating assignments for {constraints.size} employees "
+            f"with {constraints.history_pairs} previous assignments to avoid"
+        )
+        self.last_stats = AssignmentStats(strategy=type(self).__name__)
+        
+        if self.config.use_sattolo_fast_path:
+            children = [-1] * constraints.size
+            if self._fast_path(constraints, children):
+                logger.info("Found valid assignment on the single-pass fast path")
+                return children
+            logger.info("Fast path repair failed, falling back to retry loop")
+        
+        if self.config.parallel_workers > 1:
+            found, attempts = self._run_parallel_attempts(constraints)
+        else:
+            found, attempts = self._run_attempts(constraints, self.max_attempts)
+        logger.info(f"Run statistics: {self.last_stats.summary()}")
+        
+        if found is not None:
+            logger.info(f"Found valid assignment on attempt {attempts}")
+            return found
+        if constraints.matching is not None and constraints.min_cycle_length <= 2:
+            logger.warning(
+                f"No valid assignment after {self.max_attempts} attempts; "
+                f"using the feasibility pre-check matching"
+            )
+            return constraints.matching
+        
+        raise NoValidAssignmentError(
+            f"Could not find valid assignment after {self.max_attempts} attempts"
+        )
+    
+    def _run_attempts(
         self,
-        employees: List[Employee],
-        previous_assignments: Dict[Employee, Employee]
-    ) -> List[Assignment]:
-        if len(employees) < self.config.min_employees:
-            raise InsufficientEmployeesError(
-                f"Need at least {self.config.min_employees} employees"
+        constraints: AssignmentConstraints,
+        attempts: int,
+        stopped: Optional[Callable[[], bool]] = None
+    ) -> Tuple[Optional[List[int]], int]:
+        # Buffers are allocated once and reused by every attempt.
+        # stopped is polled before each attempt to give up early.
+        order = list(range(constraints.size))
+        pool = [0] * constraints.size
+        children = [-1] * constraints.size
+        cycles = None
+        if constraints.min_cycle_length > 2:
+            cycles = CycleTracker(constraints.size, constraints.min_cycle_length)
+        
+        for attempt in range(attempts):
+            if stopped is not None and stopped():
+                return None, attempt
+            assigned = self._timed_attempt(constraints, order, pool, children, cycles)
+            if assigned == constraints.size:
+                return children, attempt + 1
+        return None, attempts
+    
+    def _run_parallel_attempts(
+        self,
+        constraints: AssignmentConstraints
+    ) -> Tuple[Optional[List[int]], int]:
+        # Split the attempt budget into batches, each with its own RNG
+        # stream seeded from this strategy's generator. The lowest-index
+        # batch that succeeds wins, so a fixed random_seed gives the same
+        # result however the batches are scheduled.
+        workers = self.config.parallel_workers
+        batch_size = max(
+            1,
+            -(-self.max_attempts // (workers * self.BATCHES_PER_WORKER))
+        )
+        batches = [
+            min(batch_size, self.max_attempts - start)
+            for start in range(0, self.max_attempts, batch_size)
+        ]
+        seeds = [self.rng.getrandbits(64) for _ in batches]
+        
+        logger.info(
+            f"Running {self.max_attempts} attempts in {len(batches)} batches "
+            f"across {workers} worker processes"
+        )
+        
+        # Lowest successful batch index so far; higher batches poll it and
+        # stop, lower ones keep going since they may still win
+        context = multiprocessing.get_context()
+        winner = context.Value('i', len(batches))
+        executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=context,
+            initializer=_init_attempt_worker,
+            initargs=(constraints, winner)
+        )
+        attempts_used = 0
+        found: Dict[int, List[int]] = {}
+        try:
+            futures = {
+                executor.submit(_run_attempt_batch, index, seed, attempts): index
+                for index, (seed, attempts) in enumerate(zip(seeds, batches))
+            }
+            unfinished = set(range(len(batches)))
+            for future in as_completed(futures):
+                index = futures[future]
+                children, attempts, stats = future.result()
+                unfinished.discard(index)
+                attempts_used += attempts
+                self.last_stats.merge(stats)
+                if children is not None:
+                    found[index] = children
+                if found and min(unfinished, default=len(batches)) > min(found):
+                    break
+        finally:
+            # Batches still queued are dropped; running ones see winner
+            # and stop after their current attempt. Waiting for them keeps
+            # winner alive while spawned workers may still be unpickling it.
+            executor.shutdown(wait=True, cancel_futures=True)
+        
+        if found:
+            return found[min(found)], attempts_used
+        return None, attempts_used
+    
+    def _fast_path(
+        self,
+        constraints: AssignmentConstraints,
+        children: List[int],
+        until: Optional[float] = None
+    ) -> bool:
+        start = time.perf_counter()
+        found = self._sattolo_assignment(constraints, children, until)
+        self.last_stats.attempts += 1
+        self.last_stats.attempt_seconds.append(time.perf_counter() - start)
+        self.last_stats.fast_path = found
+        return found
+    
+    def _sattolo_assignment(
+        self,
+        constraints: AssignmentConstraints,
+        children: List[int],
+        until: Optional[float] = None
+    ) -> bool:
+        # Sattolo's shuffle yields a single n-cycle, so nobody draws
+        # themselves. Only history conflicts are left to repair, unless
+        # cycle rules apply: a repair swap splits or joins cycles.
+        size = constraints.size
+        children[:] = range(size)
+        for i in range(size - 1, 0, -1):
+            if until is not None and not i % self.CLOCK_CHECK_INTERVAL and (
+                    time.perf_counter() >= until):
+                return False
+            j = self.rng.randrange(i)
+            children[i], children[j] = children[j], children[i]
+        
+        conflicts = [
+            giver for giver in range(size)
+            if not constraints.is_allowed(giver, children[giver])
+        ]
+        if conflicts and constraints.min_cycle_length > 2:
+            return False
+        for giver in conflicts:
+            # An earlier swap may already have fixed this one
+            if constraints.is_allowed(giver, children[giver]):
+                continue
+            if not self._repair(giver, constraints, children):
+                return False
+        return True
+    
+    def _repair(
+        self,
+        giver: int,
+        constraints: AssignmentConstraints,
+        children: List[int]
+    ) -> bool:
+        # Trade children with a random partner when both new pairs are valid
+        size = constraints.size
+        child = children[giver]
+        for tries in range(1, self.REPAIR_TRIES + 1):
+            partner = self.rng.randrange(size)
+            partner_child = children[partner]
+            if (constraints.is_allowed(giver, partner_child) and
+                    constraints.is_allowed(partner, child)):
+                children[giver] = partner_child
+                children[partner] = child
+                self.last_stats.candidates_scanned += tries
+                return True
+        self.last_stats.candidates_scanned += self.REPAIR_TRIES
+        return False
+    
+    def _timed_attempt(
+        self,
+        constraints: AssignmentConstraints,
+        order: List[int],
+        pool: List[int],
+        children: List[int],
+        cycles: Optional[CycleTracker],
+        until: Optional[float] = None
+    ) -> int:
+        start = time.perf_counter()
+        assigned = self._attempt_assignment(
+            constraints, order, pool, children, cycles, until
+        )
+        stats = self.last_stats
+        stats.attempts += 1
+        stats.attempt_seconds.append(time.perf_counter() - start)
+        if assigned < constraints.size:
+            stats.failure_positions.append(assigned)
+        return assigned
+    
+    def _attempt_assignment(
+        self,
+        constraints: AssignmentConstraints,
+        order: List[int],
+        pool: List[int],
+        children: List[int],
+        cycles: Optional[CycleTracker] = None,
+        until: Optional[float] = None
+    ) -> int:
+        # pool[:size] holds the children nobody has picked yet. Picking one
+        # swaps the last live slot into its place, so removal is O(1).
+        # order is shuffled as it goes, so an early stop skips the rest.
+        # Returns how many givers, in order, got a child; past until (a
+        # perf_counter time) the attempt stops where it is.
+        size = constraints.size
+        pool[:] = range(size)
+        if cycles is not None:
+            cycles.reset()
+        
+        for assigned in range(len(order)):
+            if until is not None and not assigned % self.CLOCK_CHECK_INTERVAL and (
+                    time.perf_counter() >= until):
+                return assigned
+            pick = self.rng.randrange(assigned, len(order))
+            giver = order[pick]
+            order[pick] = order[assigned]
+            order[assigned] = giver
+            slot = self._find_valid_slot(giver, pool, size, constraints, cycles)
+            if slot < 0:
+                return assigned
+            
+            children[giver] = pool[slot]
+            if cycles is not None:
+                cycles.link(giver, pool[slot])
+            size -= 1
+            pool[slot] = pool[size]
+        
+        return len(order)
+    
+    def _find_valid_slot(
+        self,
+        giver: int,
+        pool: List[int],
+        size: int,
+        constraints: AssignmentConstraints,
+        cycles: Optional[CycleTracker] = None
+    ) -> int:
+        # Each giver rules out at most a handful of children, so a few
+        # random probes almost always land on a valid one. Children
+        # already taken are out of the pool, so they are never probed.
+        stats = self.last_stats
+        for probe in range(1, self.SAMPLE_TRIES + 1):
+            slot = self.rng.randrange(size)
+            if constraints.is_allowed(giver, pool[slot]) and (
+                    cycles is None or cycles.allows(giver, pool[slot])):
+                stats.candidates_scanned += probe
+                return slot
+            stats.reject(constraints.rejection_reason(giver, pool[slot]) or 'cycle')
+        stats.candidates_scanned += self.SAMPLE_TRIES
+        
+        # Only reached when the pool is nearly exhausted
+        for slot in range(size):
+            if constraints.is_allowed(giver, pool[slot]) and (
+                    cycles is None or cycles.allows(giver, pool[slot])):
+                stats.candidates_scanned += slot + 1
+                return slot
+            stats.reject(constraints.rejection_reason(giver, pool[slot]) or 'cycle')
+        stats.candidates_scanned += size
+        return -1
+
+
+# Constraints and the shared winning batch index of a parallel attempt
+# pool, sent once per worker process instead of once per batch
+_worker_constraints: Optional[AssignmentConstraints] = None
+_worker_winner = None
+
+
+def _init_attempt_worker(constraints: AssignmentConstraints, winner) -> None:
+    global _worker_constraints, _worker_winner
+    _worker_constraints = constraints
+    _worker_winner = winner
+
+
+def _run_attempt_batch(
+    index: int,
+    seed: int,
+    attempts: int
+) -> Tuple[Optional[List[int]], int, AssignmentStats]:
+    assert _worker_constraints is not None
+    strategy = RandomDerangementStrategy()
+    strategy.rng = random.Random(seed)
+    children, used = strategy._run_attempts(
+        _worker_constraints,
+        attempts,
+        lambda: _worker_winner.value < index
+    )
+    if children is not None:
+        with _worker_winner.get_lock():
+            _worker_winner.value = min(_worker_winner.value, index)
+    return children, used, strategy.last_stats
+
+
+class AnytimeStrategy(RandomDerangementStrategy):
+    """Wall-clock budget instead of an attempt count.
+
+    Runs the fast path and random attempts for part of the budget,
+    keeping the attempt that assigned the most givers. It then escalates
+    to Hopcroft-Karp seeded with that partial assignment, which either
+    completes it or proves no assignment exists. With cycle rules, it
+    escalates to the single-chain strategy instead. A perfect matching
+    kept by the engine's pre-check is used as soon as the fast path
+    fails, as random attempts could only find another one.
+    """
+    DEFAULT_BUDGET_SECONDS = 10.0
+    # Share of the budget spent on random attempts before escalating
+    RANDOM_SHARE = 0.5
+    
+    def __init__(self, config: Optional[Config] = None):
+        super().__init__(config)
+        self.budget = self.config.time_budget_seconds or self.DEFAULT_BUDGET_SECONDS
+    
+    def solve(self, constraints: AssignmentConstraints) -> List[int]:
+        start = self.started or time.perf_counter()
+        self.started = None
+        deadline = start + self.budget
+        logger.info(
+            f"Generating assignments for {constraints.size} employees within "
+            f"{self.budget:g}s with {constraints.history_pairs} previous "
+            f"assignments to avoid"
+        )
+        
+        children = [-1] * constraints.size
+        self.last_stats = AssignmentStats(strategy=type(self).__name__)
+        if self.config.use_sattolo_fast_path and (
+                self._fast_path(constraints, children, deadline)):
+            logger.info("Found valid assignment on the single-pass fast path")
+            return children
+        if constraints.min_cycle_length <= 2 and constraints.matching is not None:
+            logger.info("Using the perfect matching from the pre-check")
+            return constraints.matching
+        
+        best, attempts = self._best_attempt(
+            constraints,
+            start + self.budget * self.RANDOM_SHARE
+        )
+        logger.info(f"Run statistics: {self.last_stats.summary()}")
+        matched = sum(1 for child in best if child != UNMATCHED)
+        if matched == constraints.size:
+            logger.info(f"Found valid assignment on attempt {attempts}")
+            return best
+        
+        logger.info(
+            f"Escalating after {attempts} attempts "
+            f"({time.perf_counter() - start:.3f}s); best attempt assigned "
+            f"{matched}/{constraints.size} givers"
+        )
+        if constraints.min_cycle_length > 2:
+            return SingleChainStrategy(self.config).solve(constraints, deadline)
+        
+        children = maximum_matching(constraints, best, deadline, self.rng)
+        if UNMATCHED in children:
+            if time.perf_counter() >= deadline:
+                raise NoValidAssignmentError(
+                    f"Could not find valid assignment within the "
+                    f"{self.budget:g}s time budget"
+                )
+            raise _hall_violation_error(constraints, children)
+        
+        logger.info("Completed the best attempt with exact matching")
+        return children
+    
+    def _best_attempt(
+        self,
+        constraints: AssignmentConstraints,
+        until: float
+    ) -> Tuple[List[int], int]:
+        # Random attempts until the given perf_counter time, cutting the
+        # last one short. Returns the furthest partial assignment,
+        # UNMATCHED elsewhere.
+        size = constraints.size
+        order = list(range(size))
+        pool = [0] * size
+        children = [-1] * size
+        cycles = None
+        if constraints.min_cycle_length > 2:
+            cycles = CycleTracker(size, constraints.min_cycle_length)
+        
+        best = [UNMATCHED] * size
+        best_assigned = -1
+        attempts = 0
+        while True:
+            attempts += 1
+            assigned = self._timed_attempt(
+                constraints, order, pool, children, cycles, until
             )
+            if assigned > best_assigned:
+                best_assigned = assigned
+                best = [UNMATCHED] * size
+                for giver in order[:assigned]:
+                    best[giver] = children[giver]
+            if assigned == size or time.perf_counter() >= until:
+                return best, attempts
+
+
+class BipartiteMatchingStrategy(AssignmentStrategy):
+    
+    def __init__(self, config: Optional[Config] = None):
+        self.config = config or Config()
+        self.rng = random.Random(self.config.random_seed)
+    
+    def solve(self, constraints: AssignmentConstraints) -> List[int]:
+        logger.info(
+            f"Matching {constraints.size} employees with "
+            f"{constraints.history_pairs} previous assignments to avoid"
+        )
+        
+        children = constraints.matching
+        if children is None:
+            children = maximum_matching(constraints, rng=self.rng)
         
+        if UNMATCHED in children:
+            raise _hall_violation_error(constraints, children)
+        
+        logger.info("Found perfect matching")
+        return children
+
+
+class SingleChainStrategy(AssignmentStrategy):
+    # One loop through everyone is as long as a cycle can be
+    supports_cycle_rules = True
+    # Random probes into the off-path pool before a linear scan
+    SAMPLE_TRIES = 32
+    # Random pivots tried per rotation
+    PIVOT_TRIES = 32
+    # Rotations allowed per attempt before restarting from scratch
+    MAX_ROTATIONS = 1000
+    # Path steps between clock checks when there is a deadline
+    CLOCK_CHECK_INTERVAL = 1024
+    
+    def __init__(self, config: Optional[Config] = None):
+        self.config = config or Config()
+        self.max_attempts = self.config.max_assignment_attempts
+        self.rng = random.Random(self.config.random_seed)
+    
+    def solve(
+        self,
+        constraints: AssignmentConstraints,
+        deadline: Optional[float] = None
+    ) -> List[int]:
+        # Past deadline (a perf_counter time) the search gives up
         logger.info(
-            f"Generating assignments for {len(employees)} employees "
-            f"with {len(previous_assignments)} previous assignments to avoid"
+            f"Building a single gift chain for {constraints.size} employees "
+            f"with {constraints.history_pairs} previous assignments to avoid"
         )
+        self._check_connected(constraints)
         
+        self.last_stats = AssignmentStats(strategy=type(self).__name__)
         for attempt in range(self.max_attempts):
-            try:
-                assignments = self._attempt_assignment(
-                    employees, 
-                    previous_assignments
+            if deadline is not None and time.perf_counter() >= deadline:
+                raise NoValidAssignmentError(
+                    f"Could not find a single gift chain before the deadline, "
+                    f"after {attempt} attempts"
+                )
+            self.last_stats.attempts = attempt + 1
+            path = self._build_cycle(constraints, deadline)
+            if path is not None:
+                logger.info(f"Found gift chain on attempt {attempt + 1}")
+                children = [-1] * constraints.size
+                for giver, child in zip(path, path[1:] + path[:1]):
+                    children[giver] = child
+                return children
+        
+        raise NoValidAssignmentError(
+            f"Could not find a single gift chain after {self.max_attempts} attempts"
+        )
+    
+    def _check_connected(self, constraints: AssignmentConstraints) -> None:
+        # A loop through everyone needs every employee to reach every
+        # other one; without that, rotations could never succeed
+        first = constraints.table.names[0]
+        for reverse, problem in (
+            (False, f"no chain of gifts from {first} reaches them"),
+            (True, f"no chain of gifts leads from them back to {first}"),
+        ):
+            stranded = unreachable(constraints, reverse)
+            if stranded:
+                raise InfeasibleAssignmentError(
+                    f"No single gift chain exists: {len(stranded)} employees "
+                    f"({_describe(constraints, stranded)}) are cut off, "
+                    f"{problem}"
                 )
-                logger.info(f"Found valid assignment on attempt {attempt + 1}")
-                return assignments
-            except AssignmentError:
+    
+    def _build_cycle(
+        self,
+        constraints: AssignmentConstraints,
+        deadline: Optional[float] = None
+    ) -> Optional[List[int]]:
+        # Posa rotation-extension: grow a path from a random start by
+        # appending allowed children. When the end is stuck, rotate the
+        # path so a different employee becomes the end and keep going.
+        size = constraints.size
+        pool = list(range(size))
+        remaining = size - 1
+        start = self.rng.randrange(size)
+        pool[start] = pool[remaining]
+        path = [start]
+        rotations = 0
+        
+        while True:
+            if not remaining and constraints.is_allowed(path[-1], path[0]):
+                return path
+            
+            if remaining:
+                slot = self._find_extension(path[-1], pool, remaining, constraints)
+                if slot >= 0:
+                    path.append(pool[slot])
+                    remaining -= 1
+                    pool[slot] = pool[remaining]
+                    if deadline is not None and (
+                            not remaining % self.CLOCK_CHECK_INTERVAL) and (
+                            time.perf_counter() >= deadline):
+                        return None
+                    continue
+            
+            # Rotations cost O(path), so the clock is checked before each
+            if deadline is not None and time.perf_counter() >= deadline:
+                return None
+            if rotations == self.MAX_ROTATIONS or not self._rotate(path, constraints):
+                return None
+            rotations += 1
+    
+    def _find_extension(
+        self,
+        end: int,
+        pool: List[int],
+        size: int,
+        constraints: AssignmentConstraints
+    ) -> int:
+        for _ in range(self.SAMPLE_TRIES):
+            slot = self.rng.randrange(size)
+            if constraints.is_allowed(end, pool[slot]):
+                return slot
+        
+        for slot in range(size):
+            if constraints.is_allowed(end, pool[slot]):
+                return slot
+        return -1
+    
+    def _rotate(self, path: List[int], constraints: AssignmentConstraints) -> bool:
+        # For a pivot p with p -> end allowed, the path
+        #   start .. p, q .. end   becomes   start .. p, end .. q
+        # which is valid when the reversed q .. end segment is allowed too.
+        end = len(path) - 1
+        if end < 2:
+            return False
+        
+        for _ in range(self.PIVOT_TRIES):
+            pivot = self.rng.randrange(end - 1)
+            if not constraints.is_allowed(path[pivot], path[end]):
                 continue
+            if all(
+                constraints.is_allowed(path[i], path[i - 1])
+                for i in range(end, pivot + 1, -1)
+            ):
+                path[pivot + 1:] = path[:pivot:-1]
+                return True
+        return False
+
+
+class BatchedPermutationStrategy(AssignmentStrategy):
+    """Rejection sampling over whole batches of permutations with NumPy.
+
+    Draws a K x n int32 matrix of random permutations and checks self,
+    history, group and reporting-line constraints for every row at once.
+    Do-not-pair lists are sparse, so they are only checked on rows that
+    already passed the vectorized checks.
+    """
+    
+    def __init__(self, config: Optional[Config] = None):
+        if np is None:
+            raise AssignmentError(
+                "BatchedPermutationStrategy requires NumPy "
+                "(install with the 'fast' extra)"
+            )
+        self.config = config or Config()
+        self.max_attempts = self.config.max_assignment_attempts
+        self.rng = np.random.default_rng(self.config.random_seed)
+    
+    def solve(self, constraints: AssignmentConstraints) -> List[int]:
+        size = constraints.size
+        batch = max(1, min(
+            self.config.sampler_batch_size,
+            self.config.sampler_max_cells // size
+        ))
+        logger.info(
+            f"Sampling permutations of {size} employees in batches of {batch} "
+            f"with {constraints.history_pairs} previous assignments to avoid"
+        )
+        
+        self.last_stats = AssignmentStats(strategy=type(self).__name__)
+        identity = np.arange(size, dtype=np.int32)
+        tiled = np.empty((batch, size), dtype=np.int32)
+        
+        for start in range(0, self.max_attempts, batch):
+            rows = min(batch, self.max_attempts - start)
+            tiled[:rows] = identity
+            permutations = self.rng.permuted(tiled[:rows], axis=1)
+            
+            self.last_stats.attempts = start + rows
+            valid = constraints.dense_mask(identity, permutations).all(axis=1)
+            for row in np.flatnonzero(valid):
+                children = permutations[row].tolist()
+                if self._sparse_ok(constraints, children):
+                    self.last_stats.attempts = start + row + 1
+                    logger.info(
+                        f"Found valid assignment on attempt {start + row + 1}"
+                    )
+                    return children
         
         raise NoValidAssignmentError(
             f"Could not find valid assignment after {self.max_attempts} attempts"
         )
     
-    def _attempt_assignment(
+    def _sparse_ok(
+        self,
+        constraints: AssignmentConstraints,
+        children: List[int]
+    ) -> bool:
+        exclusions = constraints.do_not_pair
+        if exclusions is None:
+            return True
+        return not any(
+            exclusions.contains(giver, child)
+            for giver, child in enumerate(children)
+        )
+
+
+class MinCostMatchingStrategy(AssignmentStrategy):
+    """Cheapest valid assignment under a pluggable AssignmentScore.
+
+    When the score only depends on groups (such as offices), the number
+    of gifts between every pair of groups is a transportation problem
+    over k groups. Each giver group -> child group block is then filled
+    with random members by Hopcroft-Karp. Memory is O(n + k^2). If
+    rules below the group level leave a block unfillable, the dense
+    solve below takes over.
+
+    Scores with a cost per pair fall back to the dense Hungarian
+    algorithm, O(n^2) memory and O(n^3) time, so they are refused above
+    MAX_DENSE_SIZE employees per partition. Forbidden pairs get a cost
+    larger than any valid assignment. Rows and columns are shuffled so
+    that equal-cost solutions are picked at random.
+    """
+    # Largest partition the dense Hungarian solver is used for
+    MAX_DENSE_SIZE = 3000
+    # Random splits of groups into blocks tried before exact completion
+    BLOCK_TRIES = 8
+    
+    def __init__(
         self,
-        employees: List[Employee],
-        previous_assignments: Dict[Employee, Employee]
-    ) -> List[Assignment]:
-        # Create shuffled list of potential secret children
-        available = employees.copy()
-        random.shuffle(available)
+        config: Optional[Config] = None,
+        score: Optional[AssignmentScore] = None
+    ):
+        self.config = config or Config()
+        self.score = score or AttributeDistanceScore('office')
+        self.rng = random.Random(self.config.random_seed)
+    
+    def solve(self, constraints: AssignmentConstraints) -> List[int]:
+        logger.info(
+            f"Minimizing {type(self.score).__name__} over {constraints.size} "
+            f"employees with {constraints.history_pairs} previous assignments "
+            f"to avoid"
+        )
+        
+        grouped = self.score.group_costs(constraints.table)
+        if grouped is not None:
+            return self._solve_groups(constraints, *grouped)
+        return self._solve_dense(constraints)
+    
+    def _solve_groups(
+        self,
+        constraints: AssignmentConstraints,
+        groups: List[int],
+        group_cost: List[List[float]]
+    ) -> List[int]:
+        members: List[List[int]] = [[] for _ in group_cost]
+        for employee, group in enumerate(groups):
+            members[group].append(employee)
+        sizes = [len(group) for group in members]
+        flow = min_cost_transport(
+            sizes, sizes, group_cost, self._block_capacity(constraints, members)
+        )
+        
+        # Rules below the group level can leave a block without a perfect
+        # matching; another random split usually has one
+        for _ in range(self.BLOCK_TRIES):
+            assignment = self._fill_blocks(constraints, members, flow)
+            if UNMATCHED not in assignment:
+                break
+        
+        unplaced = assignment.count(UNMATCHED)
+        if unplaced and constraints.size <= self.MAX_DENSE_SIZE:
+            logger.info(
+                f"{unplaced} givers did not fit their cheapest group blocks; "
+                f"solving per pair instead"
+            )
+            return self._solve_dense(constraints)
+        if unplaced:
+            # The exact matching keeps every placed pair it can, but
+            # ignores cost, so the total may exceed the optimum
+            logger.warning(
+                f"{unplaced} givers did not fit their cheapest group blocks and "
+                f"{constraints.size} employees is too many to solve per pair; "
+                f"completing with exact matching, which may cost more"
+            )
+            assignment = maximum_matching(constraints, assignment, rng=self.rng)
+            if UNMATCHED in assignment:
+                raise _hall_violation_error(constraints, assignment)
+        
+        total = sum(
+            group_cost[groups[giver]][groups[child]]
+            for giver, child in enumerate(assignment)
+        )
+        logger.info(
+            f"Found assignment with total cost {total:g} over "
+            f"{len(members)} groups"
+        )
+        return assignment
+    
+    def _fill_blocks(
+        self,
+        constraints: AssignmentConstraints,
+        members: List[List[int]],
+        flow: List[List[int]]
+    ) -> List[int]:
+        # Random givers and children for every block, as runs of the
+        # shuffled members of each group
+        givers = [self.rng.sample(group, len(group)) for group in members]
+        children = [self.rng.sample(group, len(group)) for group in members]
+        blocks = []
+        giver_start = [0] * len(members)
+        child_start = [0] * len(members)
+        for a, row in enumerate(flow):
+            for b, count in enumerate(row):
+                if count:
+                    blocks.append((a, b, giver_start[a], child_start[b], count))
+                    giver_start[a] += count
+                    child_start[b] += count
+        
+        # A block of one inside a group must not pair someone with
+        # themselves; any other child of the group is in an outside block
+        for a, b, giver, child, count in blocks:
+            if count == 1 and a == b and givers[a][giver] == children[b][child]:
+                other = (child + 1) % len(children[b])
+                children[b][child], children[b][other] = (
+                    children[b][other], children[b][child]
+                )
+        
+        assignment = [UNMATCHED] * constraints.size
+        for a, b, giver, child, count in blocks:
+            block_givers = givers[a][giver:giver + count]
+            block_children = children[b][child:child + count]
+            matched = block_matching(constraints, block_givers, block_children, self.rng)
+            for employee, position in zip(block_givers, matched):
+                if position != UNMATCHED:
+                    assignment[employee] = block_children[position]
+        
+        return assignment
+    
+    @staticmethod
+    def _block_capacity(
+        constraints: AssignmentConstraints,
+        members: List[List[int]]
+    ) -> List[List[int]]:
+        # Most gifts a giver group can send a child group: none when a
+        # 'different' rule puts both wholly in the same group, none inside
+        # a group of one, and otherwise the smaller group's size
+        shared = []
+        for rule_groups in constraints.separate_groups:
+            values = [{rule_groups[e] for e in group} for group in members]
+            shared.append([
+                next(iter(value)) if len(value) == 1 else None for value in values
+            ])
+        capacity = []
+        for a, givers in enumerate(members):
+            row = []
+            for b, children in enumerate(members):
+                blocked = (a == b and len(givers) < 2) or any(
+                    rule[a] is not None and rule[a] == rule[b] for rule in shared
+                )
+                row.append(0 if blocked else min(len(givers), len(children)))
+            capacity.append(row)
+        return capacity
+    
+    def _solve_dense(self, constraints: AssignmentConstraints) -> List[int]:
+        if constraints.size > self.MAX_DENSE_SIZE:
+            raise ValidationError(
+                f"{type(self.score).__name__} costs each pair separately, which "
+                f"needs a dense solve limited to {self.MAX_DENSE_SIZE} employees "
+                f"per group, not {constraints.size}; use a score with group "
+                f"costs or split the exchange with a 'same' group rule"
+            )
+        
+        # Solve on a random relabeling so ties are broken at random
+        order = list(range(constraints.size))
+        self.rng.shuffle(order)
+        cost, forbidden = self._cost_matrix(constraints, order)
         
-        assignments = []
-        used_children: Set[Employee] = set()
+        if np is not None:
+            valid = cost[cost < forbidden]
+        else:
+            valid = [value for row in cost for value in row if value < forbidden]
+        if len(valid) and min(valid) == max(valid):
+            # Every valid assignment costs the same
+            children = maximum_matching(constraints, rng=self.rng)
+            if UNMATCHED in children:
+                raise _hall_violation_error(constraints, children)
+            logger.info("All valid pairs cost the same; used exact matching")
+            return children
         
-        for giver in employees:
-            # Find valid secret child
-            child = self._find_valid_child(
-                giver,
-                available,
-                used_children,
-                previous_assignments.get(giver)
+        columns = min_cost_matching(cost)
+        costs = [cost[row][column] for row, column in enumerate(columns)]
+        if max(costs) >= forbidden:
+            raise _hall_violation_error(
+                constraints, maximum_matching(constraints, rng=self.rng)
             )
+        
+        children = [UNMATCHED] * constraints.size
+        for row, column in enumerate(columns):
+            children[order[row]] = order[column]
+        logger.info(f"Found assignment with total cost {sum(costs):g}")
+        return children
+    
+    def _cost_matrix(self, constraints: AssignmentConstraints, order: List[int]):
+        # Score costs between employees in the given order, with every
+        # forbidden pair raised to a cost no valid pair reaches; returns
+        # the matrix and that cost
+        cost = self.score.cost_matrix(constraints.table.subset(order))
+        size = constraints.size
+        
+        if np is not None:
+            cost = np.asarray(cost, dtype=np.float64)
+            ids = np.asarray(order, dtype=np.int32)
+            allowed = constraints.dense_mask(ids[:, None], ids[None, :])
+            exclusions = constraints.do_not_pair
+            if exclusions is not None:
+                position = np.empty(size, dtype=np.int32)
+                position[ids] = np.arange(size, dtype=np.int32)
+                offsets = np.frombuffer(exclusions.offsets, dtype=np.int32)
+                targets = np.frombuffer(exclusions.targets, dtype=np.int32)
+                sources = np.repeat(np.arange(size, dtype=np.int32), np.diff(offsets))
+                allowed[position[sources], position[targets]] = False
+            forbidden = self._forbidden_cost(cost)
+            cost[~allowed] = forbidden
+            return cost, forbidden
+        
+        cost = [list(row) for row in cost]
+        forbidden = self._forbidden_cost(cost)
+        for row, giver in enumerate(order):
+            for column, child in enumerate(order):
+                if not constraints.is_allowed(giver, child):
+                    cost[row][column] = forbidden
+        return cost, forbidden
+    
+    @staticmethod
+    def _forbidden_cost(cost) -> float:
+        # Large enough that one forbidden pair outweighs the spread of
+        # n valid costs, so any valid assignment is cheaper
+        size = len(cost)
+        if np is not None:
+            scale = float(np.abs(cost).max(initial=0.0))
+        else:
+            scale = max((abs(value) for row in cost for value in row), default=0.0)
+        return (2 * scale + 1) * size + 1
+
+
+class MarkovChainStrategy(AssignmentStrategy):
+    """Near-uniform sampling by a random walk over valid assignments.
+
+    First-fit construction favours some assignments over others depending
+    on list order. This chain starts from a Hopcroft-Karp matching and
+    proposes swapping the children of two random givers, keeping the swap
+    only when both new pairs are allowed. Proposals are symmetric, so the
+    uniform distribution over assignments reachable by swaps is
+    stationary. Each step is O(1), or O(log d) with do-not-pair lists.
+    """
+    
+    def __init__(self, config: Optional[Config] = None):
+        self.config = config or Config()
+        self.steps_per_employee = self.config.mixing_steps_per_employee
+        self.rng = random.Random(self.config.random_seed)
+        self.last_diagnostics: Optional[MixingDiagnostics] = None
+    
+    def solve(self, constraints: AssignmentConstraints) -> List[int]:
+        start = constraints.matching
+        if start is None:
+            start = maximum_matching(constraints, rng=self.rng)
+        if UNMATCHED in start:
+            raise _hall_violation_error(constraints, start)
+        
+        steps = self.steps_per_employee * constraints.size
+        logger.info(
+            f"Mixing {constraints.size} employees for {steps} swap steps with "
+            f"{constraints.history_pairs} previous assignments to avoid"
+        )
+        
+        children = list(start)
+        accepted, coverage_step = self._mix(constraints, children, steps)
+        diagnostics = MixingDiagnostics(
+            size=constraints.size,
+            steps=steps,
+            accepted=accepted,
+            moved=sum(1 for a, b in zip(start, children) if a != b),
+            coverage_step=coverage_step
+        )
+        self.last_diagnostics = diagnostics
+        
+        coverage = (
+            f"all givers swapped by step {diagnostics.coverage_step}"
+            if diagnostics.coverage_step is not None
+            else "some givers never swapped (chain may not have mixed)"
+        )
+        logger.info(
+            f"Acceptance rate {diagnostics.acceptance_rate:.1%}, "
+            f"{diagnostics.moved_fraction:.1%} of givers moved from the "
+            f"starting assignment, {coverage}"
+        )
+        return children
+    
+    def _mix(
+        self,
+        constraints: AssignmentConstraints,
+        children: List[int],
+        steps: int
+    ) -> Tuple[int, Optional[int]]:
+        # Swaps children in place; returns accepted swaps and the step at
+        # which every giver had been swapped at least once
+        size = constraints.size
+        is_allowed = constraints.is_allowed
+        randrange = self.rng.randrange
+        
+        touched = bytearray(size)
+        untouched = size
+        coverage_step = None
+        accepted = 0
+        
+        for step in range(steps):
+            a = randrange(size)
+            b = randrange(size)
+            child_a = children[a]
+            child_b = children[b]
+            if a == b or not is_allowed(a, child_b) or not is_allowed(b, child_a):
+                continue
             
-            if child is None:
-                raise AssignmentError("No valid child found")
+            children[a] = child_b
+            children[b] = child_a
+            accepted += 1
             
-            assignments.append(Assignment(employee=giver, secret_child=child))
-            used_children.add(child)
+            if untouched:
+                for giver in (a, b):
+                    if not touched[giver]:
+                        touched[giver] = 1
+                        untouched -= 1
+                if not untouched:
+                    coverage_step = step + 1
         
-        return assignments
-    
-    def _find_valid_child(
-        self,
-        giver: Employee,
-        available: List[Employee],
-        used: Set[Employee],
-        previous_child: Optional[Employee]
-    ) -> Optional[Employee]:
-        for child in available:
-            # Check all constraints:
-            # 1. Not already used
-            # 2. Not the giver themselves (no self-assignment)
-            # 3. Not the same as previous year (NO OVERLAP)
-            if (child not in used and 
-                child != giver and 
-                child != previous_child):
-                return child
-        return None
+        return accepted, coverage_step
 
 
 class AssignmentEngine:
@@ -120,19 +1182,582 @@ class AssignmentEngine:
     
     def create_assignments(
         self,
-        employees: List[Employee],
-        previous_assignments: List[Assignment]
-    ) -> List[Assignment]:
-        # Convert previous assignments to lookup dict
-        # This maps each employee to their secret child from last year
-        previous_map = {
-            assignment.employee: assignment.secret_child
-            for assignment in previous_assignments
-        }
-        
-        logger.info(f"Previous assignments map: {len(previous_map)} entries")
-        for emp, child in previous_map.items():
-            logger.debug(f"  {emp.name} gave to {child.name} last year (will avoid)")
-        
-        # Generate new assignments using strategy
-        return self.strategy.generate(employees, previous_map)
\ No newline at end of file
+        employees: Sequence[Employee],
+        previous_assignments: List[Assignment],
+        history: Optional[List[List[Assignment]]] = None,
+        do_not_pair: Optional[PairExclusionIndex] = None,
+        gifts: Optional[int] = None
+    ) -> AssignmentBatch:
+        assignments, _ = self.create_assignments_with_stats(
+            employees,
+            previous_assignments,
+            history,
+            do_not_pair,
+            gifts
+        )
+        return assignments
+    
+    def create_assignments_with_stats(
+        self,
+        employees: Sequence[Employee],
+        previous_assignments: List[Assignment],
+        history: Optional[List[List[Assignment]]] = None,
+        do_not_pair: Optional[PairExclusionIndex] = None,
+        gifts: Optional[int] = None
+    ) -> Tuple[AssignmentBatch, AssignmentStats]:
+        # With gifts > 1 every employee gives to and receives from that
+        # many distinct people; rows are grouped by giver
+        gifts = gifts or self.config.gifts_per_employee
+        stats = AssignmentStats(strategy=type(self.strategy).__name__)
+        
+        start = time.perf_counter()
+        constraints = self._build_constraints(
+            employees,
+            previous_assignments,
+            history,
+            do_not_pair
+        )
+        stats.phase_seconds['constraints'] = time.perf_counter() - start
+        
+        # One time budget for the whole run, however many groups it has
+        children = self._assign(constraints, gifts, stats, time.perf_counter())
+        batch = _build_assignments(constraints.table, children, gifts)
+        if gifts == 1:
+            batch.constraints = constraints
+        return batch, stats
+    
+    def _assign(
+        self,
+        constraints: AssignmentConstraints,
+        gifts: int,
+        stats: AssignmentStats,
+        started: float
+    ) -> List[int]:
+        # 'same' rules split the exchange into independent groups, which
+        # share the strategy's budget counted from started
+        partitions = constraints.partitions()
+        if len(partitions) == 1:
+            self._check_group(constraints, partitions[0])
+            return self._solve(constraints, gifts, stats, started)
+        
+        logger.info(f"Solving {len(partitions)} groups independently")
+        children = [-1] * (constraints.size * gifts)
+        for members in partitions:
+            self._check_group(constraints, members)
+            group = constraints.subset(members)
+            for slot, child in enumerate(self._solve(group, gifts, stats, started)):
+                giver, rank = divmod(slot, gifts)
+                children[members[giver] * gifts + rank] = members[child]
+        return children
+    
+    def _solve(
+        self,
+        constraints: AssignmentConstraints,
+        gifts: int,
+        stats: AssignmentStats,
+        started: float
+    ) -> List[int]:
+        # Children ids, gifts per giver in giver order. Adds this group's
+        # phase times and strategy counters to stats
+        if constraints.min_cycle_length > 2:
+            self._check_cycle_rules(constraints, gifts)
+        
+        start = time.perf_counter()
+        if gifts == 1:
+            budget = self.strategy.budget
+            self.strategy.started = started
+            self._check_feasibility(constraints, started + budget if budget else None)
+        checked = time.perf_counter()
+        
+        if gifts == 1:
+            children = self.strategy.solve(constraints)
+            if self.strategy.last_stats is not None:
+                stats.merge(self.strategy.last_stats)
+        else:
+            children = self._create_gift_rounds(constraints, gifts)
+        
+        for phase, seconds in (
+            ('feasibility', checked - start),
+            ('generate', time.perf_counter() - checked),
+        ):
+            stats.phase_seconds[phase] = stats.phase_seconds.get(phase, 0.0) + seconds
+        return children
+    
+    def _create_gift_rounds(
+        self,
+        constraints: AssignmentConstraints,
+        gifts: int
+    ) -> List[int]:
+        # A gifts-regular subgraph of the allowed edges, found as one flow
+        # problem rather than by stacking single-gift runs that may collide
+        if constraints.size <= gifts:
+            raise InfeasibleAssignmentError(
+                f"Cannot give {gifts} gifts each among {constraints.size} employees"
+            )
+        
+        logger.info(
+            f"Finding {gifts} gifts each for {constraints.size} employees with "
+            f"{constraints.history_pairs} previous assignments to avoid"
+        )
+        rng = random.Random(self.config.random_seed)
+        children, blocked = regular_assignment(constraints, gifts, rng)
+        
+        if blocked:
+            short = [giver for giver in blocked if len(children[giver]) < gifts]
+            raise InfeasibleAssignmentError(
+                f"No assignment with {gifts} gifts each exists: "
+                f"{len(blocked)} employees ({_describe(constraints, blocked)}) "
+                f"cannot all be given {gifts} valid people; short: "
+                f"{_describe(constraints, short)}"
+            )
+        
+        logger.info(f"Found {gifts}-regular assignment")
+        return [child for row in children for child in row]
+    
+    def update_assignments(
+        self,
+        assignments: Sequence[Assignment],
+        added: List[Employee],
+        removed: List[Employee],
+        previous_assignments: Optional[List[Assignment]] = None,
+        history: Optional[List[List[Assignment]]] = None,
+        do_not_pair: Optional[PairExclusionIndex] = None
+    ) -> AssignmentBatch:
+        # Patch an existing assignment for joiners and leavers. Leavers
+        # are spliced out of their cycle and joiners spliced into a random
+        # edge, so everyone else keeps their child.
+        #
+        # A batch from this engine brings its table and constraints:
+        # leavers are only flagged and joiners appended, and
+        # previous_assignments and history need only the joiners' pairs.
+        # The batch, its table and its constraints are updated in place
+        # and the batch returned, in time proportional to the change once
+        # the batch is indexed. If repair fails a regenerated batch is
+        # returned instead; either way the caller should drop the old one.
+        # Anything else rebuilds the constraints, with do_not_pair indexed
+        # over the updated roster (kept givers, then added).
+        if self.config.gifts_per_employee > 1:
+            raise AssignmentError(
+                "Incremental updates support one gift per employee only"
+            )
+        seen: Set[Employee] = set()
+        repeated = []
+        for employee in added:
+            if employee in seen:
+                repeated.append(employee.name)
+            seen.add(employee)
+        if repeated:
+            raise ValidationError(f"Joiners listed more than once: {repeated}")
+        if isinstance(assignments, AssignmentBatch) and (
+                assignments.constraints is not None and do_not_pair is None):
+            return self._update_batch(
+                assignments, added, removed, previous_assignments, history
+            )
+        
+        # Work on ids of the current givers; leavers are flagged by id
+        current = EmployeeTable.from_employees(a.employee for a in assignments)
+        old_child = [current.id_of(a.secret_child) for a in assignments]
+        gone = bytearray(len(current))
+        
+        unknown = []
+        for employee in removed:
+            giver = current.id_of(employee)
+            if giver is None:
+                unknown.append(employee.name)
+            else:
+                gone[giver] = 1
+        if unknown:
+            logger.warning(f"Ignoring leavers not in the exchange: {unknown}")
+        duplicates = [
+            e.name for e in added
+            if (giver := current.id_of(e)) is not None and not gone[giver]
+        ]
+        if duplicates:
+            raise ValidationError(f"Joiners already in the exchange: {duplicates}")
+        
+        kept = [giver for giver in range(len(current)) if not gone[giver]]
+        roster = current.subset(kept)
+        for employee in added:
+            roster.append(employee)
+        if len(roster) < self.config.min_employees:
+            raise InsufficientEmployeesError(
+                f"Need at least {self.config.min_employees} employees"
+            )
+        
+        constraints = self._build_constraints(
+            roster,
+            previous_assignments or [],
+            history,
+            do_not_pair
+        )
+        children = [-1] * len(roster)
+        changed: List[int] = []
+        renumbered = [-1] * len(current)
+        for giver, old in enumerate(kept):
+            renumbered[old] = giver
+        
+        for giver, old in enumerate(kept):
+            child = old_child[old]
+            if gone[child]:
+                # Skip past every leaver in a row, as the cycle would
+                while gone[child]:
+                    child = old_child[child]
+                changed.append(giver)
+            children[giver] = renumbered[child]
+        
+        if not self._patch(
+                constraints, children, changed, range(len(kept), len(roster))):
+            logger.warning("Local repair failed, regenerating all assignments")
+            return self.create_assignments(
+                roster, previous_assignments or [], history, do_not_pair
+            )
+        
+        logger.info(
+            f"Updated assignments for {len(added)} joiners and "
+            f"{sum(gone)} leavers, changing {len(set(changed))} givers"
+        )
+        
+        return _build_assignments(roster, children)
+    
+    def _update_batch(
+        self,
+        batch: AssignmentBatch,
+        added: List[Employee],
+        removed: List[Employee],
+        previous_assignments: Optional[List[Assignment]],
+        history: Optional[List[List[Assignment]]]
+    ) -> AssignmentBatch:
+        # Updates batch in place and returns it. Ids stay those of
+        # batch.table: leavers keep their table rows but lose their
+        # assignment, whose slot is filled from the end, and joiners seen
+        # before get their old id back. Only the first update of a batch
+        # costs O(n), to index it.
+        table = batch.table
+        constraints = batch.constraints
+        children = _BatchChildren(batch)
+        
+        gone = set()
+        unknown = []
+        for employee in removed:
+            giver = table.id_of(employee)
+            if giver is None or children[giver] < 0:
+                unknown.append(employee.name)
+            else:
+                gone.add(giver)
+        if unknown:
+            logger.warning(f"Ignoring leavers not in the exchange: {unknown}")
+        duplicates = [
+            e.name for e in added
+            if (giver := table.id_of(e)) is not None and
+            children[giver] >= 0 and giver not in gone
+        ]
+        if duplicates:
+            raise ValidationError(f"Joiners already in the exchange: {duplicates}")
+        if len(batch) - len(gone) + len(added) < self.config.min_employees:
+            raise InsufficientEmployeesError(
+                f"Need at least {self.config.min_employees} employees"
+            )
+        
+        changed: List[int] = []
+        for leaver in gone:
+            giver = batch.giver_of[leaver]
+            if giver in gone:
+                continue
+            # Skip past every leaver in a row, as the cycle would
+            child = children[leaver]
+            while child in gone:
+                child = children[child]
+            children[giver] = child
+            changed.append(giver)
+        for leaver in gone:
+            children.remove(leaver)
+        
+        joiners = []
+        for employee in added:
+            joiner = table.id_of(employee)
+            if joiner is None:
+                joiner = constraints.append(employee)
+                children.grow()
+            joiners.append(joiner)
+        self._add_joiner_history(
+            constraints, added, [previous_assignments or []] + list(history or [])
+        )
+        
+        if not self._patch(constraints, children, changed, joiners):
+            logger.warning("Local repair failed, regenerating all assignments")
+            spliced = set(joiners)
+            staying = [
+                giver for giver in batch.givers if giver not in spliced
+            ] + joiners
+            return self._regenerate(constraints, staying)
+        
+        logger.info(
+            f"Updated assignments for {len(added)} joiners and "
+            f"{len(gone)} leavers, changing {len(set(changed))} givers"
+        )
+        return batch
+    
+    def _add_joiner_history(
+        self,
+        constraints: AssignmentConstraints,
+        added: List[Employee],
+        years: List[List[Assignment]]
+    ) -> None:
+        # Past pairs involving a joiner, most recent year first, within
+        # the history window
+        joiners = set(added)
+        for index, year in enumerate(years[:self.config.history_window_years]):
+            for assignment in year:
+                if (assignment.employee not in joiners and
+                        assignment.secret_child not in joiners):
+                    continue
+                giver = constraints.table.id_of(assignment.employee)
+                child = constraints.table.id_of(assignment.secret_child)
+                if giver is None or child is None:
+                    continue
+                while len(constraints.history) <= index:
+                    constraints.history.append(array('i', [-1]) * constraints.size)
+                constraints.history[index][giver] = child
+                constraints.history_pairs += 1
+    
+    def _patch(
+        self,
+        constraints: AssignmentConstraints,
+        children: List[int],
+        changed: List[int],
+        joiners: Sequence[int]
+    ) -> bool:
+        # Repair forbidden edges among changed givers, then splice in
+        # joiners. False when any step fails.
+        rng = random.Random(self.config.random_seed)
+        repaired = all(
+            self._repair_edge(constraints, children, giver, changed, rng)
+            for giver in list(changed)
+            if not constraints.is_allowed(giver, children[giver])
+        )
+        repaired = repaired and all(
+            self._splice_in(constraints, children, joiner, changed, rng)
+            for joiner in joiners
+        )
+        
+        # Skipping leavers and swapping children can shorten cycles, but
+        # only those through a changed giver
+        return repaired and (
+            constraints.min_cycle_length <= 2 or
+            not _short_cycle_through(children, changed, constraints.min_cycle_length)
+        )
+    
+    def _regenerate(
+        self,
+        constraints: AssignmentConstraints,
+        members: List[int]
+    ) -> AssignmentBatch:
+        # Solve again from scratch for members, keeping every rule
+        sub = constraints.subset(members)
+        if constraints.partition is not None:
+            sub.partition = array('i', (constraints.partition[i] for i in members))
+            sub.partition_steps = constraints.partition_steps
+        stats = AssignmentStats(strategy=type(self.strategy).__name__)
+        batch = _build_assignments(
+            sub.table, self._assign(sub, 1, stats, time.perf_counter())
+        )
+        batch.constraints = sub
+        return batch
+    
+    def _repair_edge(
+        self,
+        constraints: AssignmentConstraints,
+        children: List[int],
+        giver: int,
+        changed: List[int],
+        rng: random.Random
+    ) -> bool:
+        # Trade children with a random partner when both new pairs are valid
+        child = children[giver]
+        for _ in range(RandomDerangementStrategy.REPAIR_TRIES):
+            partner = rng.randrange(constraints.size)
+            partner_child = children[partner]
+            if partner_child < 0:
+                continue
+            if (constraints.is_allowed(giver, partner_child) and
+                    constraints.is_allowed(partner, child)):
+                children[giver] = partner_child
+                children[partner] = child
+                changed.extend((giver, partner))
+                return True
+        return False
+    
+    def _splice_in(
+        self,
+        constraints: AssignmentConstraints,
+        children: List[int],
+        joiner: int,
+        changed: List[int],
+        rng: random.Random
+    ) -> bool:
+        # Turn a random edge a -> b into a -> joiner -> b
+        for _ in range(RandomDerangementStrategy.REPAIR_TRIES):
+            giver = rng.randrange(constraints.size)
+            child = children[giver]
+            if child < 0:
+                continue
+            if (constraints.is_allowed(giver, joiner) and
+                    constraints.is_allowed(joiner, child)):
+                children[giver] = joiner
+                children[joiner] = child
+                changed.extend((giver, joiner))
+                return True
+        return False
+    
+    def _build_constraints(
+        self,
+        employees: Sequence[Employee],
+        previous_assignments: List[Assignment],
+        history: Optional[List[List[Assignment]]],
+        do_not_pair: Optional[PairExclusionIndex]
+    ) -> AssignmentConstraints:
+        # Last year first, then older years; anything past the window is
+        # allowed to repeat
+        years = [previous_assignments] + list(history or [])
+        window = self.config.history_window_years
+        if len(years) > window:
+            logger.info(
+                f"Ignoring {len(years) - window} years of history "
+                f"outside the {window}-year window"
+            )
+            years = years[:window]
+        
+        constraints = AssignmentConstraints(employees)
+        constraints.reverse_history = self.config.forbid_reverse_history
+        constraints.min_cycle_length = max(
+            self.config.min_cycle_length,
+            3 if self.config.forbid_two_cycles else 2
+        )
+        for year in years:
+            if year:
+                constraints.add_history_year(
+                    (assignment.employee, assignment.secret_child)
+                    for assignment in year
+                )
+        
+        logger.info(
+            f"History exclusions: {constraints.history_pairs} pairs "
+            f"over {len(constraints.history)} years"
+        )
+        
+        if constraints.reverse_history:
+            logger.info("Also avoiding reversed pairs from past years")
+        if constraints.min_cycle_length > 2:
+            logger.info(
+                f"Gift cycles must include at least "
+                f"{constraints.min_cycle_length} people"
+            )
+        
+        if do_not_pair is not None:
+            constraints.do_not_pair = do_not_pair
+            logger.info(f"Do-not-pair exclusions: {do_not_pair.pair_count} pairs")
+        
+        depth = self.config.reporting_line_depth
+        if depth > 0:
+            constraints.reporting_lines = ReportingLines(constraints.table, depth)
+            logger.info(f"Avoiding reporting lines up to {depth} levels apart")
+        
+        for attribute, mode in self.config.group_rules.items():
+            constraints.add_group_rule(attribute, mode)
+            logger.info(f"Group rule: {mode} {attribute}")
+        
+        return constraints
+    
+    def _check_group(
+        self,
+        constraints: AssignmentConstraints,
+        members: List[int]
+    ) -> None:
+        if len(members) < self.config.min_employees:
+            names = ', '.join(constraints.table.names[i] for i in members)
+            raise InfeasibleAssignmentError(
+                f"Group rules leave {names} with nobody to exchange with"
+            )
+        
+        conflict = constraints.group_conflict(members)
+        if conflict:
+            raise InfeasibleAssignmentError(
+                f"Group rules cannot be satisfied: {conflict}"
+            )
+    
+    def _check_cycle_rules(
+        self,
+        constraints: AssignmentConstraints,
+        gifts: int
+    ) -> None:
+        if gifts > 1 or not self.strategy.supports_cycle_rules:
+            raise ValidationError(
+                f"A minimum cycle length needs a single gift per employee and "
+                f"the random or chain strategy, not "
+                f"{type(self.strategy).__name__} with {gifts} gifts"
+            )
+        if constraints.size < constraints.min_cycle_length:
+            raise InfeasibleAssignmentError(
+                f"Cannot form gift cycles of at least "
+                f"{constraints.min_cycle_length} people among "
+                f"{_describe(constraints, list(range(constraints.size)))}"
+            )
+    
+    def _check_feasibility(
+        self,
+        constraints: AssignmentConstraints,
+        deadline: Optional[float] = None
+    ) -> None:
+        # Runs before any attempt so impossible constraints fail fast,
+        # naming the employees responsible. Past deadline the matching
+        # is abandoned and the strategy left to decide.
+        if not self.config.feasibility_precheck:
+            return
+        if constraints.size < self.config.min_employees:
+            return
+        
+        # When everyone has at least n/2 allowed partners on both sides,
+        # Hall's condition holds and the matching can be skipped
+        forbidden_givers, forbidden_children = constraints.forbidden_bounds()
+        forbidden = max(max(forbidden_givers), max(forbidden_children))
+        if 2 * (constraints.size - forbidden) >= constraints.size:
+            logger.info("Feasibility pre-check passed on partner counts")
+            return
+        
+        # Degree screening: any allowed edge at all? Stops at the first hit
+        stranded_givers = [
+            giver for giver in range(constraints.size)
+            if next(constraints.candidates(giver), None) is None
+        ]
+        stranded_children = [
+            child for child in range(constraints.size)
+            if next(constraints.sources(child), None) is None
+        ]
+        if stranded_givers or stranded_children:
+            reasons = []
+            if stranded_givers:
+                reasons.append(
+                    f"{_describe(constraints, stranded_givers)} cannot give to anyone"
+                )
+            if stranded_children:
+                reasons.append(
+                    f"nobody can give to {_describe(constraints, stranded_children)}"
+                )
+            raise InfeasibleAssignmentError(
+                f"No valid assignment exists: {'; '.join(reasons)}"
+            )
+        
+        # Hall's condition holds exactly when a perfect matching exists
+        children = maximum_matching(
+            constraints,
+            deadline=deadline,
+            rng=random.Random(self.config.random_seed)
+        )
+        if UNMATCHED in children:
+            if deadline is not None and time.perf_counter() >= deadline:
+                logger.warning("Feasibility pre-check ran out of time budget")
+                return
+            raise _hall_violation_error(constraints, children)
+        # Kept for the strategy as a starting point or last resort
+        constraints.matching = children
+        logger.info("Feasibility pre-check passed")
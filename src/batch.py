@@ -0,0 +1,180 @@
+import sys
+import time
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .config import Config
+from .csv_handler import CSVHandler
+from .main import STRATEGIES, SecretSantaApplication
+from .models import TenantJob, TenantResult
+from .exceptions import SecretSantaException
+
+
+logger = logging.getLogger(__name__)
+
+
+# Strategy name used by every tenant in this worker process
+_worker_strategy = 'random'
+
+
+def _init_batch_worker(settings: Dict[str, Any], strategy: str) -> None:
+    # Runs once per worker process: Config and logging are set up here
+    # and reused by every tenant the worker handles
+    global _worker_strategy
+    _worker_strategy = strategy
+    config = Config()
+    config.__dict__.update(settings)
+    config.setup_logging()
+
+
+def _run_tenant(job: TenantJob) -> TenantResult:
+    start = time.perf_counter()
+    logger.info(f"[{job.tenant}] Starting")
+
+    # One broken tenant must not take the rest of the batch down
+    try:
+        app = SecretSantaApplication(
+            employees_file=job.employees_file,
+            output_file=job.output_file,
+            strategy=_worker_strategy,
+            previous_files=[job.previous_file] if job.previous_file else []
+        )
+        success = app.run()
+        error = app.last_error
+    except Exception as e:
+        logger.exception(f"[{job.tenant}] Unexpected error: {str(e)}")
+        success = False
+        error = f"Unexpected error: {str(e)}"
+
+    return TenantResult(
+        tenant=job.tenant,
+        success=success,
+        seconds=time.perf_counter() - start,
+        error=error
+    )
+
+
+class BatchRunner:
+
+    def __init__(
+        self,
+        workers: int = 1,
+        strategy: str = 'random',
+        config: Optional[Config] = None
+    ):
+        self.config = config or Config()
+        self.workers = workers
+        self.strategy = strategy
+        self.csv_handler = CSVHandler(self.config)
+
+    def run(self, jobs: List[TenantJob]) -> List[TenantResult]:
+        logger.info(f"Running {len(jobs)} tenants on {self.workers} workers")
+
+        if self.workers <= 1:
+            _init_batch_worker(dict(vars(self.config)), self.strategy)
+            return [_run_tenant(job) for job in jobs]
+
+        with ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_batch_worker,
+            initargs=(dict(vars(self.config)), self.strategy)
+        ) as executor:
+            # map keeps results in manifest order
+            return list(executor.map(_run_tenant, jobs))
+
+    def run_manifest(
+        self,
+        manifest_file: Path,
+        report_file: Optional[Path] = None
+    ) -> List[TenantResult]:
+        jobs = self.csv_handler.read_batch_manifest(manifest_file)
+
+        start = time.perf_counter()
+        results = self.run(jobs)
+        elapsed = time.perf_counter() - start
+
+        self._log_report(results, elapsed)
+        if report_file is not None:
+            self.csv_handler.write_batch_report(results, report_file)
+        return results
+
+    def _log_report(self, results: List[TenantResult], elapsed: float) -> None:
+        succeeded = sum(1 for result in results if result.success)
+        width = max([len(result.tenant) for result in results] + [6])
+
+        logger.info("=" * 60)
+        logger.info(f"{'Tenant':<{width}}  Status  Seconds")
+        for result in results:
+            status = 'OK' if result.success else 'FAILED'
+            logger.info(f"{result.tenant:<{width}}  {status:<6}  {result.seconds:7.3f}")
+            if result.error:
+                logger.info(f"{'':<{width}}  -> {result.error}")
+        logger.info("=" * 60)
+        logger.info(
+            f"{succeeded}/{len(results)} tenants succeeded in {elapsed:.3f}s"
+        )
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description='Secret Santa batch mode: run many companies in one process',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Manifest format (CSV, paths relative to the manifest):
+  Tenant,Employees_File,Previous_File,Output_File
+  acme,acme/employees.csv,acme/2024.csv,acme/2025.csv
+  globex,globex/employees.csv,,globex/2025.csv
+
+Examples:
+  python -m src.batch --manifest data/tenants.csv --workers 8
+        """
+    )
+
+    parser.add_argument(
+        '--manifest',
+        type=Path,
+        required=True,
+        help='Path to CSV manifest of tenants'
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=1,
+        help='Worker processes to spread tenants over (default: 1)'
+    )
+    parser.add_argument(
+        '--strategy',
+        choices=sorted(STRATEGIES),
+        default='random',
+        help='Assignment strategy used for every tenant'
+    )
+    parser.add_argument(
+        '--report',
+        type=Path,
+        help='Path for the per-tenant CSV report'
+    )
+
+    args = parser.parse_args()
+
+    config = Config()
+    config.setup_logging()
+
+    try:
+        results = BatchRunner(
+            workers=args.workers,
+            strategy=args.strategy,
+            config=config
+        ).run_manifest(args.manifest, args.report)
+    except SecretSantaException as e:
+        logger.error(f"Batch error: {str(e)}")
+        sys.exit(1)
+
+    sys.exit(0 if all(result.success for result in results) else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,6 @@
 import logging
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Optional
 
 
 class Config:
@@ -24,25 +24,73 @@ class Config:
         self.employees_file = self.data_dir / 'Employee-List.csv'
         self.previous_assignments_file = self.data_dir / 'secret_santa_assignments_old.csv'
         self.output_file = self.output_dir / 'secret_santa_assignments.csv'
+        self.do_not_pair_file: Optional[Path] = None
         
         # CSV field names
         self.employee_fields = ['Employee_Name', 'Employee_EmailID']
+        # Optional employee columns, mapped to Employee attributes
+        self.optional_employee_fields = {
+            'Department': 'department',
+            'Office': 'office',
+            'Manager_EmailID': 'manager_email',
+        }
         self.assignment_fields = [
             'Employee_Name', 
             'Employee_EmailID',
             'Secret_Child_Name',
             'Secret_Child_EmailID'
         ]
+        self.do_not_pair_fields = ['Employee_EmailID', 'Excluded_EmailID']
+        # Employees validated and handed on per chunk when streaming a file
+        self.employee_chunk_size = 10_000
+        # Processes parsing byte ranges of large input files (1 = one pass)
+        self.csv_read_workers = 1
+        self.batch_manifest_fields = ['Tenant', 'Employees_File', 'Output_File']
+        self.batch_report_fields = ['Tenant', 'Status', 'Seconds', 'Error']
         
         # Assignment constraints
         self.max_assignment_attempts = 1000
         self.min_employees = 2
+        self.use_sattolo_fast_path = True
+        # Check the constraint graph for infeasibility before any attempt
+        self.feasibility_precheck = True
+        # Wall-clock budget for the anytime strategy (None = its default)
+        self.time_budget_seconds: Optional[float] = None
+        # Seed for reproducible runs (None = fresh entropy every run)
+        self.random_seed: Optional[int] = None
+        # Worker processes for independent random attempts (1 = in-process)
+        self.parallel_workers = 1
+        # Batched NumPy sampler: permutations per batch, and a cap on
+        # batch rows x employees to bound the matrix size
+        self.sampler_batch_size = 64
+        self.sampler_max_cells = 2 ** 24
+        # People each employee gives to (and receives from)
+        self.gifts_per_employee = 1
+        # Markov-chain sampler: swap proposals per employee before sampling
+        self.mixing_steps_per_employee = 50
+        # Group rules: Employee attribute -> 'same' or 'different'
+        self.group_rules: Dict[str, str] = {}
+        # Forbid pairs where one manages the other within this many levels
+        # (0 = off, 1 = manager and direct reports, 2 = skip-levels too)
+        self.reporting_line_depth = 0
+        # No giver is paired with a child they had within this many years
+        self.history_window_years = 5
+        # Also forbid B -> A when A -> B happened within the window
+        self.forbid_reverse_history = False
+        # Reciprocal pairs (A -> B -> A) spoil the surprise
+        self.forbid_two_cycles = False
+        # Shortest gift loop allowed (2 = any; random and chain strategies)
+        self.min_cycle_length = 2
         
         # Logging
         self.log_level = logging.INFO
         self.log_format = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
     
     def setup_logging(self):
+        # Configure once per process; repeated calls (e.g. one application
+        # per tenant in batch mode) must not open another log file handle
+        if logging.getLogger().handlers:
+            return
         logging.basicConfig(
             level=self.log_level,
             format=self.log_format,
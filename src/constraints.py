@@ -0,0 +1,512 @@
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from .models import Employee, EmployeeTable
+from .exceptions import ValidationError
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+
+GROUP_ATTRIBUTES = ('department', 'office')
+GROUP_MODES = ('same', 'different')
+
+
+def group_ids(
+    values: Iterable[Optional[str]],
+    ids: Optional[Dict[str, int]] = None
+) -> array:
+    # Dense group id per employee; a missing value forms its own group.
+    # ids maps lowered values to group ids and is filled in as it goes.
+    ids = {} if ids is None else ids
+    return array('i', (
+        ids.setdefault((value or '').lower(), len(ids)) for value in values
+    ))
+
+
+def as_table(employees: Union[EmployeeTable, Sequence[Employee]]) -> EmployeeTable:
+    if isinstance(employees, EmployeeTable):
+        return employees
+    return EmployeeTable.from_employees(employees)
+
+
+class PairExclusionIndex:
+    """Symmetric never-pair lists stored as compressed sparse rows.
+
+    neighbours of employee i are targets[offsets[i]:offsets[i + 1]],
+    kept sorted so membership is a binary search over a short row.
+    """
+
+    def __init__(self, size: int, pairs: Iterable[Tuple[int, int]]):
+        first = array('i')
+        second = array('i')
+        for a, b in pairs:
+            if a != b:
+                first.append(a)
+                second.append(b)
+
+        degree = array('i', [0]) * (size + 1)
+        for a, b in zip(first, second):
+            degree[a + 1] += 1
+            degree[b + 1] += 1
+        for i in range(size):
+            degree[i + 1] += degree[i]
+        self.offsets = degree
+
+        fill = array('i', degree[:size])
+        self.targets = array('i', [0]) * degree[size]
+        for a, b in zip(first, second):
+            self.targets[fill[a]] = b
+            fill[a] += 1
+            self.targets[fill[b]] = a
+            fill[b] += 1
+
+        for i in range(size):
+            start, end = self.offsets[i], self.offsets[i + 1]
+            if end - start > 1:
+                self.targets[start:end] = array(
+                    'i', sorted(self.targets[start:end])
+                )
+
+        self.pair_count = len(first)
+
+    def contains(self, a: int, b: int) -> bool:
+        start, end = self.offsets[a], self.offsets[a + 1]
+        if start == end:
+            return False
+        slot = bisect_left(self.targets, b, start, end)
+        return slot < end and self.targets[slot] == b
+
+
+class ReportingLines:
+    """Org chart flattened into Euler-tour intervals.
+
+    u manages v (directly or through intermediate managers) exactly when
+    v's entry time falls inside u's interval, so every check is O(1).
+    """
+
+    def __init__(
+        self,
+        employees: Union[EmployeeTable, Sequence[Employee]],
+        depth: int
+    ):
+        self.depth = depth
+        table = as_table(employees)
+        size = len(table)
+        index = {email.lower(): i for i, email in enumerate(table.emails)}
+
+        reports: List[List[int]] = [[] for _ in range(size)]
+        has_manager = [False] * size
+        for i, manager_email in enumerate(table.manager_emails):
+            manager = index.get((manager_email or '').lower())
+            if manager is not None and manager != i:
+                reports[manager].append(i)
+                has_manager[i] = True
+
+        self.entry = array('i', [-1]) * size
+        self.exit = array('i', [0]) * size
+        self.level = array('i', [0]) * size
+        # Everyone named as a manager, present or not, for append()
+        self.managers = {
+            (manager_email or '').lower() for manager_email in table.manager_emails
+        }
+        timer = 0
+
+        # Start from the top of the tree; anyone left over sits on a
+        # manager cycle in the data, which is cut at the first member seen
+        roots = [i for i in range(size) if not has_manager[i]]
+        for root in roots + list(range(size)):
+            if self.entry[root] >= 0:
+                continue
+            self.entry[root] = timer
+            timer += 1
+            stack = [(root, iter(reports[root]))]
+            while stack:
+                manager, pending = stack[-1]
+                for report in pending:
+                    if self.entry[report] < 0:
+                        self.entry[report] = timer
+                        self.level[report] = self.level[manager] + 1
+                        timer += 1
+                        stack.append((report, iter(reports[report])))
+                        break
+                else:
+                    self.exit[manager] = timer
+                    stack.pop()
+        # First entry time no interval covers, for append()
+        self.end = timer
+
+    def subset(self, members: List[int]) -> 'ReportingLines':
+        # Intervals only ever compare with each other, so slicing keeps them valid
+        sub = ReportingLines.__new__(ReportingLines)
+        sub.depth = self.depth
+        sub.entry = array('i', (self.entry[i] for i in members))
+        sub.exit = array('i', (self.exit[i] for i in members))
+        sub.level = array('i', (self.level[i] for i in members))
+        sub.managers = self.managers
+        sub.end = self.end
+        return sub
+    
+    def append(self, table: EmployeeTable) -> bool:
+        # Place the table's newest row. Only someone outside the chart can
+        # be added in place; False means the chart must be laid out again.
+        new_id = len(table) - 1
+        if table.manager_emails[new_id] or (
+                table.emails[new_id].lower() in self.managers):
+            return False
+        # Entry times stay below end, even in a subset, so end starts an
+        # interval of its own
+        self.entry.append(self.end)
+        self.exit.append(self.end + 1)
+        self.level.append(0)
+        self.end += 1
+        return True
+
+    def manages(self, manager: int, report: int) -> bool:
+        return (
+            self.entry[manager] <= self.entry[report] < self.exit[manager] and
+            self.level[report] - self.level[manager] <= self.depth
+        )
+
+    def related(self, a: int, b: int) -> bool:
+        return self.manages(a, b) or self.manages(b, a)
+
+
+class CycleTracker:
+    """Path bookkeeping for an assignment built one edge at a time.
+
+    Picked giver -> child edges form disjoint paths until one is closed
+    into a cycle. Each path's first node knows its last node and length,
+    and each last node knows its first, so telling whether a new edge
+    closes a cycle shorter than min_length is O(1).
+    """
+
+    def __init__(self, size: int, min_length: int):
+        self.size = size
+        self.min_length = min_length
+        self.reset()
+
+    def reset(self) -> None:
+        self.first = list(range(self.size))
+        self.last = list(range(self.size))
+        self.length = [1] * self.size
+
+    def allows(self, giver: int, child: int) -> bool:
+        # giver has no child yet (a path end), child no giver (a path start)
+        return self.first[giver] != child or self.length[child] >= self.min_length
+
+    def link(self, giver: int, child: int) -> None:
+        head = self.first[giver]
+        if head == child:
+            return
+        tail = self.last[child]
+        self.first[tail] = head
+        self.last[head] = tail
+        self.length[head] += self.length[child]
+
+
+class AssignmentConstraints:
+
+    def __init__(
+        self,
+        employees: Union[EmployeeTable, Sequence[Employee]],
+        previous_assignments: Optional[Dict[Employee, Employee]] = None
+    ):
+        # Everything below works on the table's integer ids
+        self.table = as_table(employees)
+        self.size = len(self.table)
+
+        # One int32 array per past year, most recent first.
+        # history[year][giver] is that year's child index, -1 if none.
+        self.history: List[array] = []
+        self.history_pairs = 0
+        # Also forbid reversing a past pair (B -> A after A -> B)
+        self.reverse_history = False
+        # Shortest gift loop allowed; 3 rules out A -> B -> A. Checked by
+        # strategies while building, not by is_allowed.
+        self.min_cycle_length = 2
+        self.do_not_pair: Optional[PairExclusionIndex] = None
+        self.reporting_lines: Optional[ReportingLines] = None
+        
+        # Group id arrays for 'different' rules: giver and child must differ
+        self.separate_groups: List[array] = []
+        self.separate_attributes: List[str] = []
+        # Combined group id of all 'same' rules, None when there are none
+        self.partition: Optional[array] = None
+        # A perfect matching found by the feasibility pre-check, if it ran;
+        # ignores min_cycle_length
+        self.matching: Optional[List[int]] = None
+        # Value -> group id of each 'different' rule, and of each 'same'
+        # rule with the dict folding it into partition, for append()
+        self.separate_keys: List[Dict[str, int]] = []
+        self.partition_steps: List[
+            Tuple[str, Dict[str, int], Optional[Dict[Tuple[int, int], int]]]
+        ] = []
+        if previous_assignments:
+            self.add_history_year(previous_assignments.items())
+
+    def add_history_year(self, pairs: Iterable[Tuple[Employee, Employee]]) -> None:
+        year = array('i', [-1]) * self.size
+        for giver, child in pairs:
+            giver_id = self.table.id_of(giver)
+            child_id = self.table.id_of(child)
+            if giver_id is not None and child_id is not None:
+                year[giver_id] = child_id
+                self.history_pairs += 1
+        self.history.append(year)
+
+    def add_group_rule(self, attribute: str, mode: str) -> None:
+        if attribute not in GROUP_ATTRIBUTES:
+            raise ValidationError(f"Unknown group attribute: {attribute}")
+        if mode not in GROUP_MODES:
+            raise ValidationError(f"Unknown group rule for {attribute}: {mode}")
+        
+        keys: Dict[str, int] = {}
+        groups = group_ids(self.table.column(attribute), keys)
+        if mode == 'different':
+            self.separate_groups.append(groups)
+            self.separate_attributes.append(attribute)
+            self.separate_keys.append(keys)
+        elif self.partition is None:
+            self.partition = groups
+            self.partition_steps.append((attribute, keys, None))
+        else:
+            combined: Dict[Tuple[int, int], int] = {}
+            self.partition = array('i', (
+                combined.setdefault(key, len(combined))
+                for key in zip(self.partition, groups)
+            ))
+            self.partition_steps.append((attribute, keys, combined))
+    
+    def append(self, employee: Employee) -> int:
+        # Add an employee to the table and every rule, without history or
+        # do-not-pair entries. Returns their id.
+        employee_id = self.table.append(employee)
+        self.size += 1
+        self.matching = None
+        
+        for year in self.history:
+            year.append(-1)
+        if self.do_not_pair is not None:
+            self.do_not_pair.offsets.append(self.do_not_pair.offsets[-1])
+        
+        for attribute, keys, groups in zip(
+                self.separate_attributes, self.separate_keys, self.separate_groups):
+            value = (self.table.column(attribute)[employee_id] or '').lower()
+            groups.append(keys.setdefault(value, len(keys)))
+        if self.partition is not None:
+            group = -1
+            for attribute, keys, combined in self.partition_steps:
+                value = (self.table.column(attribute)[employee_id] or '').lower()
+                part = keys.setdefault(value, len(keys))
+                if combined is None:
+                    group = part
+                else:
+                    group = combined.setdefault((group, part), len(combined))
+            self.partition.append(group)
+        
+        lines = self.reporting_lines
+        if lines is not None and not lines.append(self.table):
+            self.reporting_lines = ReportingLines(self.table, lines.depth)
+        return employee_id
+    
+    def partitions(self) -> List[List[int]]:
+        # Employees that 'same' rules allow to exchange with each other
+        if self.partition is None:
+            return [list(range(self.size))]
+        members: Dict[int, List[int]] = {}
+        for employee, group in enumerate(self.partition):
+            members.setdefault(group, []).append(employee)
+        return list(members.values())
+    
+    def subset(self, members: List[int]) -> 'AssignmentConstraints':
+        # Restrict every constraint to one partition, renumbering ids
+        sub = AssignmentConstraints(self.table.subset(members))
+        local = {employee: i for i, employee in enumerate(members)}
+        
+        for year in self.history:
+            sub_year = array('i', (local.get(year[i], -1) for i in members))
+            sub.history.append(sub_year)
+            sub.history_pairs += sum(1 for child in sub_year if child >= 0)
+        sub.reverse_history = self.reverse_history
+        sub.min_cycle_length = self.min_cycle_length
+        
+        if self.do_not_pair is not None:
+            exclusions = self.do_not_pair
+            sub.do_not_pair = PairExclusionIndex(len(members), (
+                (local[a], local[b])
+                for a in members
+                for b in exclusions.targets[
+                    exclusions.offsets[a]:exclusions.offsets[a + 1]
+                ]
+                if a < b and b in local
+            ))
+        
+        sub.separate_groups = [
+            array('i', (groups[i] for i in members))
+            for groups in self.separate_groups
+        ]
+        sub.separate_attributes = list(self.separate_attributes)
+        sub.separate_keys = list(self.separate_keys)
+        if self.reporting_lines is not None:
+            sub.reporting_lines = self.reporting_lines.subset(members)
+        return sub
+    
+    def group_conflict(self, members: List[int]) -> Optional[str]:
+        # Group-level Hall check: everyone in a group that must give
+        # outside it also receives from outside, so no group may hold
+        # more than half of the exchange
+        for attribute, groups in zip(self.separate_attributes, self.separate_groups):
+            sizes: Dict[int, List[int]] = {}
+            for employee in members:
+                sizes.setdefault(groups[employee], []).append(employee)
+            largest = max(sizes.values(), key=len)
+            if 2 * len(largest) > len(members):
+                value = self.table.column(attribute)[largest[0]] or 'unset'
+                return (
+                    f"{len(largest)} of {len(members)} employees share "
+                    f"{attribute} '{value}'"
+                )
+        return None
+    
+    def forbidden_bounds(self) -> Tuple[array, array]:
+        # Upper bounds on how many children each giver, and givers each
+        # child, is forbidden, in O(n) per rule. Pairs broken by several
+        # rules are counted once per rule.
+        size = self.size
+        givers = array('i', [1]) * size
+        children = array('i', [1]) * size
+        
+        if self.partition is not None:
+            counts = Counter(self.partition)
+            for i, group in enumerate(self.partition):
+                givers[i] += size - counts[group]
+                children[i] += size - counts[group]
+        for groups in self.separate_groups:
+            counts = Counter(groups)
+            for i, group in enumerate(groups):
+                givers[i] += counts[group] - 1
+                children[i] += counts[group] - 1
+        for year in self.history:
+            received = array('i', [0]) * size
+            for giver, child in enumerate(year):
+                if child >= 0:
+                    givers[giver] += 1
+                    received[child] += 1
+            for i in range(size):
+                children[i] += received[i]
+                if self.reverse_history:
+                    givers[i] += received[i]
+                    children[i] += year[i] >= 0
+        
+        lines = self.reporting_lines
+        if lines is not None:
+            # Managers within depth above plus the whole subtree below
+            for i in range(size):
+                related = min(lines.depth, lines.level[i]) + (
+                    lines.exit[i] - lines.entry[i] - 1
+                )
+                givers[i] += related
+                children[i] += related
+        if self.do_not_pair is not None:
+            offsets = self.do_not_pair.offsets
+            for i in range(size):
+                givers[i] += offsets[i + 1] - offsets[i]
+                children[i] += offsets[i + 1] - offsets[i]
+        return givers, children
+    
+    def is_allowed(self, giver: int, child: int) -> bool:
+        if giver == child:
+            return False
+        if self.partition is not None and (
+                self.partition[giver] != self.partition[child]):
+            return False
+        for groups in self.separate_groups:
+            if groups[giver] == groups[child]:
+                return False
+        for year in self.history:
+            if year[giver] == child:
+                return False
+            if self.reverse_history and year[child] == giver:
+                return False
+        if self.reporting_lines is not None and (
+                self.reporting_lines.related(giver, child)):
+            return False
+        if self.do_not_pair is not None:
+            return not self.do_not_pair.contains(giver, child)
+        return True
+
+    def rejection_reason(self, giver: int, child: int) -> Optional[str]:
+        # Which rule is_allowed trips over, for statistics; kept out of
+        # is_allowed itself, which is on every hot path
+        if giver == child:
+            return 'self'
+        if self.partition is not None and (
+                self.partition[giver] != self.partition[child]):
+            return 'group'
+        for groups in self.separate_groups:
+            if groups[giver] == groups[child]:
+                return 'group'
+        for year in self.history:
+            if year[giver] == child:
+                return 'history'
+            if self.reverse_history and year[child] == giver:
+                return 'reverse-history'
+        if self.reporting_lines is not None and (
+                self.reporting_lines.related(giver, child)):
+            return 'reporting-line'
+        if self.do_not_pair is not None and self.do_not_pair.contains(giver, child):
+            return 'do-not-pair'
+        return None
+    
+    def dense_mask(self, givers: 'np.ndarray', children: 'np.ndarray') -> 'np.ndarray':
+        # Vectorized is_allowed over broadcastable giver/child id arrays.
+        # Do-not-pair lists are sparse and left to the caller.
+        allowed = givers != children
+        
+        for year in self.history:
+            previous = np.frombuffer(year, dtype=np.int32)
+            allowed &= previous[givers] != children
+            if self.reverse_history:
+                allowed &= previous[children] != givers
+        
+        if self.partition is not None:
+            groups = np.frombuffer(self.partition, dtype=np.int32)
+            allowed &= groups[givers] == groups[children]
+        
+        for separate in self.separate_groups:
+            groups = np.frombuffer(separate, dtype=np.int32)
+            allowed &= groups[givers] != groups[children]
+        
+        lines = self.reporting_lines
+        if lines is not None:
+            entry = np.frombuffer(lines.entry, dtype=np.int32)
+            exit_ = np.frombuffer(lines.exit, dtype=np.int32)
+            level = np.frombuffer(lines.level, dtype=np.int32)
+            giver_entry, child_entry = entry[givers], entry[children]
+            giver_level, child_level = level[givers], level[children]
+            giver_manages = (
+                (giver_entry <= child_entry) & (child_entry < exit_[givers]) &
+                (child_level - giver_level <= lines.depth)
+            )
+            child_manages = (
+                (child_entry <= giver_entry) & (giver_entry < exit_[children]) &
+                (giver_level - child_level <= lines.depth)
+            )
+            allowed &= ~(giver_manages | child_manages)
+        
+        return allowed
+    
+    def candidates(self, giver: int) -> Iterator[int]:
+        for child in range(self.size):
+            if self.is_allowed(giver, child):
+                yield child
+
+    def sources(self, child: int) -> Iterator[int]:
+        for giver in range(self.size):
+            if self.is_allowed(giver, child):
+                yield giver
@@ -1,9 +1,19 @@
+import io
 import csv
 import logging
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import List, Optional
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Set, Tuple
 
-from .models import Employee, Assignment
+from .models import (
+    Employee,
+    EmployeeTable,
+    Assignment,
+    AssignmentBatch,
+    TenantJob,
+    TenantResult
+)
+from .constraints import PairExclusionIndex
 from .exceptions import FileOperationError, ValidationError
 from .validator import Validator
 from .config import Config
@@ -12,12 +22,150 @@ from .config import Config
 logger = logging.getLogger(__name__)
 
 
+def _employee_from_row(row: Dict[str, str], optional_fields: Dict[str, str]) -> Employee:
+    return Employee(
+        name=row['Employee_Name'].strip(),
+        email=row['Employee_EmailID'].strip(),
+        **{
+            attribute: (row[column] or '').strip() or None
+            for column, attribute in optional_fields.items()
+        }
+    )
+
+
+def _read_range(file_path: Path, start: int, end: int) -> Tuple[str, bool]:
+    # Text of one newline-aligned byte range, and whether every quote in it
+    # opens a field at the field's start and is closed within the range. If
+    # all ranges hold, each boundary falls between rows; a stray quote
+    # mid-field or a boundary inside a quoted field breaks the check.
+    with open(file_path, 'rb') as f:
+        f.seek(start)
+        text = f.read(end - start).decode('utf-8')
+    return text, _quotes_aligned(text)
+
+
+def _quotes_aligned(text: str) -> bool:
+    quote = text.find('"')
+    while quote != -1:
+        if quote and text[quote - 1] not in ',\r\n':
+            return False
+        close = text.find('"', quote + 1)
+        while close != -1 and text.startswith('""', close):
+            close = text.find('"', close + 2)
+        if close == -1 or text[close + 1:close + 2] not in ('', ',', '\r', '\n'):
+            return False
+        quote = text.find('"', close + 1)
+    return True
+
+
+def _parse_employee_range(
+    file_path: Path,
+    start: int,
+    end: int,
+    fieldnames: List[str],
+    optional_fields: Dict[str, str]
+) -> Tuple[bool, Tuple[list, ...], int, Optional[Exception]]:
+    # Worker: quote alignment, validated columns of one byte range, the
+    # number of rows parsed, and the error that stopped parsing at the
+    # next row. Errors are returned rather than raised, as the range may
+    # turn out to start mid-field.
+    text, aligned = _read_range(file_path, start, end)
+    columns: Tuple[list, ...] = ([], [], [], [], [])
+    names, emails, departments, offices, manager_emails = columns
+    rows = 0
+    try:
+        for row in csv.DictReader(io.StringIO(text, newline=None), fieldnames):
+            employee = _employee_from_row(row, optional_fields)
+            Validator.validate_employee(employee)
+            names.append(employee.name)
+            emails.append(employee.email)
+            departments.append(employee.department)
+            offices.append(employee.office)
+            manager_emails.append(employee.manager_email)
+            rows += 1
+    except Exception as e:
+        return aligned, columns, rows, e
+    return aligned, columns, rows, None
+
+
+def _parse_assignment_range(
+    file_path: Path,
+    start: int,
+    end: int,
+    fieldnames: List[str]
+) -> Tuple[bool, List[Assignment], List[str], Optional[Exception]]:
+    # Worker: quote alignment, valid assignments of one byte range, the
+    # reasons invalid rows were skipped, and any error that stopped it
+    text, aligned = _read_range(file_path, start, end)
+    assignments = []
+    skipped = []
+    try:
+        for row in csv.DictReader(io.StringIO(text, newline=None), fieldnames):
+            try:
+                assignments.append(Assignment.from_dict(row))
+            except (KeyError, ValueError) as e:
+                skipped.append(str(e))
+    except Exception as e:
+        return aligned, assignments, skipped, e
+    return aligned, assignments, skipped, None
+
+
 class CSVHandler:
+    # Smallest byte range worth handing to a worker process
+    PARALLEL_MIN_RANGE_BYTES = 1 << 20
+    # Ranges per worker; more ranges balance better but cost more merging
+    RANGES_PER_WORKER = 4
     
     def __init__(self, config: Optional[Config] = None):
         self.config = config or Config()
     
     def read_employees(self, file_path: Path) -> List[Employee]:
+        employees = [
+            employee
+            for chunk in self.iter_employee_chunks(file_path)
+            for employee in chunk
+        ]
+        logger.info(f"Successfully read {len(employees)} employees")
+        return employees
+    
+    def read_employee_table(
+        self,
+        file_path: Path,
+        workers: Optional[int] = None
+    ) -> EmployeeTable:
+        # Streams the file into columns, checking each chunk for duplicates
+        # against everything before it, so only one chunk of Employee
+        # objects is alive at a time. With several workers, byte ranges of
+        # the file are parsed in parallel instead.
+        workers = workers or self.config.csv_read_workers
+        if workers > 1:
+            table = self._read_employee_table_parallel(file_path, workers)
+            if table is not None:
+                return table
+        
+        table = EmployeeTable()
+        seen_emails: Set[str] = set()
+        for chunk in self.iter_employee_chunks(file_path):
+            Validator.check_duplicates(chunk, seen_emails)
+            for employee in chunk:
+                table.add(
+                    employee.name,
+                    employee.email,
+                    employee.department,
+                    employee.office,
+                    employee.manager_email
+                )
+        
+        logger.info(f"Successfully read {len(table)} employees")
+        return table
+    
+    def iter_employee_chunks(
+        self,
+        file_path: Path,
+        chunk_size: Optional[int] = None
+    ) -> Iterator[List[Employee]]:
+        # Validated employees, chunk_size at a time (config default)
+        chunk_size = chunk_size or self.config.employee_chunk_size
         logger.info(f"Reading employees from {file_path}")
         
         if not file_path.exists():
@@ -34,31 +182,160 @@ class CSVHandler:
                         self.config.employee_fields
                     )
                 
-                employees = []
+                # Optional group columns present in this file
+                optional_fields = {
+                    column: attribute
+                    for column, attribute
+                    in self.config.optional_employee_fields.items()
+                    if column in (reader.fieldnames or [])
+                }
+                
+                chunk = []
                 for row_num, row in enumerate(reader, start=2):
                     try:
-                        employee = Employee(
-                            name=row['Employee_Name'].strip(),
-                            email=row['Employee_EmailID'].strip()
-                        )
+                        employee = _employee_from_row(row, optional_fields)
                         Validator.validate_employee(employee)
-                        employees.append(employee)
+                        chunk.append(employee)
                     except (KeyError, ValueError) as e:
                         raise ValidationError(
                             f"Error in row {row_num}: {str(e)}"
                         )
+                    if len(chunk) == chunk_size:
+                        yield chunk
+                        chunk = []
                 
-                logger.info(f"Successfully read {len(employees)} employees")
-                return employees
+                if chunk:
+                    yield chunk
                 
         except csv.Error as e:
             raise FileOperationError(f"CSV parsing error: {str(e)}")
         except IOError as e:
             raise FileOperationError(f"File I/O error: {str(e)}")
     
+    def _read_employee_table_parallel(
+        self,
+        file_path: Path,
+        workers: int
+    ) -> Optional[EmployeeTable]:
+        # None when the file is too small to split or a range boundary
+        # fell inside a quoted field; the caller then reads it in one pass
+        if not file_path.exists():
+            raise FileOperationError(f"File not found: {file_path}")
+        
+        fieldnames, ranges = self._split(file_path, workers)
+        if len(ranges) < 2:
+            return None
+        if fieldnames:
+            Validator.validate_csv_headers(fieldnames, self.config.employee_fields)
+        optional_fields = {
+            column: attribute
+            for column, attribute in self.config.optional_employee_fields.items()
+            if column in fieldnames
+        }
+        
+        logger.info(
+            f"Reading employees from {file_path} in {len(ranges)} byte ranges "
+            f"over {workers} processes"
+        )
+        results = self._map_ranges(
+            workers, _parse_employee_range, file_path, ranges,
+            fieldnames, optional_fields
+        )
+        if results is None:
+            return None
+        
+        table = EmployeeTable()
+        seen_emails: Set[str] = set()
+        for _, columns, rows, error in results:
+            if error is not None:
+                # Row numbers continue from the ranges before this one
+                self._raise_row_error(error, len(table) + rows + 2)
+            Validator.check_duplicate_emails(columns[1], seen_emails)
+            table.add_columns(*columns)
+        
+        logger.info(f"Successfully read {len(table)} employees")
+        return table
+    
+    @staticmethod
+    def _raise_row_error(error: Exception, row_num: int) -> None:
+        # Same errors read_employees raises for that row
+        if isinstance(error, (KeyError, ValueError)):
+            raise ValidationError(f"Error in row {row_num}: {str(error)}")
+        CSVHandler._raise_read_error(error)
+    
+    @staticmethod
+    def _raise_read_error(error: Exception) -> None:
+        # Same errors the single-pass readers raise for a failed read
+        if isinstance(error, csv.Error):
+            raise FileOperationError(f"CSV parsing error: {str(error)}")
+        if isinstance(error, IOError):
+            raise FileOperationError(f"File I/O error: {str(error)}")
+        raise error
+    
+    def _split(
+        self,
+        file_path: Path,
+        workers: int
+    ) -> Tuple[List[str], List[Tuple[int, int]]]:
+        # Header fields, and byte ranges of the rows after the header that
+        # each start right after a newline
+        try:
+            size = file_path.stat().st_size
+            with open(file_path, 'rb') as f:
+                header = f.readline()
+                start = f.tell()
+                parts = min(
+                    workers * self.RANGES_PER_WORKER,
+                    (size - start) // self.PARALLEL_MIN_RANGE_BYTES
+                )
+                bounds = [start]
+                for part in range(1, parts):
+                    target = start + (size - start) * part // parts
+                    if target <= bounds[-1]:
+                        continue
+                    f.seek(target - 1)
+                    f.readline()
+                    if bounds[-1] < f.tell() < size:
+                        bounds.append(f.tell())
+                bounds.append(size)
+        except IOError as e:
+            raise FileOperationError(f"File I/O error: {str(e)}")
+        
+        try:
+            fieldnames = next(csv.reader([header.decode('utf-8')]), [])
+        except csv.Error as e:
+            raise FileOperationError(f"CSV parsing error: {str(e)}")
+        return fieldnames, list(zip(bounds, bounds[1:]))
+    
+    @staticmethod
+    def _map_ranges(
+        workers: int,
+        parse,
+        file_path: Path,
+        ranges: List[Tuple[int, int]],
+        *args: Any
+    ) -> Optional[List[Any]]:
+        # Results in file order, or None if some range's quotes cannot be
+        # trusted to start and end within it, so it may not start on a row
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [
+                    pool.submit(parse, file_path, start, end, *args)
+                    for start, end in ranges
+                ]
+                results = [future.result() for future in futures]
+        except IOError as e:
+            raise FileOperationError(f"File I/O error: {str(e)}")
+        
+        if not all(result[0] for result in results):
+            logger.info("Quotes may span a range boundary, reading in one pass")
+            return None
+        return results
+    
     def read_previous_assignments(
         self, 
-        file_path: Path
+        file_path: Path,
+        workers: Optional[int] = None
     ) -> List[Assignment]:
         logger.info(f"Reading previous assignments from {file_path}")
         
@@ -66,6 +343,12 @@ class CSVHandler:
             logger.warning(f"Previous assignments file not found: {file_path}")
             return []
         
+        workers = workers or self.config.csv_read_workers
+        if workers > 1:
+            assignments = self._read_previous_parallel(file_path, workers)
+            if assignments is not None:
+                return assignments
+        
         try:
             with open(file_path, 'r', encoding='utf-8') as f:
                 reader = csv.DictReader(f)
@@ -96,9 +379,104 @@ class CSVHandler:
         except IOError as e:
             raise FileOperationError(f"File I/O error: {str(e)}")
     
+    def _read_previous_parallel(
+        self,
+        file_path: Path,
+        workers: int
+    ) -> Optional[List[Assignment]]:
+        fieldnames, ranges = self._split(file_path, workers)
+        if len(ranges) < 2:
+            return None
+        if fieldnames:
+            Validator.validate_csv_headers(fieldnames, self.config.assignment_fields)
+        
+        results = self._map_ranges(
+            workers, _parse_assignment_range, file_path, ranges, fieldnames
+        )
+        if results is None:
+            return None
+        
+        assignments = []
+        for _, valid, skipped, error in results:
+            for reason in skipped:
+                logger.warning(f"Skipping invalid assignment: {reason}")
+            if error is not None:
+                self._raise_read_error(error)
+            assignments.extend(valid)
+        
+        logger.info(f"Successfully read {len(assignments)} previous assignments")
+        return assignments
+    
+    def read_assignment_history(
+        self,
+        file_paths: List[Path]
+    ) -> List[List[Assignment]]:
+        # One list of assignments per file, in the order given
+        # (most recent year first)
+        return [self.read_previous_assignments(path) for path in file_paths]
+    
+    def read_do_not_pair(
+        self,
+        file_path: Path,
+        employees: Sequence[Employee]
+    ) -> PairExclusionIndex:
+        logger.info(f"Reading do-not-pair list from {file_path}")
+        
+        emails = (
+            employees.emails if isinstance(employees, EmployeeTable)
+            else [employee.email for employee in employees]
+        )
+        index = {email.lower(): i for i, email in enumerate(emails)}
+        
+        if not file_path.exists():
+            logger.warning(f"Do-not-pair file not found: {file_path}")
+            return PairExclusionIndex(len(employees), [])
+        
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                reader = csv.DictReader(f)
+                
+                # Validate headers
+                if reader.fieldnames:
+                    Validator.validate_csv_headers(
+                        reader.fieldnames,
+                        self.config.do_not_pair_fields
+                    )
+                
+                pairs = []
+                skipped = 0
+                for row_num, row in enumerate(reader, start=2):
+                    first_email = (row.get('Employee_EmailID') or '').strip()
+                    second_email = (row.get('Excluded_EmailID') or '').strip()
+                    if not first_email or not second_email:
+                        logger.warning(f"Skipping incomplete do-not-pair row {row_num}")
+                        continue
+                    first = index.get(first_email.lower())
+                    second = index.get(second_email.lower())
+                    if first is None or second is None:
+                        skipped += 1
+                        continue
+                    pairs.append((first, second))
+                
+                if skipped:
+                    logger.warning(
+                        f"Skipped {skipped} do-not-pair rows naming unknown employees"
+                    )
+                
+                exclusions = PairExclusionIndex(len(employees), pairs)
+                logger.info(
+                    f"Successfully read {exclusions.pair_count} do-not-pair entries"
+                )
+                return exclusions
+                
+        except csv.Error as e:
+            raise FileOperationError(f"CSV parsing error: {str(e)}")
+        except IOError as e:
+            raise FileOperationError(f"File I/O error: {str(e)}")
+    
     def write_assignments(
         self, 
-        assignments: List[Assignment], 
+        assignments: Sequence[Assignment], 
         file_path: Path
     ) -> None:
         logger.info(f"Writing {len(assignments)} assignments to {file_path}")
@@ -114,10 +492,83 @@ class CSVHandler:
                 )
                 writer.writeheader()
                 
-                for assignment in assignments:
-                    writer.writerow(assignment.to_dict())
+                if isinstance(assignments, AssignmentBatch):
+                    # Straight from the id columns, no Assignment objects
+                    writer.writerows(assignments.iter_dicts())
+                else:
+                    for assignment in assignments:
+                        writer.writerow(assignment.to_dict())
             
             logger.info(f"Successfully wrote assignments to {file_path}")
             
+        except IOError as e:
+            raise FileOperationError(f"Failed to write file: {str(e)}")
+    
+    def read_batch_manifest(self, file_path: Path) -> List[TenantJob]:
+        logger.info(f"Reading batch manifest from {file_path}")
+        
+        if not file_path.exists():
+            raise FileOperationError(f"File not found: {file_path}")
+        
+        # Relative paths in the manifest are relative to the manifest itself
+        base_dir = file_path.parent
+        
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                reader = csv.DictReader(f)
+                
+                # Validate headers
+                if reader.fieldnames:
+                    Validator.validate_csv_headers(
+                        reader.fieldnames,
+                        self.config.batch_manifest_fields
+                    )
+                
+                jobs = []
+                for row_num, row in enumerate(reader, start=2):
+                    tenant = (row['Tenant'] or '').strip()
+                    employees = (row['Employees_File'] or '').strip()
+                    output = (row['Output_File'] or '').strip()
+                    previous = (row.get('Previous_File') or '').strip()
+                    if not tenant or not employees or not output:
+                        raise ValidationError(
+                            f"Error in row {row_num}: Tenant, Employees_File "
+                            f"and Output_File are required"
+                        )
+                    jobs.append(TenantJob(
+                        tenant=tenant,
+                        employees_file=base_dir / employees,
+                        output_file=base_dir / output,
+                        previous_file=base_dir / previous if previous else None
+                    ))
+                
+                logger.info(f"Successfully read {len(jobs)} tenants")
+                return jobs
+                
+        except csv.Error as e:
+            raise FileOperationError(f"CSV parsing error: {str(e)}")
+        except IOError as e:
+            raise FileOperationError(f"File I/O error: {str(e)}")
+    
+    def write_batch_report(
+        self,
+        results: List[TenantResult],
+        file_path: Path
+    ) -> None:
+        logger.info(f"Writing batch report for {len(results)} tenants to {file_path}")
+        
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        
+        try:
+            with open(file_path, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.DictWriter(
+                    f,
+                    fieldnames=self.config.batch_report_fields
+                )
+                writer.writeheader()
+                
+                for result in results:
+                    writer.writerow(result.to_dict())
+            
         except IOError as e:
             raise FileOperationError(f"Failed to write file: {str(e)}")
\ No newline at end of file
@@ -19,4 +19,8 @@ class InsufficientEmployeesError(AssignmentError):
 
 
 class NoValidAssignmentError(AssignmentError):
-    pass
\ No newline at end of file
+    pass
+
+
+class InfeasibleAssignmentError(NoValidAssignmentError):
+    pass
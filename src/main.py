@@ -1,11 +1,20 @@
 import sys
 import logging
 from pathlib import Path
-from typing import Optional
+from typing import Dict, List, Optional
 
 from .config import Config
 from .csv_handler import CSVHandler
-from .assignment_engine import AssignmentEngine, RandomDerangementStrategy
+from .assignment_engine import (
+    AnytimeStrategy,
+    AssignmentEngine,
+    BatchedPermutationStrategy,
+    BipartiteMatchingStrategy,
+    MarkovChainStrategy,
+    MinCostMatchingStrategy,
+    RandomDerangementStrategy,
+    SingleChainStrategy
+)
 from .validator import Validator
 from .exceptions import SecretSantaException
 
@@ -13,13 +22,39 @@ from .exceptions import SecretSantaException
 logger = logging.getLogger(__name__)
 
 
+STRATEGIES = {
+    'random': RandomDerangementStrategy,
+    'matching': BipartiteMatchingStrategy,
+    'chain': SingleChainStrategy,
+    'batched': BatchedPermutationStrategy,
+    'min-cost': MinCostMatchingStrategy,
+    'mcmc': MarkovChainStrategy,
+    'anytime': AnytimeStrategy,
+}
+
+
 class SecretSantaApplication:
     
     def __init__(
         self,
         employees_file: Optional[Path] = None,
         previous_file: Optional[Path] = None,
-        output_file: Optional[Path] = None
+        output_file: Optional[Path] = None,
+        strategy: str = 'random',
+        previous_files: Optional[List[Path]] = None,
+        history_window: Optional[int] = None,
+        do_not_pair_file: Optional[Path] = None,
+        group_rules: Optional[Dict[str, str]] = None,
+        reporting_depth: Optional[int] = None,
+        workers: Optional[int] = None,
+        seed: Optional[int] = None,
+        mixing_steps: Optional[int] = None,
+        gifts: Optional[int] = None,
+        min_cycle_length: Optional[int] = None,
+        forbid_two_cycles: bool = False,
+        forbid_reverse_history: bool = False,
+        time_budget: Optional[float] = None,
+        read_workers: Optional[int] = None
     ):
         
         self.config = Config()
@@ -29,12 +64,42 @@ class SecretSantaApplication:
         # Override paths if provided
         self.employees_file = employees_file or self.config.employees_file
         self.previous_file = previous_file or self.config.previous_assignments_file
+        self.previous_files = (
+            previous_files if previous_files is not None else [self.previous_file]
+        )
+        self.do_not_pair_file = do_not_pair_file or self.config.do_not_pair_file
+        if history_window is not None:
+            self.config.history_window_years = history_window
+        if group_rules:
+            self.config.group_rules = dict(group_rules)
+        if reporting_depth is not None:
+            self.config.reporting_line_depth = reporting_depth
+        if workers is not None:
+            self.config.parallel_workers = workers
+        if seed is not None:
+            self.config.random_seed = seed
+        if mixing_steps is not None:
+            self.config.mixing_steps_per_employee = mixing_steps
+        if gifts is not None:
+            self.config.gifts_per_employee = gifts
+        if min_cycle_length is not None:
+            self.config.min_cycle_length = min_cycle_length
+        if forbid_two_cycles:
+            self.config.forbid_two_cycles = True
+        if forbid_reverse_history:
+            self.config.forbid_reverse_history = True
+        if time_budget is not None:
+            self.config.time_budget_seconds = time_budget
+        if read_workers is not None:
+            self.config.csv_read_workers = read_workers
         self.output_file = output_file or self.config.output_file
         
+        self.last_error: Optional[str] = None
+        
         # Initialize components
         self.csv_handler = CSVHandler(self.config)
         self.assignment_engine = AssignmentEngine(
-            strategy=RandomDerangementStrategy(self.config),
+            strategy=STRATEGIES[strategy](self.config),
             config=self.config
         )
     
@@ -44,28 +109,46 @@ class SecretSantaApplication:
             logger.info("Secret Santa Assignment System Started")
             logger.info("=" * 60)
             
-            # Step 1: Read employees
+            # Step 1: Read employees, validating rows and checking for
+            # duplicates chunk by chunk as they stream in
             logger.info("Step 1: Reading employee list...")
-            employees = self.csv_handler.read_employees(self.employees_file)
+            employees = self.csv_handler.read_employee_table(self.employees_file)
             
             # Step 2: Validate employees
             logger.info("Step 2: Validating employee data...")
-            Validator.validate_employees(employees, self.config.min_employees)
+            Validator.validate_employee_count(len(employees), self.config.min_employees)
             logger.info(f"✓ Validated {len(employees)} employees")
             
-            # Step 3: Read previous assignments
+            # Step 3: Read previous assignments (most recent year first)
             logger.info("Step 3: Reading previous assignments...")
-            previous_assignments = self.csv_handler.read_previous_assignments(
-                self.previous_file
+            window = self.config.history_window_years
+            years = self.csv_handler.read_assignment_history(
+                self.previous_files[:window]
             )
-            logger.info(f"✓ Found {len(previous_assignments)} previous assignments")
+            previous_assignments = years[0] if years else []
+            history = years[1:]
+            logger.info(
+                f"✓ Found {len(previous_assignments)} previous assignments "
+                f"and {len(history)} older years of history"
+            )
+            
+            do_not_pair = None
+            if self.do_not_pair_file is not None:
+                logger.info("Step 3b: Reading do-not-pair list...")
+                do_not_pair = self.csv_handler.read_do_not_pair(
+                    self.do_not_pair_file,
+                    employees
+                )
+                logger.info(f"✓ Found {do_not_pair.pair_count} do-not-pair entries")
             
             # Step 4: Generate new assignments (NO OVERLAPS with previous)
             logger.info("Step 4: Generating Secret Santa assignments...")
             logger.info("  -> Ensuring NO overlaps with previous year assignments")
             new_assignments = self.assignment_engine.create_assignments(
                 employees,
-                previous_assignments
+                previous_assignments,
+                history,
+                do_not_pair
             )
             logger.info(f"✓ Generated {len(new_assignments)} new assignments")
             
@@ -84,9 +167,11 @@ class SecretSantaApplication:
             
         except SecretSantaException as e:
             logger.error(f"Application error: {str(e)}")
+            self.last_error = str(e)
             return False
         except Exception as e:
             logger.exception(f"Unexpected error: {str(e)}")
+            self.last_error = f"Unexpected error: {str(e)}"
             return False
 
 
@@ -106,6 +191,45 @@ Examples:
   
   # Specify previous assignments to avoid overlaps
   python -m src.main --previous data/previous_assignments.csv
+  
+  # Avoid repeats from several past years (most recent first)
+  python -m src.main --previous data/2024.csv data/2023.csv data/2022.csv
+  
+  # Never pair the people listed in an HR exclusion file
+  python -m src.main --do-not-pair data/do_not_pair.csv
+  
+  # Only pair people from different departments within the same office
+  python -m src.main --group-rule department=different --group-rule office=same
+  
+  # Never pair anyone with their manager, direct reports or skip-levels
+  python -m src.main --reporting-depth 2
+  
+  # Spread random attempts over 32 processes, reproducibly
+  python -m src.main --workers 32 --seed 2024
+  
+  # Parse a multi-GB roster and history with 8 processes
+  python -m src.main --read-workers 8
+  
+  # Run the whole exchange as one gift chain
+  python -m src.main --strategy chain
+  
+  # Prefer giving within the same office (cheapest shipping)
+  python -m src.main --strategy min-cost
+  
+  # Sample near-uniformly with a swap Markov chain
+  python -m src.main --strategy mcmc --mixing-steps 200
+  
+  # Finish within 30 seconds, escalating to exact matching if needed
+  python -m src.main --strategy anytime --time-budget 30
+  
+  # Everyone buys for (and receives from) three colleagues
+  python -m src.main --gifts 3
+  
+  # No A -> B -> A loops, and no B -> A right after A -> B
+  python -m src.main --no-reciprocal --no-reverse-history
+  
+  # Every gift loop has at least four people
+  python -m src.main --min-cycle-length 4
         """
     )
     
@@ -117,21 +241,118 @@ Examples:
     parser.add_argument(
         '--previous',
         type=Path,
-        help='Path to previous assignments CSV file (to avoid overlaps)'
+        nargs='+',
+        help='Paths to previous assignments CSV files, most recent year first '
+             '(to avoid overlaps)'
+    )
+    parser.add_argument(
+        '--history-window',
+        type=int,
+        help='Number of past years whose pairs may not repeat (default: 5)'
+    )
+    parser.add_argument(
+        '--do-not-pair',
+        type=Path,
+        help='Path to CSV file of employee pairs that must never be matched'
+    )
+    parser.add_argument(
+        '--group-rule',
+        action='append',
+        default=[],
+        metavar='ATTRIBUTE=same|different',
+        help='Group constraint on the optional Department/Office columns, '
+             'e.g. department=different (may be repeated)'
+    )
+    parser.add_argument(
+        '--reporting-depth',
+        type=int,
+        help='Forbid pairing people within this many levels of each other in '
+             'the Manager_EmailID org chart (1 = manager and direct reports)'
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        help='Worker processes for parallel random attempts (default: 1)'
+    )
+    parser.add_argument(
+        '--read-workers',
+        type=int,
+        help='Processes parsing byte ranges of large input CSV files '
+             '(default: 1)'
+    )
+    parser.add_argument(
+        '--seed',
+        type=int,
+        help='Random seed for reproducible assignments'
+    )
+    parser.add_argument(
+        '--mixing-steps',
+        type=int,
+        help='Swap steps per employee for the mcmc strategy (default: 50)'
+    )
+    parser.add_argument(
+        '--time-budget',
+        type=float,
+        help='Seconds the anytime strategy may spend (default: 10)'
+    )
+    parser.add_argument(
+        '--gifts',
+        type=int,
+        help='People each employee gives to and receives from (default: 1)'
+    )
+    parser.add_argument(
+        '--no-reciprocal',
+        action='store_true',
+        help='Forbid reciprocal pairs (A gives to B and B gives to A)'
+    )
+    parser.add_argument(
+        '--min-cycle-length',
+        type=int,
+        help='Shortest gift loop allowed (random and chain strategies)'
+    )
+    parser.add_argument(
+        '--no-reverse-history',
+        action='store_true',
+        help='Also forbid B -> A when A gave to B in a past year'
     )
     parser.add_argument(
         '--output',
         type=Path,
         help='Path for output CSV file'
     )
+    parser.add_argument(
+        '--strategy',
+        choices=sorted(STRATEGIES),
+        default='random',
+        help='Assignment strategy (chain puts everyone in one gift loop)'
+    )
     
     args = parser.parse_args()
     
+    group_rules = {}
+    for rule in args.group_rule:
+        attribute, _, mode = rule.partition('=')
+        group_rules[attribute.strip().lower()] = mode.strip().lower()
+    
     # Create and run application
     app = SecretSantaApplication(
         employees_file=args.employees,
-        previous_file=args.previous,
-        output_file=args.output
+        output_file=args.output,
+        strategy=args.strategy,
+        previous_files=args.previous,
+        history_window=args.history_window,
+        do_not_pair_file=args.do_not_pair,
+        group_rules=group_rules,
+        reporting_depth=args.reporting_depth,
+        workers=args.workers,
+        seed=args.seed,
+        mixing_steps=args.mixing_steps,
+        gifts=args.gifts,
+        min_cycle_length=args.min_cycle_length,
+        forbid_two_cycles=args.no_reciprocal,
+        forbid_reverse_history=args.no_reverse_history,
+        time_budget=args.time_budget,
+        read_workers=args.read_workers
     )
     
     success = app.run()
@@ -0,0 +1,582 @@
+import random
+import time
+from typing import List, Optional, Sequence, Set, Tuple
+
+from .constraints import AssignmentConstraints
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+
+UNMATCHED = -1
+_INFINITY = float('inf')
+
+# Random probes per giver while building the greedy starting matching
+_SAMPLE_TRIES = 32
+
+
+def maximum_matching(
+    constraints: AssignmentConstraints,
+    initial: Optional[List[int]] = None,
+    deadline: Optional[float] = None,
+    rng: Optional[random.Random] = None
+) -> List[int]:
+    """Randomized Hopcroft-Karp over the allowed giver -> child edges.
+
+    Returns the matched child index for every giver, or UNMATCHED when
+    no perfect matching exists. initial is a valid partial matching to
+    start from instead of a greedy one drawn from rng; past deadline (a
+    perf_counter time) the matching found so far is returned.
+    """
+    size = constraints.size
+    match_giver = [UNMATCHED] * size
+    match_child = [UNMATCHED] * size
+
+    if initial is None:
+        _greedy_matching(constraints, match_giver, match_child, rng or random)
+    else:
+        for giver, child in enumerate(initial):
+            if child != UNMATCHED:
+                match_giver[giver] = child
+                match_child[child] = giver
+
+    while True:
+        if deadline is not None and time.perf_counter() >= deadline:
+            return match_giver
+        dist, limit = _layer_givers(constraints, match_giver, match_child)
+        if limit == _INFINITY:
+            return match_giver
+
+        arcs = {}
+        for giver in range(size):
+            if match_giver[giver] == UNMATCHED:
+                _augment(
+                    giver, constraints, match_giver, match_child,
+                    dist, limit, arcs
+                )
+
+
+def hall_violation(
+    constraints: AssignmentConstraints,
+    match_giver: List[int]
+) -> Tuple[List[int], List[int]]:
+    """Find givers whose combined candidates are fewer than themselves.
+
+    Expects a maximum matching. Returns (givers, children) where children
+    is the full neighbourhood of givers and len(children) < len(givers).
+    """
+    match_child = [UNMATCHED] * constraints.size
+    for giver, child in enumerate(match_giver):
+        if child != UNMATCHED:
+            match_child[child] = giver
+
+    seen_givers = [g for g, c in enumerate(match_giver) if c == UNMATCHED]
+    reached_giver = [False] * constraints.size
+    reached_child = [False] * constraints.size
+    for giver in seen_givers:
+        reached_giver[giver] = True
+
+    children = []
+    for giver in seen_givers:
+        for child in constraints.candidates(giver):
+            if reached_child[child]:
+                continue
+            reached_child[child] = True
+            children.append(child)
+            mate = match_child[child]
+            if mate != UNMATCHED and not reached_giver[mate]:
+                reached_giver[mate] = True
+                seen_givers.append(mate)
+
+    return sorted(seen_givers), sorted(children)
+
+
+def unreachable(constraints: AssignmentConstraints, reverse: bool = False) -> List[int]:
+    """Employees no chain of allowed gifts reaches from employee 0.
+
+    With reverse, those from which no chain leads back to employee 0.
+    Each scan keeps the rejected employees for the next one, so the cost
+    is O(n) plus the forbidden pairs scanned, not O(n^2) allowed pairs.
+    """
+    allowed = constraints.is_allowed
+    pending = list(range(1, constraints.size))
+    stack = [0]
+    while stack and pending:
+        employee = stack.pop()
+        remaining = []
+        for other in pending:
+            if allowed(other, employee) if reverse else allowed(employee, other):
+                stack.append(other)
+            else:
+                remaining.append(other)
+        pending = remaining
+    return pending
+
+
+class _Block:
+    # Givers and children of one block renumbered from 0, with just what
+    # maximum_matching needs from AssignmentConstraints
+
+    def __init__(
+        self,
+        constraints: AssignmentConstraints,
+        givers: Sequence[int],
+        children: Sequence[int]
+    ):
+        self.constraints = constraints
+        self.givers = givers
+        self.children = children
+        self.size = len(givers)
+
+    def is_allowed(self, giver: int, child: int) -> bool:
+        return self.constraints.is_allowed(self.givers[giver], self.children[child])
+
+    def candidates(self, giver: int):
+        allowed = self.constraints.is_allowed
+        employee = self.givers[giver]
+        for child, other in enumerate(self.children):
+            if allowed(employee, other):
+                yield child
+
+
+def block_matching(
+    constraints: AssignmentConstraints,
+    givers: Sequence[int],
+    children: Sequence[int],
+    rng: Optional[random.Random] = None
+) -> List[int]:
+    """Hopcroft-Karp between equally many givers and children.
+
+    Returns the position in children matched to each giver, UNMATCHED
+    where no perfect matching covers them.
+    """
+    return maximum_matching(_Block(constraints, givers, children), rng=rng)
+
+
+def min_cost_transport(
+    supply: Sequence[int],
+    demand: Sequence[int],
+    cost: Sequence[Sequence[float]],
+    capacity: Sequence[Sequence[int]]
+) -> List[List[int]]:
+    """Cheapest flow[a][b] <= capacity[a][b] with row sums supply and
+    column sums demand: the transportation problem, by successive
+    shortest paths with Bellman-Ford. O(k^3) per path for k groups.
+
+    When capacities do not allow the full totals, returns a cheapest
+    flow among the largest ones.
+    """
+    rows, columns = len(supply), len(demand)
+    flow = [[0] * columns for _ in range(rows)]
+    left = list(supply)
+    needed = list(demand)
+
+    while True:
+        # Residual arcs: row -> column while below capacity, at cost;
+        # column -> row while flow is positive, at minus the cost
+        row_dist = [0.0 if left[a] else _INFINITY for a in range(rows)]
+        column_dist = [_INFINITY] * columns
+        via_row = [-1] * columns
+        via_column = [-1] * rows
+        for _ in range(rows + columns):
+            changed = False
+            for a in range(rows):
+                if row_dist[a] == _INFINITY:
+                    continue
+                for b in range(columns):
+                    if flow[a][b] < capacity[a][b] and (
+                            row_dist[a] + cost[a][b] < column_dist[b]):
+                        column_dist[b] = row_dist[a] + cost[a][b]
+                        via_row[b] = a
+                        changed = True
+            for b in range(columns):
+                if column_dist[b] == _INFINITY:
+                    continue
+                for a in range(rows):
+                    if flow[a][b] > 0 and column_dist[b] - cost[a][b] < row_dist[a]:
+                        row_dist[a] = column_dist[b] - cost[a][b]
+                        via_column[a] = b
+                        changed = True
+            if not changed:
+                break
+
+        ends = [b for b in range(columns) if needed[b] and column_dist[b] < _INFINITY]
+        if not ends:
+            return flow
+        end = min(ends, key=lambda b: column_dist[b])
+
+        # Walk back to a row with supply left, then push the bottleneck
+        path = []
+        amount = needed[end]
+        column = end
+        while True:
+            row = via_row[column]
+            path.append((row, column, 1))
+            amount = min(amount, capacity[row][column] - flow[row][column])
+            if via_column[row] < 0:
+                amount = min(amount, left[row])
+                break
+            column = via_column[row]
+            path.append((row, column, -1))
+            amount = min(amount, flow[row][column])
+
+        for row, column, sign in path:
+            flow[row][column] += sign * amount
+        left[row] -= amount
+        needed[end] -= amount
+
+
+def min_cost_matching(cost: Sequence[Sequence[float]]) -> List[int]:
+    """Hungarian algorithm (shortest augmenting paths) on a square matrix.
+
+    Returns the column assigned to every row so that the total cost is
+    minimal. O(n^3); each inner step is vectorized when NumPy is present.
+    """
+    if np is not None:
+        return _hungarian_numpy(np.asarray(cost, dtype=np.float64))
+    return _hungarian(cost)
+
+
+def _hungarian(cost: Sequence[Sequence[float]]) -> List[int]:
+    # Potentials u (rows) and v (columns) are 1-based; column 0 is the
+    # virtual start of each augmenting path.
+    size = len(cost)
+    u = [0.0] * (size + 1)
+    v = [0.0] * (size + 1)
+    owner = [0] * (size + 1)
+    way = [0] * (size + 1)
+
+    for row in range(1, size + 1):
+        owner[0] = row
+        column = 0
+        minv = [_INFINITY] * (size + 1)
+        used = [False] * (size + 1)
+        while True:
+            used[column] = True
+            current = owner[column]
+            costs = cost[current - 1]
+            delta, best = _INFINITY, 0
+            for j in range(1, size + 1):
+                if used[j]:
+                    continue
+                reduced = costs[j - 1] - u[current] - v[j]
+                if reduced < minv[j]:
+                    minv[j] = reduced
+                    way[j] = column
+                if minv[j] < delta:
+                    delta, best = minv[j], j
+            for j in range(size + 1):
+                if used[j]:
+                    u[owner[j]] += delta
+                    v[j] -= delta
+                else:
+                    minv[j] -= delta
+            column = best
+            if owner[column] == 0:
+                break
+        while column:
+            previous = way[column]
+            owner[column] = owner[previous]
+            column = previous
+
+    assignment = [UNMATCHED] * size
+    for column in range(1, size + 1):
+        assignment[owner[column] - 1] = column - 1
+    return assignment
+
+
+def _hungarian_numpy(cost: 'np.ndarray') -> List[int]:
+    size = len(cost)
+    u = np.zeros(size + 1)
+    v = np.zeros(size + 1)
+    owner = np.zeros(size + 1, dtype=np.intp)
+    way = np.zeros(size + 1, dtype=np.intp)
+    reduced = np.empty(size + 1)
+    reduced[0] = _INFINITY
+
+    for row in range(1, size + 1):
+        owner[0] = row
+        column = 0
+        minv = np.full(size + 1, _INFINITY)
+        used = np.zeros(size + 1, dtype=bool)
+        while True:
+            used[column] = True
+            current = owner[column]
+            free = ~used
+            np.subtract(cost[current - 1], v[1:], out=reduced[1:])
+            reduced[1:] -= u[current]
+            better = free & (reduced < minv)
+            minv[better] = reduced[better]
+            way[better] = column
+            best = int(np.where(free, minv, _INFINITY).argmin())
+            delta = minv[best]
+            u[owner[used]] += delta
+            v[used] -= delta
+            minv[free] -= delta
+            column = best
+            if owner[column] == 0:
+                break
+        while column:
+            previous = way[column]
+            owner[column] = owner[previous]
+            column = previous
+
+    assignment = [UNMATCHED] * size
+    for column in range(1, size + 1):
+        assignment[owner[column] - 1] = column - 1
+    return assignment
+
+
+def regular_assignment(
+    constraints: AssignmentConstraints,
+    degree: int,
+    rng: Optional[random.Random] = None
+) -> Tuple[List[List[int]], List[int]]:
+    """Give every giver `degree` distinct children, each child receiving
+    `degree` gifts: a degree-regular subgraph of the allowed edges.
+
+    Solved as max flow (source -> giver -> child -> sink) with Dinic's
+    algorithm on a sparse random candidate graph. While the flow falls
+    short, givers reachable from the source in the residual graph get more
+    candidate edges; once all of them have every allowed edge the flow is
+    maximal for the full graph. Returns (children per giver, blocked
+    givers): blocked is that reachable set, empty on success.
+    """
+    size = constraints.size
+    rng = rng or random
+    network = _FlowNetwork(2 * size + 2)
+    source, sink = 2 * size, 2 * size + 1
+    for employee in range(size):
+        network.add_edge(source, employee, degree)
+        network.add_edge(size + employee, sink, degree)
+
+    added: List[Set[int]] = [set() for _ in range(size)]
+    complete = [False] * size
+
+    def connect(giver: int, child: int) -> None:
+        added[giver].add(child)
+        network.add_edge(giver, size + child, 1)
+
+    def widen(giver: int, want: int) -> None:
+        # Random probes first; if they struggle, take the whole row
+        for _ in range(_SAMPLE_TRIES * want):
+            child = rng.randrange(size)
+            if child not in added[giver] and constraints.is_allowed(giver, child):
+                connect(giver, child)
+                want -= 1
+                if not want:
+                    return
+        for child in constraints.candidates(giver):
+            if child not in added[giver]:
+                connect(giver, child)
+        complete[giver] = True
+
+    # Both sides start with a few more candidates than they need, so
+    # no child is left short just because nobody happened to pick it
+    start = degree + 2
+    for giver in range(size):
+        widen(giver, start)
+    for child in range(size):
+        sources = 0
+        for _ in range(_SAMPLE_TRIES * start):
+            giver = rng.randrange(size)
+            if (not complete[giver] and child not in added[giver] and
+                    constraints.is_allowed(giver, child)):
+                connect(giver, child)
+                sources += 1
+                if sources == start:
+                    break
+
+    target = size * degree
+    while network.max_flow(source, sink) < target:
+        reachable = [g for g in range(size) if network.level[g] >= 0]
+        growing = [g for g in reachable if not complete[g]]
+        if not growing:
+            return _regular_children(network, size), reachable
+        for giver in growing:
+            widen(giver, len(added[giver]))
+
+    return _regular_children(network, size), []
+
+
+def _regular_children(network: '_FlowNetwork', size: int) -> List[List[int]]:
+    # Forward giver -> child edges have even ids; spent ones carry flow
+    return [
+        [
+            network.to[edge] - size
+            for edge in network.edges[giver]
+            if not edge & 1 and network.cap[edge] == 0
+        ]
+        for giver in range(size)
+    ]
+
+
+class _FlowNetwork:
+    # Edge e and its residual twin e ^ 1 are stored side by side. Flow
+    # persists across max_flow calls, so edges can be added between runs.
+
+    def __init__(self, nodes: int):
+        self.edges: List[List[int]] = [[] for _ in range(nodes)]
+        self.to: List[int] = []
+        self.cap: List[int] = []
+        self.flow = 0
+        self.level: List[int] = []
+
+    def add_edge(self, a: int, b: int, capacity: int) -> None:
+        self.edges[a].append(len(self.to))
+        self.to.append(b)
+        self.cap.append(capacity)
+        self.edges[b].append(len(self.to))
+        self.to.append(a)
+        self.cap.append(0)
+
+    def max_flow(self, source: int, sink: int) -> int:
+        # Dinic: BFS levels, then unit augmenting paths along them with
+        # per-node arc pointers. level[v] >= 0 afterwards marks the nodes
+        # still reachable from the source, i.e. the source side of a min cut.
+        while self._layer(source, sink):
+            pointer = [0] * len(self.edges)
+            while self._augment(source, sink, pointer):
+                self.flow += 1
+        return self.flow
+
+    def _layer(self, source: int, sink: int) -> bool:
+        level = [-1] * len(self.edges)
+        level[source] = 0
+        queue = [source]
+        for node in queue:
+            for edge in self.edges[node]:
+                nxt = self.to[edge]
+                if self.cap[edge] > 0 and level[nxt] < 0:
+                    level[nxt] = level[node] + 1
+                    queue.append(nxt)
+        self.level = level
+        return level[sink] >= 0
+
+    def _augment(self, source: int, sink: int, pointer: List[int]) -> bool:
+        level, edges, to, cap = self.level, self.edges, self.to, self.cap
+        stack = [source]
+        path: List[int] = []
+
+        while stack:
+            node = stack[-1]
+            if node == sink:
+                for edge in path:
+                    cap[edge] -= 1
+                    cap[edge ^ 1] += 1
+                return True
+
+            adjacent = edges[node]
+            while pointer[node] < len(adjacent):
+                edge = adjacent[pointer[node]]
+                nxt = to[edge]
+                if cap[edge] > 0 and level[nxt] == level[node] + 1:
+                    stack.append(nxt)
+                    path.append(edge)
+                    break
+                pointer[node] += 1
+            else:
+                # Dead end for the rest of this phase
+                level[node] = -2
+                stack.pop()
+                if path:
+                    path.pop()
+
+        return False
+
+
+def _greedy_matching(
+    constraints: AssignmentConstraints,
+    match_giver: List[int],
+    match_child: List[int],
+    rng
+) -> None:
+    size = constraints.size
+    pool = list(range(size))
+    order = list(range(size))
+    rng.shuffle(order)
+
+    for giver in order:
+        if not size:
+            return
+        for _ in range(_SAMPLE_TRIES):
+            slot = rng.randrange(size)
+            child = pool[slot]
+            if constraints.is_allowed(giver, child):
+                match_giver[giver] = child
+                match_child[child] = giver
+                size -= 1
+                pool[slot] = pool[size]
+                break
+
+
+def _layer_givers(
+    constraints: AssignmentConstraints,
+    match_giver: List[int],
+    match_child: List[int]
+) -> Tuple[List[float], float]:
+    # BFS from every free giver along alternating paths. limit is the
+    # layer at which the shortest augmenting paths reach a free child.
+    dist: List[float] = [_INFINITY] * constraints.size
+    queue = []
+    for giver, child in enumerate(match_giver):
+        if child == UNMATCHED:
+            dist[giver] = 0
+            queue.append(giver)
+
+    limit = _INFINITY
+    for giver in queue:
+        if dist[giver] >= limit:
+            break
+        for child in constraints.candidates(giver):
+            mate = match_child[child]
+            if mate == UNMATCHED:
+                limit = min(limit, dist[giver] + 1)
+            elif limit == _INFINITY and dist[mate] == _INFINITY:
+                dist[mate] = dist[giver] + 1
+                queue.append(mate)
+
+    return dist, limit
+
+
+def _augment(
+    root: int,
+    constraints: AssignmentConstraints,
+    match_giver: List[int],
+    match_child: List[int],
+    dist: List[float],
+    limit: float,
+    arcs: dict
+) -> bool:
+    # Iterative layered DFS. arcs keeps each giver's candidate iterator
+    # alive for the whole phase, so no edge is scanned twice.
+    stack = [root]
+    via: List[int] = []
+
+    while stack:
+        giver = stack[-1]
+        if giver not in arcs:
+            arcs[giver] = constraints.candidates(giver)
+
+        for child in arcs[giver]:
+            mate = match_child[child]
+            if mate == UNMATCHED:
+                if dist[giver] + 1 == limit:
+                    via.append(child)
+                    for path_giver, path_child in zip(stack, via):
+                        match_giver[path_giver] = path_child
+                        match_child[path_child] = path_giver
+                    return True
+            elif dist[mate] == dist[giver] + 1:
+                via.append(child)
+                stack.append(mate)
+                break
+        else:
+            dist[giver] = _INFINITY
+            stack.pop()
+            if via:
+                via.pop()
+
+    return False
@@ -1,12 +1,35 @@
-from dataclasses import dataclass
+from array import array
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional
 
+if TYPE_CHECKING:
+    from .constraints import AssignmentConstraints
 
-@dataclass(frozen=True)
+
+def identity_key(name: str, email: str) -> str:
+    """Case-insensitive identity of an employee as one string."""
+    # Length prefix keeps the join unambiguous
+    name = name.lower()
+    return f"{len(name)}:{name}{email.lower()}"
+
+
+@dataclass(frozen=True, slots=True)
 class Employee:
-    """Immutable employee data model."""
+    """Immutable employee data model.
+    
+    Identity is the lower-cased name and email. Only its hash is kept,
+    computed once at construction; fields are lower-cased to confirm a
+    hash match unless they are already equal as given.
+    """
     
     name: str
     email: str
+    department: Optional[str] = None
+    office: Optional[str] = None
+    manager_email: Optional[str] = None
+    _hash: int = field(init=False, repr=False, compare=False)
     
     def __post_init__(self):
         """Validate employee data after initialization."""
@@ -14,17 +37,31 @@ class Employee:
             raise ValueError("Employee name cannot be empty")
         if not self.email or not self.email.strip():
             raise ValueError("Employee email cannot be empty")
+        object.__setattr__(self, '_hash', hash(identity_key(self.name, self.email)))
+    
+    @property
+    def key(self) -> str:
+        return identity_key(self.name, self.email)
     
     def __hash__(self):
         """Make Employee hashable for use in sets and dicts."""
-        return hash((self.name.lower(), self.email.lower()))
+        return self._hash
+    
+    def __reduce__(self):
+        # str hashes differ between interpreters, so rebuild rather than
+        # carry the hash across to a worker process
+        return (Employee, (self.name, self.email, self.department,
+                           self.office, self.manager_email))
     
     def __eq__(self, other):
         """Compare employees case-insensitively."""
+        if self is other:
+            return True
         if not isinstance(other, Employee):
             return False
-        return (self.name.lower() == other.name.lower() and 
-                self.email.lower() == other.email.lower())
+        return (self._hash == other._hash and
+                (self.name == other.name or self.name.lower() == other.name.lower()) and
+                (self.email == other.email or self.email.lower() == other.email.lower()))
 
 
 @dataclass
@@ -59,4 +96,304 @@ class Assignment:
             name=data['Secret_Child_Name'],
             email=data['Secret_Child_EmailID']
         )
-        return cls(employee=employee, secret_child=secret_child)
\ No newline at end of file
+        return cls(employee=employee, secret_child=secret_child)
+
+
+class EmployeeTable(Sequence):
+    """Employees interned to dense integer ids 0..n-1.
+    
+    Fields are stored as parallel lists indexed by id, and ids are looked
+    up by identity key string, so building constraints never hashes an
+    Employee. Indexing returns an Employee, created on first access unless
+    the table was built from existing objects.
+    """
+    
+    COLUMNS = {
+        'name': 'names',
+        'email': 'emails',
+        'department': 'departments',
+        'office': 'offices',
+        'manager_email': 'manager_emails',
+    }
+    
+    def __init__(self):
+        self.names: List[str] = []
+        self.emails: List[str] = []
+        self.departments: List[Optional[str]] = []
+        self.offices: List[Optional[str]] = []
+        self.manager_emails: List[Optional[str]] = []
+        self._rows: List[Optional[Employee]] = []
+        # Identity key -> first id with that identity; built on first lookup
+        self._ids: Optional[Dict[str, int]] = None
+        # One shared string per department / office value
+        self._values: Dict[str, str] = {}
+    
+    @classmethod
+    def from_employees(cls, employees: Iterable[Employee]) -> 'EmployeeTable':
+        # Column at a time rather than append() per row
+        table = cls()
+        rows = list(employees)
+        table.names = [e.name for e in rows]
+        table.emails = [e.email for e in rows]
+        table.departments = [e.department for e in rows]
+        table.offices = [e.office for e in rows]
+        table.manager_emails = [e.manager_email for e in rows]
+        table._rows = rows
+        return table
+    
+    def append(self, employee: Employee) -> int:
+        """Append an existing Employee and return its id."""
+        new_id = self.add(
+            employee.name,
+            employee.email,
+            employee.department,
+            employee.office,
+            employee.manager_email
+        )
+        self._rows[new_id] = employee
+        return new_id
+    
+    def add(
+        self,
+        name: str,
+        email: str,
+        department: Optional[str] = None,
+        office: Optional[str] = None,
+        manager_email: Optional[str] = None
+    ) -> int:
+        """Append a row and return its id."""
+        new_id = len(self.names)
+        self.names.append(name)
+        self.emails.append(email)
+        self.departments.append(self._shared(department))
+        self.offices.append(self._shared(office))
+        self.manager_emails.append(manager_email)
+        self._rows.append(None)
+        if self._ids is not None:
+            self._ids.setdefault(self._key(new_id), new_id)
+        return new_id
+    
+    def add_columns(
+        self,
+        names: List[str],
+        emails: List[str],
+        departments: List[Optional[str]],
+        offices: List[Optional[str]],
+        manager_emails: List[Optional[str]]
+    ) -> None:
+        """Append rows given as parallel columns, e.g. parsed elsewhere."""
+        start = len(self.names)
+        self.names.extend(names)
+        self.emails.extend(emails)
+        self.departments.extend(map(self._shared, departments))
+        self.offices.extend(map(self._shared, offices))
+        self.manager_emails.extend(manager_emails)
+        self._rows.extend([None] * len(names))
+        if self._ids is not None:
+            for i in range(start, len(self.names)):
+                self._ids.setdefault(self._key(i), i)
+    
+    def _shared(self, value: Optional[str]) -> Optional[str]:
+        if value is None:
+            return None
+        return self._values.setdefault(value, value)
+    
+    def _key(self, i: int) -> str:
+        employee = self._rows[i]
+        if employee is not None:
+            return employee.key
+        return identity_key(self.names[i], self.emails[i])
+    
+    def id_of(self, employee: Employee) -> Optional[int]:
+        """Id of the first row with this employee's identity, if any."""
+        if self._ids is None:
+            self._ids = {}
+            for i in range(len(self.names)):
+                self._ids.setdefault(self._key(i), i)
+        return self._ids.get(employee.key)
+    
+    def column(self, attribute: str) -> List[Optional[str]]:
+        return getattr(self, self.COLUMNS[attribute])
+    
+    def subset(self, ids: Iterable[int]) -> 'EmployeeTable':
+        """Table of the given rows, renumbered from 0 in that order."""
+        sub = EmployeeTable()
+        for i in ids:
+            new_id = sub.add(
+                self.names[i],
+                self.emails[i],
+                self.departments[i],
+                self.offices[i],
+                self.manager_emails[i]
+            )
+            sub._rows[new_id] = self._rows[i]
+        return sub
+    
+    def __len__(self) -> int:
+        return len(self.names)
+    
+    def __getitem__(self, i: int) -> Employee:
+        employee = self._rows[i]
+        if employee is None:
+            employee = Employee(
+                name=self.names[i],
+                email=self.emails[i],
+                department=self.departments[i],
+                office=self.offices[i],
+                manager_email=self.manager_emails[i]
+            )
+            self._rows[i] = employee
+        return employee
+
+
+class AssignmentBatch(Sequence):
+    """Assignments stored as giver and child id arrays over an EmployeeTable.
+    
+    Costs 8 bytes per row on top of the table. Indexing builds an
+    Assignment view on demand; the pairs were checked when solved, so
+    views skip the self-assignment check.
+    """
+    
+    def __init__(self, table: EmployeeTable, givers: array, children: array):
+        self.table = table
+        self.givers = givers
+        self.children = children
+        # The engine's constraints over table, kept for incremental updates
+        self.constraints: Optional['AssignmentConstraints'] = None
+        # Row of each table id in givers and giver of each child id, -1
+        # for none; built by the engine's first in-place update
+        self.rows: Optional[array] = None
+        self.giver_of: Optional[array] = None
+    
+    def __len__(self) -> int:
+        return len(self.givers)
+    
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return AssignmentBatch(self.table, self.givers[i], self.children[i])
+        view = Assignment.__new__(Assignment)
+        view.employee = self.table[self.givers[i]]
+        view.secret_child = self.table[self.children[i]]
+        return view
+    
+    def __eq__(self, other):
+        # Equal to any batch or list holding the same assignments
+        if isinstance(other, AssignmentBatch) and other.table is self.table:
+            return self.givers == other.givers and self.children == other.children
+        if isinstance(other, (AssignmentBatch, list)):
+            return list(self) == list(other)
+        return NotImplemented
+    
+    def iter_dicts(self) -> Iterator[dict]:
+        """Rows in Assignment.to_dict() format, without building Assignments."""
+        names = self.table.names
+        emails = self.table.emails
+        for giver, child in zip(self.givers, self.children):
+            yield {
+                'Employee_Name': names[giver],
+                'Employee_EmailID': emails[giver],
+                'Secret_Child_Name': names[child],
+                'Secret_Child_EmailID': emails[child]
+            }
+
+
+@dataclass(frozen=True)
+class TenantJob:
+    """One company's exchange in a batch run."""
+    
+    tenant: str
+    employees_file: Path
+    output_file: Path
+    previous_file: Optional[Path] = None
+
+
+@dataclass(frozen=True)
+class TenantResult:
+    """Outcome and timing of one tenant's run."""
+    
+    tenant: str
+    success: bool
+    seconds: float
+    error: Optional[str] = None
+    
+    def to_dict(self) -> dict:
+        """Convert result to report row format."""
+        return {
+            'Tenant': self.tenant,
+            'Status': 'OK' if self.success else 'FAILED',
+            'Seconds': f"{self.seconds:.3f}",
+            'Error': self.error or ''
+        }
+
+
+@dataclass(frozen=True)
+class MixingDiagnostics:
+    """Summary of one Markov-chain sampling run."""
+    
+    size: int
+    steps: int
+    accepted: int
+    # Givers whose child differs from the starting assignment
+    moved: int
+    # Step at which every giver had taken part in an accepted swap
+    coverage_step: Optional[int] = None
+    
+    @property
+    def acceptance_rate(self) -> float:
+        return self.accepted / self.steps if self.steps else 0.0
+    
+    @property
+    def moved_fraction(self) -> float:
+        return self.moved / self.size if self.size else 0.0
+
+
+@dataclass
+class AssignmentStats:
+    """Counters from one assignment run, for diagnosing slow runs."""
+    
+    strategy: str = ''
+    # Randomized constructions, including the fast path when it ran
+    attempts: int = 0
+    attempt_seconds: List[float] = field(default_factory=list)
+    # Givers assigned before each failed retry-loop attempt got stuck
+    failure_positions: List[int] = field(default_factory=list)
+    # Rejected candidate children by reason, e.g. 'self' or 'history'
+    rejections: Dict[str, int] = field(default_factory=dict)
+    candidates_scanned: int = 0
+    # Whether the single-pass fast path succeeded (None = not tried)
+    fast_path: Optional[bool] = None
+    # Wall time per engine phase: constraints, feasibility, generate
+    phase_seconds: Dict[str, float] = field(default_factory=dict)
+    
+    def reject(self, reason: str) -> None:
+        self.rejections[reason] = self.rejections.get(reason, 0) + 1
+    
+    def merge(self, other: 'AssignmentStats') -> None:
+        """Add another run's counters, e.g. a worker's or a group's."""
+        self.strategy = self.strategy or other.strategy
+        self.attempts += other.attempts
+        self.attempt_seconds.extend(other.attempt_seconds)
+        self.failure_positions.extend(other.failure_positions)
+        for reason, count in other.rejections.items():
+            self.rejections[reason] = self.rejections.get(reason, 0) + count
+        self.candidates_scanned += other.candidates_scanned
+        if other.fast_path is not None:
+            self.fast_path = bool(self.fast_path) or other.fast_path
+        for phase, seconds in other.phase_seconds.items():
+            self.phase_seconds[phase] = self.phase_seconds.get(phase, 0.0) + seconds
+    
+    def summary(self) -> str:
+        """One-line digest for logs."""
+        mean = (
+            sum(self.attempt_seconds) / len(self.attempt_seconds)
+            if self.attempt_seconds else 0.0
+        )
+        rejections = ', '.join(
+            f"{reason}={count}" for reason, count in sorted(self.rejections.items())
+        ) or 'none'
+        return (
+            f"{self.attempts} attempts ({mean * 1000:.3f} ms each), "
+            f"{len(self.failure_positions)} failed, "
+            f"{self.candidates_scanned} candidates scanned, "
+            f"rejections: {rejections}"
+        )
@@ -0,0 +1,105 @@
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .models import Employee, EmployeeTable
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+
+class AssignmentScore(ABC):
+    """Cost of giver -> child pairs for MinCostMatchingStrategy (lower is better)."""
+
+    @abstractmethod
+    def cost(self, giver: Employee, child: Employee) -> float:
+        pass
+
+    def cost_matrix(self, employees: List[Employee]) -> Sequence[Sequence[float]]:
+        # Rows of giver -> child costs, as lists or a 2-D NumPy array.
+        # Override when costs can be computed per group instead of per pair.
+        return [[self.cost(giver, child) for child in employees] for giver in employees]
+
+    def group_costs(
+        self,
+        employees: List[Employee]
+    ) -> Optional[Tuple[List[int], List[List[float]]]]:
+        # Group id per employee and group -> group costs, for scores where
+        # a pair's cost only depends on the two groups. None means costs
+        # are per pair, which limits MinCostMatchingStrategy to a dense solve.
+        return None
+
+
+class AttributeDistanceScore(AssignmentScore):
+    """Distance between the givers' and children's attribute values.
+
+    E.g. shipping distance between offices. Unknown value pairs cost
+    `default`, equal values cost 0 unless listed. Costs are looked up
+    once per pair of distinct values, not once per pair of employees.
+    """
+
+    def __init__(
+        self,
+        attribute: str = 'office',
+        distances: Optional[Dict[Tuple[str, str], float]] = None,
+        default: float = 1.0
+    ):
+        self.attribute = attribute
+        self.default = default
+        # Distances are symmetric and case-insensitive
+        self.distances: Dict[Tuple[str, str], float] = {}
+        for (a, b), distance in (distances or {}).items():
+            self.distances[(a.lower(), b.lower())] = distance
+            self.distances[(b.lower(), a.lower())] = distance
+
+    def _value(self, employee: Employee) -> str:
+        return (getattr(employee, self.attribute) or '').lower()
+
+    def _distance(self, a: str, b: str) -> float:
+        if (a, b) in self.distances:
+            return self.distances[(a, b)]
+        return 0.0 if a == b else self.default
+
+    def cost(self, giver: Employee, child: Employee) -> float:
+        return self._distance(self._value(giver), self._value(child))
+
+    def group_costs(
+        self,
+        employees: List[Employee]
+    ) -> Optional[Tuple[List[int], List[List[float]]]]:
+        if isinstance(employees, EmployeeTable) and (
+                self.attribute in EmployeeTable.COLUMNS):
+            values = (
+                (value or '').lower() for value in employees.column(self.attribute)
+            )
+        else:
+            values = (self._value(e) for e in employees)
+        ids: Dict[str, int] = {}
+        groups = [ids.setdefault(value, len(ids)) for value in values]
+        names = list(ids)
+        return groups, [[self._distance(a, b) for b in names] for a in names]
+
+    def cost_matrix(self, employees: List[Employee]) -> Sequence[Sequence[float]]:
+        groups, table = self.group_costs(employees)
+        if np is not None:
+            index = np.asarray(groups)
+            return np.asarray(table, dtype=np.float64)[np.ix_(index, index)]
+        return [[table[g][c] for c in groups] for g in groups]
+
+
+class InteractionScore(AssignmentScore):
+    """Prefer pairing people who rarely interact.
+
+    counts maps (email, email) to how often the two interact, e.g. shared
+    meetings; unlisted pairs cost 0.
+    """
+
+    def __init__(self, counts: Dict[Tuple[str, str], float]):
+        self.counts: Dict[Tuple[str, str], float] = {}
+        for (a, b), count in counts.items():
+            self.counts[(a.lower(), b.lower())] = count
+            self.counts[(b.lower(), a.lower())] = count
+
+    def cost(self, giver: Employee, child: Employee) -> float:
+        return self.counts.get((giver.email.lower(), child.email.lower()), 0.0)
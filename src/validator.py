@@ -1,5 +1,5 @@
 import re
-from typing import List, Set
+from typing import Iterable, List, Optional, Set
 from .models import Employee
 from .exceptions import ValidationError
 
@@ -24,31 +24,50 @@ class Validator:
     
     @staticmethod
     def validate_employees(employees: List[Employee], min_count: int = 2) -> None:
-        if not employees:
-            raise ValidationError("Employee list cannot be empty")
-        
-        if len(employees) < min_count:
-            raise ValidationError(
-                f"At least {min_count} employees required, got {len(employees)}"
-            )
+        Validator.validate_employee_count(len(employees), min_count)
         
         # Validate each employee
         for employee in employees:
             Validator.validate_employee(employee)
         
         # Check for duplicates
-        Validator._check_duplicates(employees)
+        Validator.check_duplicates(employees)
     
     @staticmethod
-    def _check_duplicates(employees: List[Employee]) -> None:
-        seen_emails: Set[str] = set()
+    def validate_employee_count(count: int, min_count: int = 2) -> None:
+        if not count:
+            raise ValidationError("Employee list cannot be empty")
         
-        for employee in employees:
-            email_lower = employee.email.lower()
+        if count < min_count:
+            raise ValidationError(
+                f"At least {min_count} employees required, got {count}"
+            )
+    
+    @staticmethod
+    def check_duplicates(
+        employees: Iterable[Employee],
+        seen_emails: Optional[Set[str]] = None
+    ) -> None:
+        # Pass the same seen_emails for each chunk of a streamed file
+        Validator.check_duplicate_emails(
+            (employee.email for employee in employees),
+            seen_emails
+        )
+    
+    @staticmethod
+    def check_duplicate_emails(
+        emails: Iterable[str],
+        seen_emails: Optional[Set[str]] = None
+    ) -> None:
+        if seen_emails is None:
+            seen_emails = set()
+        
+        for email in emails:
+            email_lower = email.lower()
             
             if email_lower in seen_emails:
                 raise ValidationError(
-                    f"Duplicate email found: {employee.email}"
+                    f"Duplicate email found: {email}"
                 )
             
             seen_emails.add(email_lower)
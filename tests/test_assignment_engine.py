@@ -1,9 +1,38 @@
 """Tests for assignment engine - focuses on NO OVERLAP constraint."""
 
+import itertools
+import random
+import subprocess
+import sys
+import time
+from pathlib import Path
+
 import pytest
-from src.models import Employee, Assignment
-from src.assignment_engine import AssignmentEngine, RandomDerangementStrategy
-from src.exceptions import InsufficientEmployeesError
+from src.models import Employee, EmployeeTable, Assignment, AssignmentStats
+from src.assignment_engine import (
+    AnytimeStrategy,
+    AssignmentEngine,
+    BatchedPermutationStrategy,
+    BipartiteMatchingStrategy,
+    MarkovChainStrategy,
+    MinCostMatchingStrategy,
+    RandomDerangementStrategy,
+    SingleChainStrategy
+)
+from src.config import Config
+from src.constraints import (
+    AssignmentConstraints,
+    PairExclusionIndex,
+    ReportingLines
+)
+from src.matching import UNMATCHED, min_cost_matching
+from src.scoring import AssignmentScore, AttributeDistanceScore
+from src.exceptions import (
+    InfeasibleAssignmentError,
+    InsufficientEmployeesError,
+    NoValidAssignmentError,
+    ValidationError
+)
 
 
 @pytest.fixture
@@ -75,4 +104,1612 @@ class TestNoOverlapConstraint:
         employees = [Employee(name="Alice", email="alice@example.com")]
         
         with pytest.raises(InsufficientEmployeesError):
-            strategy.generate(employees, {})
\ No newline at end of file
+            strategy.generate(employees, {})
+
+
+class TestIndexedPool:
+    """Test the swap-remove pool used by the randomized strategy."""
+    
+    def test_large_roster_is_valid_permutation(self):
+        """Test that a large roster yields one valid child per giver."""
+        employees = [
+            Employee(name=f"Employee {i}", email=f"employee{i}@example.com")
+            for i in range(2000)
+        ]
+        previous_map = {
+            employees[i]: employees[(i + 1) % len(employees)]
+            for i in range(len(employees))
+        }
+        
+        assignments = RandomDerangementStrategy().generate(employees, previous_map)
+        
+        assert [a.employee for a in assignments] == employees
+        assert {a.secret_child for a in assignments} == set(employees)
+        for assignment in assignments:
+            assert assignment.secret_child != previous_map[assignment.employee]
+    
+    def test_only_valid_assignment_is_found(self):
+        """Test a two-person exchange where exactly one assignment exists."""
+        employees = [
+            Employee(name="Alice", email="alice@example.com"),
+            Employee(name="Bob", email="bob@example.com"),
+        ]
+        
+        assignments = RandomDerangementStrategy().generate(employees, {})
+        
+        assert assignments[0].secret_child == employees[1]
+        assert assignments[1].secret_child == employees[0]
+    
+    def test_impossible_constraints_raise(self, employees):
+        """Test that an unsatisfiable history exhausts the attempts."""
+        config = Config()
+        config.max_assignment_attempts = 5
+        pair = employees[:2]
+        previous_map = {pair[0]: pair[1], pair[1]: pair[0]}
+        
+        try:
+            with pytest.raises(NoValidAssignmentError):
+                RandomDerangementStrategy(config).generate(pair, previous_map)
+        finally:
+            Config.reset()
+
+
+class TestBipartiteMatchingStrategy:
+    """Test the Hopcroft-Karp based strategy."""
+    
+    def test_no_repeats_from_previous_year(self, employees, previous_assignments):
+        """Test that matching never repeats last year's pairs."""
+        strategy = BipartiteMatchingStrategy()
+        previous_map = {a.employee: a.secret_child for a in previous_assignments}
+        
+        for iteration in range(20):
+            assignments = strategy.generate(employees, previous_map)
+            
+            assert {a.secret_child for a in assignments} == set(employees)
+            for assignment in assignments:
+                assert assignment.employee != assignment.secret_child
+                assert assignment.secret_child != previous_map[assignment.employee]
+    
+    def test_hall_violation_is_reported(self, employees):
+        """Test that an impossible constraint set fails immediately."""
+        alice, bob, charlie = employees[:3]
+        previous_map = {alice: bob, bob: alice, charlie: alice}
+        
+        # Alice and Bob can both only give to Charlie
+        with pytest.raises(InfeasibleAssignmentError, match="Alice, Bob"):
+            BipartiteMatchingStrategy().generate(
+                [alice, bob, charlie],
+                previous_map
+            )
+    
+    def test_insufficient_employees(self):
+        """Test error with too few employees."""
+        employees = [Employee(name="Alice", email="alice@example.com")]
+        
+        with pytest.raises(InsufficientEmployeesError):
+            BipartiteMatchingStrategy().generate(employees, {})
+    
+    def test_same_seed_same_matching(self):
+        """Test that a seeded matching ignores the global random state."""
+        employees = [
+            Employee(name=f"Employee {i}", email=f"employee{i}@example.com")
+            for i in range(50)
+        ]
+        config = Config()
+        config.random_seed = 5
+        
+        try:
+            random.seed(1)
+            first = BipartiteMatchingStrategy(config).generate(employees, {})
+            random.seed(2)
+            second = BipartiteMatchingStrategy(config).generate(employees, {})
+        finally:
+            Config.reset()
+        
+        assert first == second
+
+
+class TestSattoloFastPath:
+    """Test the single-pass Sattolo fast path."""
+    
+    def teardown_method(self):
+        """Reset config after each test."""
+        Config.reset()
+    
+    def test_fast_path_needs_no_retries(self, employees, previous_assignments):
+        """Test that the fast path alone repairs history conflicts."""
+        config = Config()
+        config.max_assignment_attempts = 0
+        previous_map = {a.employee: a.secret_child for a in previous_assignments}
+        strategy = RandomDerangementStrategy(config)
+        
+        for iteration in range(20):
+            assignments = strategy.generate(employees, previous_map)
+            
+            assert {a.secret_child for a in assignments} == set(employees)
+            for assignment in assignments:
+                assert assignment.employee != assignment.secret_child
+                assert assignment.secret_child != previous_map[assignment.employee]
+    
+    def test_repair_skips_givers_already_fixed(self, monkeypatch):
+        """Test that only givers still in conflict are repaired."""
+        staff = [Employee(name=f"E{i}", email=f"e{i}@example.com") for i in range(12)]
+        strategy = RandomDerangementStrategy()
+        repair = strategy._repair
+        
+        def checked_repair(giver, constraints, children):
+            assert not constraints.is_allowed(giver, children[giver])
+            return repair(giver, constraints, children)
+        
+        monkeypatch.setattr(strategy, '_repair', checked_repair)
+        
+        for seed in range(200):
+            rng = random.Random(seed)
+            previous_map = {
+                giver: rng.choice([e for e in staff if e != giver]) for giver in staff
+            }
+            constraints = AssignmentConstraints(staff, previous_map)
+            strategy.rng = random.Random(seed)
+            strategy.last_stats = AssignmentStats(strategy="RandomDerangementStrategy")
+            strategy._sattolo_assignment(constraints, [0] * len(staff))
+    
+    def test_retry_loop_without_fast_path(self, employees, previous_assignments):
+        """Test that disabling the fast path still yields valid assignments."""
+        config = Config()
+        config.use_sattolo_fast_path = False
+        previous_map = {a.employee: a.secret_child for a in previous_assignments}
+        
+        assignments = RandomDerangementStrategy(config).generate(
+            employees,
+            previous_map
+        )
+        
+        for assignment in assignments:
+            assert assignment.secret_child != previous_map[assignment.employee]
+
+
+class TestSingleChainStrategy:
+    """Test the single gift chain strategy."""
+    
+    def test_forms_one_cycle(self, employees, previous_assignments):
+        """Test that all givers form one loop that avoids last year's pairs."""
+        previous_map = {a.employee: a.secret_child for a in previous_assignments}
+        strategy = SingleChainStrategy()
+        
+        for iteration in range(20):
+            assignments = strategy.generate(employees, previous_map)
+            chain = {a.employee: a.secret_child for a in assignments}
+            
+            current = employees[0]
+            visited = set()
+            for step in range(len(employees)):
+                visited.add(current)
+                assert chain[current] != previous_map[current]
+                current = chain[current]
+            
+            assert current == employees[0]
+            assert visited == set(employees)
+    
+    def test_large_roster(self):
+        """Test that rotation-extension handles a large roster."""
+        employees = [
+            Employee(name=f"Employee {i}", email=f"employee{i}@example.com")
+            for i in range(2000)
+        ]
+        
+        assignments = SingleChainStrategy().generate(employees, {})
+        chain = {a.employee: a.secret_child for a in assignments}
+        
+        current = employees[0]
+        for step in range(len(employees) - 1):
+            current = chain[current]
+            assert current != employees[0]
+        assert chain[current] == employees[0]
+    
+    def test_impossible_chain_raises(self, employees):
+        """Test that an impossible chain exhausts the attempts."""
+        config = Config()
+        config.max_assignment_attempts = 5
+        pair = employees[:2]
+        
+        try:
+            with pytest.raises(NoValidAssignmentError):
+                SingleChainStrategy(config).generate(pair, {pair[0]: pair[1]})
+        finally:
+            Config.reset()
+    
+    def test_same_seed_same_chain(self):
+        """Test that a seeded chain is reproducible."""
+        employees = [
+            Employee(name=f"Employee {i}", email=f"employee{i}@example.com")
+            for i in range(50)
+        ]
+        config = Config()
+        config.random_seed = 7
+        
+        try:
+            first = SingleChainStrategy(config).generate(employees, {})
+            second = SingleChainStrategy(config).generate(employees, {})
+        finally:
+            Config.reset()
+        
+        assert first == second
+    
+    def test_disconnected_halves_fail_fast(self):
+        """Test that halves nobody may cross are rejected before any attempt."""
+        employees = [
+            Employee(name=f"Employee {i}", email=f"employee{i}@example.com")
+            for i in range(400)
+        ]
+        constraints = AssignmentConstraints(employees)
+        constraints.do_not_pair = PairExclusionIndex(400, (
+            (a, b) for a in range(200) for b in range(200, 400)
+        ))
+        
+        with pytest.raises(InfeasibleAssignmentError, match="200 employees"):
+            SingleChainStrategy().solve(constraints)
+
+
+class TestMultiYearHistory:
+    """Test exclusions merged from several past years."""
+    
+    def teardown_method(self):
+        """Reset config after each test."""
+        Config.reset()
+    
+    def test_no_repeats_within_window(self, employees, previous_assignments):
+        """Test that pairs from every year in the window are avoided."""
+        two_years_ago = [
+            Assignment(employee=employees[i], secret_child=employees[(i + 2) % 5])
+            for i in range(5)
+        ]
+        engine = AssignmentEngine()
+        
+        for iteration in range(20):
+            assignments = engine.create_assignments(
+                employees,
+                previous_assignments,
+                [two_years_ago]
+            )
+            
+            # Only i -> i+3 and i -> i+4 remain allowed
+            for assignment in assignments:
+                giver = employees.index(assignment.employee)
+                child = employees.index(assignment.secret_child)
+                assert (child - giver) % 5 in (3, 4)
+    
+    def test_years_outside_window_may_repeat(self, employees):
+        """Test that years beyond the window are ignored."""
+        config = Config()
+        config.history_window_years = 1
+        old_years = [
+            [
+                Assignment(employee=employees[i], secret_child=employees[(i + k) % 5])
+                for i in range(5)
+            ]
+            for k in (1, 2, 3, 4)
+        ]
+        engine = AssignmentEngine(config=config)
+        
+        # All four older years together would leave no valid child at all
+        assignments = engine.create_assignments(employees, [], old_years)
+        
+        assert {a.secret_child for a in assignments} == set(employees)
+    
+    def test_history_is_integer_encoded(self, employees, previous_assignments):
+        """Test that each year is stored as an int array over employee ids."""
+        constraints = AssignmentConstraints(employees)
+        constraints.add_history_year(
+            (a.employee, a.secret_child) for a in previous_assignments
+        )
+        
+        assert list(constraints.history[0]) == [1, 2, 3, 4, 0]
+        assert constraints.history_pairs == 5
+        assert not constraints.is_allowed(0, 1)
+        assert constraints.is_allowed(0, 2)
+
+
+class TestDoNotPair:
+    """Test HR-supplied never-pair exclusions."""
+    
+    def test_excluded_pairs_never_assigned(self, employees):
+        """Test that excluded pairs are avoided in both directions."""
+        # Alice/Bob and Charlie/Diana are couples
+        exclusions = PairExclusionIndex(len(employees), [(0, 1), (2, 3)])
+        engine = AssignmentEngine()
+        
+        for iteration in range(20):
+            assignments = engine.create_assignments(employees, [], None, exclusions)
+            
+            pairs = {(a.employee.name, a.secret_child.name) for a in assignments}
+            for excluded in [("Alice", "Bob"), ("Charlie", "Diana")]:
+                assert excluded not in pairs
+                assert excluded[::-1] not in pairs
+    
+    def test_matching_honours_exclusions(self, employees):
+        """Test that the matching strategy consults the exclusion index."""
+        exclusions = PairExclusionIndex(len(employees), [(0, 1), (0, 2), (0, 3)])
+        engine = AssignmentEngine(strategy=BipartiteMatchingStrategy())
+        
+        assignments = engine.create_assignments(employees, [], None, exclusions)
+        
+        assert assignments[0].secret_child == employees[4]
+
+
+class TestGroupRules:
+    """Test department / office group constraints."""
+    
+    @pytest.fixture
+    def staff(self):
+        """Create employees spread over two offices and two departments."""
+        return [
+            Employee(name=f"Employee {i}", email=f"employee{i}@example.com",
+                     department=("Sales", "Engineering")[i % 2],
+                     office=("London", "Paris")[i // 4])
+            for i in range(8)
+        ]
+    
+    def teardown_method(self):
+        """Reset config after each test."""
+        Config.reset()
+    
+    def test_cross_department_same_office(self, staff):
+        """Test combining 'different' and 'same' rules."""
+        config = Config()
+        config.group_rules = {'department': 'different', 'office': 'same'}
+        engine = AssignmentEngine(config=config)
+        
+        for iteration in range(20):
+            assignments = engine.create_assignments(staff, [])
+            
+            assert [a.employee for a in assignments] == staff
+            assert {a.secret_child for a in assignments} == set(staff)
+            for assignment in assignments:
+                assert assignment.employee.department != assignment.secret_child.department
+                assert assignment.employee.office == assignment.secret_child.office
+    
+    def test_dominant_group_is_infeasible(self, staff):
+        """Test that a group holding over half the exchange fails up front."""
+        config = Config()
+        config.group_rules = {'department': 'different'}
+        staff[1] = Employee(name="Employee 1", email="employee1@example.com",
+                            department="Sales")
+        
+        with pytest.raises(InfeasibleAssignmentError, match="share department 'Sales'"):
+            AssignmentEngine(config=config).create_assignments(staff, [])
+    
+    def test_lonely_group_is_infeasible(self, staff):
+        """Test that a 'same' group of one person fails up front."""
+        config = Config()
+        config.group_rules = {'office': 'same'}
+        staff[0] = Employee(name="Employee 0", email="employee0@example.com",
+                            office="Berlin")
+        
+        with pytest.raises(InfeasibleAssignmentError, match="Employee 0"):
+            AssignmentEngine(config=config).create_assignments(staff, [])
+    
+    def test_unknown_rule_raises(self, staff):
+        """Test that rules on unsupported attributes are rejected."""
+        config = Config()
+        config.group_rules = {'shoe_size': 'same'}
+        
+        with pytest.raises(ValidationError, match="Unknown group attribute"):
+            AssignmentEngine(config=config).create_assignments(staff, [])
+
+
+class TestReportingLines:
+    """Test the manager / direct-report constraint."""
+    
+    @pytest.fixture
+    def org(self):
+        """Create a CEO, two managers with two reports each, and one loner."""
+        def person(name, manager=None):
+            return Employee(name=name, email=f"{name.lower()}@example.com",
+                            manager_email=manager and f"{manager.lower()}@example.com")
+        return [
+            person("Ceo"),
+            person("Ann", "Ceo"), person("Bea", "Ceo"),
+            person("Cal", "Ann"), person("Dan", "Ann"),
+            person("Eli", "Bea"), person("Fay", "Bea"),
+            person("Gus"),
+        ]
+    
+    def teardown_method(self):
+        """Reset config after each test."""
+        Config.reset()
+    
+    def test_ancestor_checks_respect_depth(self, org):
+        """Test O(1) interval checks against the expected hierarchy."""
+        direct = ReportingLines(org, depth=1)
+        skip = ReportingLines(org, depth=2)
+        
+        assert direct.related(0, 1) and direct.related(1, 0)
+        assert direct.related(1, 3)
+        assert not direct.related(0, 3)
+        assert skip.related(0, 3) and skip.related(6, 0)
+        assert not skip.related(1, 5)
+        assert not skip.related(7, 0)
+    
+    def test_no_manager_pairs(self, org):
+        """Test that nobody gives to their manager or direct reports."""
+        config = Config()
+        config.reporting_line_depth = 1
+        engine = AssignmentEngine(config=config)
+        
+        for iteration in range(20):
+            for assignment in engine.create_assignments(org, []):
+                giver, child = assignment.employee, assignment.secret_child
+                assert giver.manager_email != child.email
+                assert child.manager_email != giver.email
+    
+    def test_manager_cycle_does_not_hang(self, org):
+        """Test that circular manager data is cut instead of looping."""
+        org[0] = Employee(name="Ceo", email="ceo@example.com",
+                          manager_email="cal@example.com")
+        
+        lines = ReportingLines(org, depth=1)
+        
+        assert all(entry >= 0 for entry in lines.entry)
+
+
+class TestParallelRestarts:
+    """Test seeded and process-parallel random attempts."""
+    
+    def teardown_method(self):
+        """Reset config after each test."""
+        Config.reset()
+    
+    def test_same_seed_same_assignments(self, employees, previous_assignments):
+        """Test that a fixed seed reproduces the same result."""
+        config = Config()
+        config.random_seed = 2024
+        previous_map = {a.employee: a.secret_child for a in previous_assignments}
+        
+        first = RandomDerangementStrategy(config).generate(employees, previous_map)
+        second = RandomDerangementStrategy(config).generate(employees, previous_map)
+        
+        assert first == second
+    
+    def test_parallel_attempts_find_valid_assignment(
+        self, employees, previous_assignments
+    ):
+        """Test that attempts spread over worker processes stay valid."""
+        config = Config()
+        config.use_sattolo_fast_path = False
+        config.parallel_workers = 2
+        config.max_assignment_attempts = 16
+        previous_map = {a.employee: a.secret_child for a in previous_assignments}
+        
+        assignments = RandomDerangementStrategy(config).generate(
+            employees,
+            previous_map
+        )
+        
+        assert {a.secret_child for a in assignments} == set(employees)
+        for assignment in assignments:
+            assert assignment.secret_child != previous_map[assignment.employee]
+    
+    def test_parallel_same_seed_same_assignments(
+        self, employees, previous_assignments
+    ):
+        """Test that parallel attempts with a fixed seed are reproducible."""
+        config = Config()
+        config.random_seed = 2024
+        config.use_sattolo_fast_path = False
+        config.parallel_workers = 4
+        config.max_assignment_attempts = 16
+        previous_map = {a.employee: a.secret_child for a in previous_assignments}
+        
+        first = RandomDerangementStrategy(config).generate(employees, previous_map)
+        second = RandomDerangementStrategy(config).generate(employees, previous_map)
+        
+        assert first == second
+        
+    def test_spawned_workers_finish_cleanly(self):
+        """Test that spawned workers never outlive the shared winner flag."""
+        script = (
+            "import multiprocessing\n"
+            "from src.config import Config\n"
+            "from src.models import Employee\n"
+            "from src.assignment_engine import RandomDerangementStrategy\n"
+            "if __name__ == '__main__':\n"
+            "    multiprocessing.set_start_method('spawn')\n"
+            "    staff = [Employee(f'E{i}', f'e{i}@example.com') for i in range(50)]\n"
+            "    config = Config()\n"
+            "    config.use_sattolo_fast_path = False\n"
+            "    config.parallel_workers = 4\n"
+            "    config.max_assignment_attempts = 64\n"
+            "    RandomDerangementStrategy(config).generate(staff, {})\n"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", script],
+            cwd=Path(__file__).resolve().parent.parent,
+            capture_output=True,
+            timeout=60
+        )
+        
+        assert result.returncode == 0, result.stderr.decode()
+        assert b"Traceback" not in result.stderr
+    
+    def test_stopped_attempts_give_up(self, employees):
+        """Test that attempts end before starting once told to stop."""
+        constraints = AssignmentConstraints(employees)
+        
+        children, used = RandomDerangementStrategy()._run_attempts(
+            constraints, 10, lambda: True
+        )
+        
+        assert children is None
+        assert used == 0
+    
+    def test_parallel_attempts_exhausted(self, employees):
+        """Test that failing in every worker still raises."""
+        config = Config()
+        config.use_sattolo_fast_path = False
+        config.parallel_workers = 2
+        config.max_assignment_attempts = 8
+        pair = employees[:2]
+        
+        with pytest.raises(NoValidAssignmentError):
+            RandomDerangementStrategy(config).generate(pair, {pair[0]: pair[1]})
+
+
+class TestFeasibilityPreCheck:
+    """Test the constraint analysis run before any attempt."""
+    
+    def teardown_method(self):
+        """Reset config after each test."""
+        Config.reset()
+    
+    def test_stranded_giver_named(self, employees):
+        """Test that a giver with no candidates is reported by name."""
+        config = Config()
+        config.use_sattolo_fast_path = False
+        everyone_else = [(0, child) for child in range(1, 5)]
+        exclusions = PairExclusionIndex(len(employees), everyone_else)
+        
+        with pytest.raises(InfeasibleAssignmentError) as raised:
+            AssignmentEngine(config=config).create_assignments(
+                employees, [], None, exclusions
+            )
+        assert str(raised.value) == (
+            "No valid assignment exists: Alice cannot give to anyone; "
+            "nobody can give to Alice"
+        )
+    
+    def test_stranded_giver_only(self, employees):
+        """Test that the message leaves out a side with nobody stranded."""
+        constraints = AssignmentConstraints(employees)
+        for child in employees[1:]:
+            constraints.add_history_year([(employees[0], child)])
+        
+        with pytest.raises(InfeasibleAssignmentError) as raised:
+            AssignmentEngine()._check_feasibility(constraints)
+        assert str(raised.value) == (
+            "No valid assignment exists: Alice cannot give to anyone"
+        )
+    
+    def test_hall_violation_fails_before_attempts(self, employees):
+        """Test that a Hall violation is caught without any retries."""
+        config = Config()
+        config.use_sattolo_fast_path = False
+        config.max_assignment_attempts = 10 ** 9
+        
+        # Alice, Bob and Charlie may only give to Diana or Eve
+        pairs = [(giver, child) for giver in range(3) for child in range(3)]
+        exclusions = PairExclusionIndex(len(employees), pairs)
+        
+        with pytest.raises(InfeasibleAssignmentError, match="Alice, Bob, Charlie"):
+            AssignmentEngine(config=config).create_assignments(
+                employees, [], None, exclusions
+            )
+    
+    def test_partner_counts_skip_matching(self, employees, previous_assignments):
+        """Test that a roster with many allowed partners skips the matching."""
+        previous_map = {a.employee: a.secret_child for a in previous_assignments}
+        constraints = AssignmentConstraints(employees, previous_map)
+        
+        AssignmentEngine()._check_feasibility(constraints)
+        
+        assert constraints.matching is None
+    
+    def test_matching_kept_for_strategy(self, employees):
+        """Test that a sparse roster keeps the pre-check's perfect matching."""
+        # Alice and Bob may not pair with Diana or Eve
+        pairs = [(giver, child) for giver in range(2) for child in range(3, 5)]
+        constraints = AssignmentConstraints(employees)
+        constraints.do_not_pair = PairExclusionIndex(len(employees), pairs)
+        
+        AssignmentEngine()._check_feasibility(constraints)
+        
+        assert sorted(constraints.matching) == list(range(5))
+        for giver, child in enumerate(constraints.matching):
+            assert constraints.is_allowed(giver, child)
+    
+    def test_matching_is_last_resort(self, employees):
+        """Test that exhausted attempts fall back to the pre-check matching."""
+        constraints = AssignmentConstraints(employees)
+        constraints.matching = [1, 2, 3, 4, 0]
+        config = Config()
+        config.use_sattolo_fast_path = False
+        strategy = RandomDerangementStrategy(config)
+        strategy.max_attempts = 0
+        
+        assert strategy.solve(constraints) == [1, 2, 3, 4, 0]
+    
+    def test_pre_check_can_be_disabled(self, employees):
+        """Test that disabling the pre-check falls back to the retry loop."""
+        config = Config()
+        config.feasibility_precheck = False
+        config.max_assignment_attempts = 5
+        exclusions = PairExclusionIndex(len(employees), [(0, c) for c in range(1, 5)])
+        
+        with pytest.raises(NoValidAssignmentError) as raised:
+            AssignmentEngine(config=config).create_assignments(
+                employees, [], None, exclusions
+            )
+        assert not isinstance(raised.value, InfeasibleAssignmentError)
+
+
+class TestBatchedPermutationStrategy:
+    """Test the NumPy batched permutation sampler."""
+    
+    @pytest.fixture(autouse=True)
+    def require_numpy(self):
+        """Skip when the optional NumPy dependency is missing."""
+        pytest.importorskip("numpy")
+        yield
+        Config.reset()
+    
+    def test_no_repeats_from_previous_year(self, employees, previous_assignments):
+        """Test that sampled rows honour self and history constraints."""
+        previous_map = {a.employee: a.secret_child for a in previous_assignments}
+        strategy = BatchedPermutationStrategy()
+        
+        for iteration in range(20):
+            assignments = strategy.generate(employees, previous_map)
+            
+            assert {a.secret_child for a in assignments} == set(employees)
+            for assignment in assignments:
+                assert assignment.employee != assignment.secret_child
+                assert assignment.secret_child != previous_map[assignment.employee]
+    
+    def test_vectorized_checks_match_constraints(self, employees):
+        """Test that every accepted row satisfies the full constraint set."""
+        staff = [
+            Employee(name=e.name, email=e.email, department=("A", "B", "C")[i % 3],
+                     manager_email=employees[3].email if i == 4 else None)
+            for i, e in enumerate(employees)
+        ]
+        constraints = AssignmentConstraints(staff)
+        constraints.add_group_rule('department', 'different')
+        constraints.reporting_lines = ReportingLines(staff, depth=1)
+        constraints.do_not_pair = PairExclusionIndex(len(staff), [(0, 2)])
+        
+        assignments = BatchedPermutationStrategy().generate(staff, {}, constraints)
+        
+        for giver, assignment in enumerate(assignments):
+            child = staff.index(assignment.secret_child)
+            assert constraints.is_allowed(giver, child)
+    
+    def test_impossible_constraints_raise(self, employees):
+        """Test that an unsatisfiable history exhausts the attempts."""
+        config = Config()
+        config.max_assignment_attempts = 100
+        pair = employees[:2]
+        
+        with pytest.raises(NoValidAssignmentError):
+            BatchedPermutationStrategy(config).generate(pair, {pair[0]: pair[1]})
+
+
+class TestIncrementalUpdate:
+    """Test repairing an assignment for joiners and leavers."""
+    
+    @pytest.fixture
+    def staff(self):
+        """Create a larger roster so most edges stay untouched."""
+        return [
+            Employee(name=f"Employee {i}", email=f"employee{i}@example.com")
+            for i in range(50)
+        ]
+    
+    @staticmethod
+    def assert_valid(assignments, roster):
+        """Check every employee gives and receives exactly once."""
+        assert sorted(a.employee.email for a in assignments) == \
+            sorted(e.email for e in roster)
+        assert {a.secret_child for a in assignments} == set(roster)
+        for assignment in assignments:
+            assert assignment.employee != assignment.secret_child
+    
+    def test_leavers_are_spliced_out(self, staff):
+        """Test that only givers of leavers get a new child."""
+        engine = AssignmentEngine()
+        current = engine.create_assignments(staff, [])
+        before = {a.employee: a.secret_child for a in current}
+        leavers = staff[:3]
+        
+        updated = engine.update_assignments(current, [], leavers)
+        
+        self.assert_valid(updated, staff[3:])
+        changed = [a for a in updated if before[a.employee] != a.secret_child]
+        assert len(changed) <= 3 * 3
+    
+    def test_joiners_are_spliced_in(self, staff):
+        """Test that joiners are inserted with minimal edits."""
+        engine = AssignmentEngine()
+        current = engine.create_assignments(staff, [])
+        before = {a.employee: a.secret_child for a in current}
+        joiners = [Employee(name="New Hire", email="new.hire@example.com")]
+        
+        updated = engine.update_assignments(current, joiners, [])
+        
+        self.assert_valid(updated, staff + joiners)
+        changed = [
+            a for a in updated
+            if a.employee in before and before[a.employee] != a.secret_child
+        ]
+        assert len(changed) == 1
+    
+    def test_reciprocal_pair_after_leaver(self, staff):
+        """Test a leaver whose removal would make someone give to themselves."""
+        engine = AssignmentEngine()
+        alice, bob, charlie = staff[:3]
+        current = [
+            Assignment(employee=alice, secret_child=bob),
+            Assignment(employee=bob, secret_child=alice),
+            Assignment(employee=charlie, secret_child=staff[3]),
+        ] + [
+            Assignment(employee=staff[i], secret_child=staff[i + 1 if i < 49 else 2])
+            for i in range(3, 50)
+        ]
+        
+        updated = engine.update_assignments(current, [], [bob])
+        
+        self.assert_valid(updated, [alice] + staff[2:])
+    
+    def test_history_respected_for_joiners(self, staff):
+        """Test that repaired edges still avoid last year's pairs."""
+        engine = AssignmentEngine()
+        joiner = Employee(name="New Hire", email="new.hire@example.com")
+        previous = [Assignment(employee=joiner, secret_child=e) for e in staff[:1]]
+        
+        for iteration in range(20):
+            current = engine.create_assignments(staff, [])
+            updated = engine.update_assignments(current, [joiner], [], previous)
+            assert updated[-1].secret_child != staff[0]
+    
+    def test_duplicate_joiner_rejected(self, staff):
+        """Test that adding someone already in the exchange fails."""
+        engine = AssignmentEngine()
+        current = engine.create_assignments(staff, [])
+        
+        with pytest.raises(ValidationError, match="already in the exchange"):
+            engine.update_assignments(current, [staff[0]], [])
+    
+    def test_duplicate_joiner_in_list_rejected(self, staff):
+        """Test that a plain assignment list also rejects existing joiners."""
+        engine = AssignmentEngine()
+        current = list(engine.create_assignments(staff, []))
+        
+        with pytest.raises(ValidationError, match="already in the exchange"):
+            engine.update_assignments(current, [staff[0]], [])
+    
+    def test_repeated_joiner_rejected(self, staff):
+        """Test that a joiner listed twice fails on both update paths."""
+        engine = AssignmentEngine()
+        batch = engine.create_assignments(staff, [])
+        joiner = Employee(name="New Hire", email="new.hire@example.com")
+        twice = [joiner, Employee(name="NEW HIRE", email="New.Hire@example.com")]
+        
+        for current in (batch, list(batch)):
+            with pytest.raises(ValidationError, match="listed more than once"):
+                engine.update_assignments(current, twice, [])
+    
+    def test_batch_is_updated_in_place(self, staff):
+        """Test that a batch is updated in place, with its table and constraints."""
+        engine = AssignmentEngine()
+        current = engine.create_assignments(staff, [])
+        table, constraints = current.table, current.constraints
+        joiner = Employee(name="New Hire", email="new.hire@example.com")
+        
+        updated = engine.update_assignments(current, [joiner], staff[:2])
+        self.assert_valid(current, staff[2:] + [joiner])
+        again = engine.update_assignments(updated, [staff[0]], [joiner])
+        
+        assert updated is current and again is current
+        assert again.table is table and again.constraints is constraints
+        assert len(table) == 51
+        self.assert_valid(current, staff[:1] + staff[2:])
+    
+    def test_batch_index_kept_in_step(self, staff):
+        """Test that repeated in-place updates keep the batch index consistent."""
+        engine = AssignmentEngine()
+        batch = engine.create_assignments(staff, [])
+        joiners = [
+            Employee(name=f"New Hire {i}", email=f"new.hire{i}@example.com")
+            for i in range(10)
+        ]
+        
+        for i in range(10):
+            engine.update_assignments(batch, joiners[i:i + 1], staff[i * 3:i * 3 + 2])
+        
+        self.assert_valid(batch, staff[30:] + [
+            e for i, e in enumerate(staff[:30]) if i % 3 == 2
+        ] + joiners)
+        for row, (giver, child) in enumerate(zip(batch.givers, batch.children)):
+            assert batch.rows[giver] == row
+            assert batch.giver_of[child] == giver
+    
+    def test_joiners_follow_group_rules(self):
+        """Test that appended joiners are placed in their rule groups."""
+        staff = [
+            Employee(
+                name=f"Employee {i}",
+                email=f"employee{i}@example.com",
+                department=f"Dept {i % 4}"
+            )
+            for i in range(40)
+        ]
+        joiners = [
+            Employee(
+                name=f"New Hire {i}",
+                email=f"new.hire{i}@example.com",
+                department="dept 1"
+            )
+            for i in range(5)
+        ]
+        config = Config()
+        config.group_rules = {'department': 'different'}
+        engine = AssignmentEngine(config=config)
+        
+        try:
+            current = engine.create_assignments(staff, [])
+            updated = engine.update_assignments(current, joiners, [])
+        finally:
+            Config.reset()
+        
+        self.assert_valid(updated, staff + joiners)
+        for assignment in updated:
+            assert assignment.employee.department.lower() != \
+                assignment.secret_child.department.lower()
+    
+    def test_failed_repair_regenerates_with_history(self, staff, monkeypatch):
+        """Test that regenerating after a failed repair keeps every rule."""
+        previous = [
+            Assignment(employee=staff[i], secret_child=staff[(i + 1) % 50])
+            for i in range(50)
+        ]
+        engine = AssignmentEngine()
+        current = engine.create_assignments(staff, previous)
+        monkeypatch.setattr(engine, '_patch', lambda *args: False)
+        
+        updated = engine.update_assignments(current, [], staff[:5])
+        
+        self.assert_valid(updated, staff[5:])
+        last_year = {a.employee: a.secret_child for a in previous}
+        for assignment in updated:
+            assert assignment.secret_child != last_year[assignment.employee]
+    
+    def test_joiner_after_regenerated_update_has_own_interval(self, monkeypatch):
+        """Test that a joiner appended to a regenerated batch reports to nobody."""
+        staff = [
+            Employee(
+                name=f"Employee {i}",
+                email=f"employee{i}@example.com",
+                manager_email=f"employee{i // 25 * 25}@example.com"
+            )
+            for i in range(50)
+        ]
+        joiner = Employee(name="New Hire", email="new.hire@example.com")
+        config = Config()
+        config.reporting_line_depth = 1
+        engine = AssignmentEngine(config=config)
+        
+        try:
+            current = engine.create_assignments(staff, [])
+            monkeypatch.setattr(engine, '_patch', lambda *args: False)
+            regenerated = engine.update_assignments(current, [], staff[1:6])
+            monkeypatch.undo()
+            updated = engine.update_assignments(regenerated, [joiner], [])
+        finally:
+            Config.reset()
+        
+        lines = updated.constraints.reporting_lines
+        new_id = updated.table.id_of(joiner)
+        assert not any(lines.related(new_id, i) for i in range(new_id))
+        self.assert_valid(updated, staff[:1] + staff[6:] + [joiner])
+
+
+class TestEmployeeTableBoundary:
+    """Test that strategies work on ids and Employees only come back at the end."""
+    
+    def teardown_method(self):
+        """Reset config after each test."""
+        Config.reset()
+    
+    def test_solve_returns_child_ids(self, employees):
+        """Test that a strategy solves on integer ids alone."""
+        constraints = AssignmentConstraints(EmployeeTable.from_employees(employees))
+        
+        children = RandomDerangementStrategy().solve(constraints)
+        
+        assert sorted(children) == list(range(len(employees)))
+        assert all(giver != child for giver, child in enumerate(children))
+    
+    def test_engine_returns_callers_employees(self, employees, previous_assignments):
+        """Test that assignments hold the caller's Employee objects."""
+        engine = AssignmentEngine()
+        
+        assignments = engine.create_assignments(employees, previous_assignments)
+        
+        assert [a.employee for a in assignments] == employees
+        assert all(a.employee is e for a, e in zip(assignments, employees))
+        assert all(
+            any(a.secret_child is e for e in employees) for a in assignments
+        )
+    
+    def test_engine_accepts_table(self):
+        """Test that a table of raw rows can be assigned directly."""
+        table = EmployeeTable()
+        for i in range(6):
+            table.add(f"Employee {i}", f"employee{i}@example.com", department=f"D{i % 2}")
+        config = Config()
+        config.group_rules = {'department': 'same'}
+        
+        assignments = AssignmentEngine(config=config).create_assignments(table, [])
+        
+        assert [a.employee.name for a in assignments] == table.names
+        for assignment in assignments:
+            assert assignment.employee.department == assignment.secret_child.department
+
+
+class TestMinCostMatchingStrategy:
+    """Test cost-optimal assignments over a pluggable score."""
+    
+    @pytest.fixture(autouse=True)
+    def reset_config(self):
+        """Reset the Config singleton after each test."""
+        yield
+        Config.reset()
+    
+    @pytest.fixture
+    def offices(self, employees):
+        """Employees spread over three offices."""
+        return [
+            Employee(name=e.name, email=e.email, office=("Oslo", "Lima", "Pune")[i % 3])
+            for i, e in enumerate(employees)
+        ]
+    
+    def test_solver_matches_brute_force(self):
+        """Test the Hungarian solver against every permutation."""
+        rng = random.Random(7)
+        for size in range(1, 7):
+            for _ in range(20):
+                cost = [[rng.randint(-5, 9) for _ in range(size)] for _ in range(size)]
+                best = min(
+                    sum(cost[row][column] for row, column in enumerate(perm))
+                    for perm in itertools.permutations(range(size))
+                )
+                columns = min_cost_matching(cost)
+                
+                assert sorted(columns) == list(range(size))
+                assert sum(cost[row][column] for row, column in enumerate(columns)) == best
+    
+    def test_total_cost_is_optimal(self, offices):
+        """Test that the assignment is the cheapest valid one."""
+        score = AttributeDistanceScore(
+            'office',
+            {("Oslo", "Lima"): 10, ("Oslo", "Pune"): 7, ("Lima", "Pune"): 3}
+        )
+        constraints = AssignmentConstraints(offices)
+        best = min(
+            sum(score.cost(offices[g], offices[c]) for g, c in enumerate(perm))
+            for perm in itertools.permutations(range(len(offices)))
+            if all(constraints.is_allowed(g, c) for g, c in enumerate(perm))
+        )
+        
+        for seed in range(5):
+            config = Config()
+            config.random_seed = seed
+            assignments = MinCostMatchingStrategy(config, score).generate(offices, {})
+            
+            assert {a.secret_child for a in assignments} == set(offices)
+            assert sum(score.cost(a.employee, a.secret_child) for a in assignments) == best
+    
+    def test_constraints_are_honoured(self, offices):
+        """Test that history and do-not-pair win over a cheaper cost."""
+        previous_map = {
+            giver: offices[(i + 1) % len(offices)] for i, giver in enumerate(offices)
+        }
+        
+        class RepeatScore(AssignmentScore):
+            # Repeating last year's pair would be cheapest
+            def cost(self, giver, child):
+                return 0.0 if previous_map[giver] == child else 5.0
+        
+        score = RepeatScore()
+        constraints = AssignmentConstraints(offices, previous_map)
+        constraints.do_not_pair = PairExclusionIndex(len(offices), [(0, 2)])
+        
+        assignments = MinCostMatchingStrategy(score=score).generate(
+            offices, previous_map, constraints
+        )
+        
+        for giver, assignment in enumerate(assignments):
+            assert constraints.is_allowed(giver, offices.index(assignment.secret_child))
+    
+    def test_infeasible_reports_hall_violation(self, employees):
+        """Test that an impossible instance names the blocked employees."""
+        pair = employees[:2]
+        
+        with pytest.raises(InfeasibleAssignmentError, match="can only give to"):
+            MinCostMatchingStrategy().generate(pair, {pair[0]: pair[1]})
+    
+    def test_group_costs_match_dense_solve(self):
+        """Test that the group-level solve is as cheap as the dense one."""
+        rng = random.Random(3)
+        
+        class PairScore(AssignmentScore):
+            # Same costs without the group shortcut
+            def __init__(self, inner):
+                self.inner = inner
+            
+            def cost(self, giver, child):
+                return self.inner.cost(giver, child)
+        
+        for _ in range(30):
+            staff = [
+                Employee(
+                    name=f"E{i}",
+                    email=f"e{i}@example.com",
+                    office=f"O{rng.randrange(4)}"
+                )
+                for i in range(rng.randint(2, 30))
+            ]
+            score = AttributeDistanceScore('office', {
+                (f"O{a}", f"O{b}"): rng.randint(-3, 9)
+                for a in range(4) for b in range(a + 1, 4)
+            })
+            constraints = AssignmentConstraints(staff)
+            
+            grouped = MinCostMatchingStrategy(score=score).solve(constraints)
+            dense = MinCostMatchingStrategy(score=PairScore(score)).solve(constraints)
+            
+            assert sorted(grouped) == list(range(len(staff)))
+            assert sum(score.cost(staff[g], staff[c]) for g, c in enumerate(grouped)) == \
+                sum(score.cost(staff[g], staff[c]) for g, c in enumerate(dense))
+    
+    def test_group_solve_with_history_is_optimal(self):
+        """Test that blocks broken by history still give the cheapest assignment."""
+        rng = random.Random(11)
+        for seed in range(60):
+            size = rng.randint(3, 7)
+            staff = [
+                Employee(
+                    name=f"E{i}",
+                    email=f"e{i}@example.com",
+                    office=f"O{rng.randrange(3)}"
+                )
+                for i in range(size)
+            ]
+            previous_map = {
+                staff[i]: staff[rng.choice([j for j in range(size) if j != i])]
+                for i in range(size)
+            }
+            score = AttributeDistanceScore('office', {
+                (f"O{a}", f"O{b}"): rng.randint(0, 9)
+                for a in range(3) for b in range(a + 1, 3)
+            })
+            constraints = AssignmentConstraints(staff, previous_map)
+            costs = [
+                sum(score.cost(staff[g], staff[c]) for g, c in enumerate(perm))
+                for perm in itertools.permutations(range(size))
+                if all(constraints.is_allowed(g, c) for g, c in enumerate(perm))
+            ]
+            if not costs:
+                continue
+            config = Config()
+            config.random_seed = seed
+            
+            children = MinCostMatchingStrategy(config, score).solve(constraints)
+            
+            assert sum(
+                score.cost(staff[g], staff[c]) for g, c in enumerate(children)
+            ) == min(costs)
+    
+    def test_missing_attribute_is_one_group(self):
+        """Test that a roster without offices is solved without a dense matrix."""
+        staff = [
+            Employee(name=f"E{i}", email=f"e{i}@example.com") for i in range(5000)
+        ]
+        previous_map = {staff[i]: staff[(i + 1) % 5000] for i in range(5000)}
+        
+        assignments = MinCostMatchingStrategy().generate(staff, previous_map)
+        
+        for assignment in assignments:
+            assert assignment.secret_child != previous_map[assignment.employee]
+    
+    def test_dense_solve_refused_above_limit(self, employees):
+        """Test that per-pair scores fail fast on large groups."""
+        
+        class PairScore(AssignmentScore):
+            def cost(self, giver, child):
+                return 1.0
+        
+        strategy = MinCostMatchingStrategy(score=PairScore())
+        strategy.MAX_DENSE_SIZE = 4
+        
+        with pytest.raises(ValidationError, match="limited to 4 employees"):
+            strategy.generate(employees, {})
+
+
+class TestMarkovChainStrategy:
+    """Test the swap Markov-chain sampler."""
+    
+    @pytest.fixture(autouse=True)
+    def reset_config(self):
+        """Reset the Config singleton after each test."""
+        yield
+        Config.reset()
+    
+    def test_no_repeats_from_previous_year(self, employees, previous_assignments):
+        """Test that every swap keeps the assignment valid."""
+        previous_map = {a.employee: a.secret_child for a in previous_assignments}
+        strategy = MarkovChainStrategy()
+        
+        for iteration in range(20):
+            assignments = strategy.generate(employees, previous_map)
+            
+            assert {a.secret_child for a in assignments} == set(employees)
+            for assignment in assignments:
+                assert assignment.employee != assignment.secret_child
+                assert assignment.secret_child != previous_map[assignment.employee]
+    
+    def test_samples_are_near_uniform(self, employees):
+        """Test that all 44 derangements of five are drawn about equally."""
+        config = Config()
+        config.random_seed = 11
+        strategy = MarkovChainStrategy(config)
+        counts = {}
+        
+        for _ in range(2200):
+            assignments = strategy.generate(employees, {})
+            key = tuple(a.secret_child.email for a in assignments)
+            counts[key] = counts.get(key, 0) + 1
+        
+        assert len(counts) == 44
+        assert min(counts.values()) > 20
+        assert max(counts.values()) < 80
+    
+    def test_same_seed_same_samples(self):
+        """Test that the seed alone fixes the starting matching and chain."""
+        employees = [
+            Employee(name=f"Employee {i}", email=f"employee{i}@example.com")
+            for i in range(50)
+        ]
+        config = Config()
+        config.random_seed = 3
+        config.mixing_steps_per_employee = 5
+        
+        random.seed(1)
+        first = MarkovChainStrategy(config).generate(employees, {})
+        random.seed(2)
+        second = MarkovChainStrategy(config).generate(employees, {})
+        
+        assert first == second
+    
+    def test_diagnostics_are_reported(self, employees):
+        """Test that acceptance and mixing diagnostics are recorded."""
+        config = Config()
+        config.mixing_steps_per_employee = 200
+        strategy = MarkovChainStrategy(config)
+        
+        strategy.generate(employees, {})
+        diagnostics = strategy.last_diagnostics
+        
+        assert diagnostics.steps == 200 * len(employees)
+        assert 0 < diagnostics.acceptance_rate < 1
+        assert diagnostics.coverage_step is not None
+        assert 0 <= diagnostics.moved_fraction <= 1
+    
+    def test_infeasible_reports_hall_violation(self, employees):
+        """Test that an impossible instance is reported, not sampled."""
+        pair = employees[:2]
+        
+        with pytest.raises(InfeasibleAssignmentError):
+            MarkovChainStrategy().generate(pair, {pair[0]: pair[1]})
+
+
+class TestMultipleGifts:
+    """Test k-gifts mode: k distinct children per giver."""
+    
+    @pytest.fixture(autouse=True)
+    def reset_config(self):
+        """Reset the Config singleton after each test."""
+        yield
+        Config.reset()
+    
+    @staticmethod
+    def assert_regular(assignments, employees, gifts):
+        """Every employee gives and receives exactly `gifts` distinct times."""
+        pairs = {(a.employee, a.secret_child) for a in assignments}
+        assert len(pairs) == len(assignments) == gifts * len(employees)
+        for employee in employees:
+            assert sum(1 for a in assignments if a.employee == employee) == gifts
+            assert sum(1 for a in assignments if a.secret_child == employee) == gifts
+        assert all(a.employee != a.secret_child for a in assignments)
+    
+    def test_gifts_are_regular_and_distinct(self, employees):
+        """Test that every degree up to n - 1 is solved."""
+        engine = AssignmentEngine()
+        
+        for gifts in range(1, len(employees)):
+            assignments = engine.create_assignments(employees, [], gifts=gifts)
+            
+            self.assert_regular(assignments, employees, gifts)
+    
+    def test_history_is_honoured(self, employees, previous_assignments):
+        """Test that no gift repeats last year's pair."""
+        previous_pairs = {(a.employee, a.secret_child) for a in previous_assignments}
+        engine = AssignmentEngine()
+        
+        for iteration in range(10):
+            assignments = engine.create_assignments(
+                employees, previous_assignments, gifts=3
+            )
+            
+            self.assert_regular(assignments, employees, 3)
+            assert not {(a.employee, a.secret_child) for a in assignments} & previous_pairs
+    
+    def test_group_rules_on_larger_instance(self):
+        """Test a larger instance solved on a sparse candidate graph."""
+        staff = [
+            Employee(name=f"E{i}", email=f"e{i}@example.com", department=f"D{i % 4}")
+            for i in range(400)
+        ]
+        config = Config()
+        config.group_rules = {'department': 'different'}
+        
+        assignments = AssignmentEngine(config=config).create_assignments(
+            staff, [], gifts=3
+        )
+        
+        self.assert_regular(assignments, staff, 3)
+        assert all(a.employee.department != a.secret_child.department for a in assignments)
+    
+    def test_too_many_gifts_raise(self, employees):
+        """Test that k >= group size is reported as infeasible."""
+        with pytest.raises(InfeasibleAssignmentError, match="5 gifts each"):
+            AssignmentEngine().create_assignments(employees, [], gifts=5)
+    
+    def test_blocked_employees_are_reported(self, employees, previous_assignments):
+        """Test that history leaving too few candidates names the givers."""
+        # Last year's pairs leave every giver only three possible children
+        engine = AssignmentEngine()
+        
+        with pytest.raises(InfeasibleAssignmentError, match="4 gifts each"):
+            engine.create_assignments(employees, previous_assignments, gifts=4)
+
+
+class TestCycleRules:
+    """Test reciprocal-pair, minimum cycle length and reverse-history rules."""
+    
+    @pytest.fixture(autouse=True)
+    def reset_config(self):
+        """Reset the Config singleton after each test."""
+        yield
+        Config.reset()
+    
+    @pytest.fixture
+    def staff(self):
+        """A group large enough to split into short cycles."""
+        return [Employee(name=f"E{i}", email=f"e{i}@example.com") for i in range(12)]
+    
+    @staticmethod
+    def cycle_lengths(assignments):
+        """Lengths of the gift loops in an assignment."""
+        child = {a.employee: a.secret_child for a in assignments}
+        seen = set()
+        lengths = []
+        for start in child:
+            length = 0
+            while start not in seen:
+                seen.add(start)
+                start = child[start]
+                length += 1
+            if length:
+                lengths.append(length)
+        return lengths
+    
+    def test_no_reciprocal_pairs(self, staff):
+        """Test that forbidding 2-cycles holds on the retry loop path."""
+        config = Config()
+        config.forbid_two_cycles = True
+        config.use_sattolo_fast_path = False
+        engine = AssignmentEngine(config=config)
+        
+        for iteration in range(50):
+            assignments = engine.create_assignments(staff, [])
+            
+            assert min(self.cycle_lengths(assignments)) >= 3
+    
+    def test_minimum_cycle_length(self, staff):
+        """Test that every loop has at least the configured length."""
+        config = Config()
+        config.min_cycle_length = 5
+        config.use_sattolo_fast_path = False
+        engine = AssignmentEngine(config=config)
+        
+        for iteration in range(50):
+            assignments = engine.create_assignments(staff, [])
+            
+            assert {a.secret_child for a in assignments} == set(staff)
+            assert min(self.cycle_lengths(assignments)) >= 5
+    
+    def test_cycle_rules_with_history(self, staff):
+        """Test that cycle rules and history hold together via the fast path."""
+        previous = [
+            Assignment(employee=staff[i], secret_child=staff[(i + 1) % len(staff)])
+            for i in range(len(staff))
+        ]
+        config = Config()
+        config.min_cycle_length = 4
+        engine = AssignmentEngine(config=config)
+        
+        for iteration in range(20):
+            assignments = engine.create_assignments(staff, previous)
+            
+            assert min(self.cycle_lengths(assignments)) >= 4
+            for assignment in assignments:
+                i = staff.index(assignment.employee)
+                assert assignment.secret_child != staff[(i + 1) % len(staff)]
+    
+    def test_reverse_history_is_excluded(self, employees, previous_assignments):
+        """Test that last year's pairs are not reversed this year."""
+        config = Config()
+        config.forbid_reverse_history = True
+        engine = AssignmentEngine(config=config)
+        reversed_pairs = {(a.secret_child, a.employee) for a in previous_assignments}
+        
+        for iteration in range(20):
+            assignments = engine.create_assignments(employees, previous_assignments)
+            
+            assert not {(a.employee, a.secret_child) for a in assignments} & reversed_pairs
+    
+    def test_too_small_group_is_infeasible(self, employees):
+        """Test that a group smaller than the minimum cycle is reported."""
+        config = Config()
+        config.min_cycle_length = 6
+        
+        with pytest.raises(InfeasibleAssignmentError, match="at least 6 people"):
+            AssignmentEngine(config=config).create_assignments(employees, [])
+    
+    def test_unsupported_strategy_is_rejected(self, employees):
+        """Test that strategies without cycle bookkeeping refuse the rule."""
+        config = Config()
+        config.forbid_two_cycles = True
+        engine = AssignmentEngine(BipartiteMatchingStrategy(config), config)
+        
+        with pytest.raises(ValidationError, match="minimum cycle length"):
+            engine.create_assignments(employees, [])
+    
+    def test_update_keeps_minimum_cycle_length(self, staff):
+        """Test that incremental updates never leave a short loop."""
+        config = Config()
+        config.min_cycle_length = 4
+        engine = AssignmentEngine(config=config)
+        
+        for iteration in range(20):
+            current = engine.create_assignments(staff[:10], [])
+            updated = engine.update_assignments(current, staff[10:], staff[:3])
+            
+            assert min(self.cycle_lengths(updated)) >= 4
+
+
+class TestAnytimeStrategy:
+    """Test the time-budgeted anytime strategy."""
+    
+    @pytest.fixture(autouse=True)
+    def reset_config(self):
+        """Reset the Config singleton after each test."""
+        yield
+        Config.reset()
+    
+    def test_no_repeats_from_previous_year(self, employees, previous_assignments):
+        """Test that assignments honour history within the budget."""
+        previous_map = {a.employee: a.secret_child for a in previous_assignments}
+        config = Config()
+        config.time_budget_seconds = 1.0
+        strategy = AnytimeStrategy(config)
+        
+        for iteration in range(20):
+            assignments = strategy.generate(employees, previous_map)
+            
+            assert {a.secret_child for a in assignments} == set(employees)
+            for assignment in assignments:
+                assert assignment.secret_child != previous_map[assignment.employee]
+    
+    def test_escalates_to_exact_matching(self, monkeypatch):
+        """Test that exact matching finishes when random attempts stall."""
+        # Everyone may only give to the next person: one valid assignment
+        staff = [Employee(name=f"E{i}", email=f"e{i}@example.com") for i in range(40)]
+        constraints = AssignmentConstraints(staff)
+        constraints.do_not_pair = PairExclusionIndex(len(staff), [
+            (g, c) for g in range(40) for c in range(40)
+            if c not in ((g + 1) % 40, (g - 1) % 40)
+        ])
+        constraints.add_history_year(
+            (staff[g], staff[(g - 1) % 40]) for g in range(40)
+        )
+        config = Config()
+        config.time_budget_seconds = 0.05
+        config.use_sattolo_fast_path = False
+        strategy = AnytimeStrategy(config)
+        monkeypatch.setattr(strategy, '_attempt_assignment', lambda *args: 0)
+        
+        assignments = strategy.generate(staff, {}, constraints)
+        
+        for giver, assignment in enumerate(assignments):
+            assert assignment.secret_child == staff[(giver + 1) % 40]
+    
+    def test_pre_check_matching_skips_random_phase(self, employees, monkeypatch):
+        """Test that a kept perfect matching is used without random attempts."""
+        constraints = AssignmentConstraints(employees)
+        constraints.matching = [1, 2, 3, 4, 0]
+        config = Config()
+        config.use_sattolo_fast_path = False
+        strategy = AnytimeStrategy(config)
+        
+        def no_attempts(*args):
+            raise AssertionError("random attempts should be skipped")
+        
+        monkeypatch.setattr(strategy, '_best_attempt', no_attempts)
+        
+        assert strategy.solve(constraints) == [1, 2, 3, 4, 0]
+    
+    def test_infeasible_reports_hall_violation(self, employees):
+        """Test that the exact phase explains an impossible instance."""
+        pair = employees[:2]
+        config = Config()
+        config.time_budget_seconds = 0.01
+        
+        with pytest.raises(InfeasibleAssignmentError):
+            AnytimeStrategy(config).generate(pair, {pair[0]: pair[1]})
+    
+    def test_budget_counts_from_engine_start(self):
+        """Test that time spent before solve comes out of the budget."""
+        staff = [Employee(name=f"E{i}", email=f"e{i}@example.com") for i in range(5000)]
+        config = Config()
+        config.time_budget_seconds = 1.0
+        strategy = AnytimeStrategy(config)
+        strategy.started = time.perf_counter() - 10
+        
+        with pytest.raises(NoValidAssignmentError, match="time budget"):
+            strategy.solve(AssignmentConstraints(staff))
+        assert strategy.last_stats.attempts <= 2
+    
+    def test_budget_is_shared_by_groups(self, monkeypatch):
+        """Test that 'same'-rule groups share one budget for the run."""
+        staff = [
+            Employee(name=f"E{i}", email=f"e{i}@example.com", office=f"Office {i % 10}")
+            for i in range(100)
+        ]
+        config = Config()
+        config.time_budget_seconds = 0.4
+        config.use_sattolo_fast_path = False
+        config.group_rules = {'office': 'same'}
+        strategy = AnytimeStrategy(config)
+        
+        def stalled_attempts(constraints, until):
+            # Random attempts that use their whole share and get nowhere
+            while time.perf_counter() < until:
+                time.sleep(0.01)
+            return [UNMATCHED] * constraints.size, 1
+        
+        monkeypatch.setattr(strategy, '_best_attempt', stalled_attempts)
+        
+        start = time.perf_counter()
+        assignments = AssignmentEngine(strategy, config).create_assignments(staff, [])
+        elapsed = time.perf_counter() - start
+        
+        assert elapsed < config.time_budget_seconds + 0.2
+        assert {a.secret_child for a in assignments} == set(staff)
+        for assignment in assignments:
+            assert assignment.employee.office == assignment.secret_child.office
+    
+    def test_chain_fallback_stops_at_deadline(self, employees):
+        """Test that the single-chain escalation gives up past its deadline."""
+        constraints = AssignmentConstraints(employees)
+        
+        with pytest.raises(NoValidAssignmentError, match="deadline"):
+            SingleChainStrategy().solve(constraints, time.perf_counter())
+    
+    def test_cycle_rules_are_honoured(self, employees):
+        """Test that escalation keeps the minimum cycle length."""
+        config = Config()
+        config.min_cycle_length = 5
+        config.time_budget_seconds = 0.01
+        engine = AssignmentEngine(AnytimeStrategy(config), config)
+        
+        for iteration in range(10):
+            assignments = engine.create_assignments(employees, [])
+            child = {a.employee: a.secret_child for a in assignments}
+            
+            # A single loop through all five
+            node, steps = employees[0], 0
+            while True:
+                node, steps = child[node], steps + 1
+                if node == employees[0]:
+                    break
+            assert steps == 5
+
+
+class TestAssignmentStatistics:
+    """Test per-run statistics from the strategy and the engine."""
+    
+    @pytest.fixture(autouse=True)
+    def reset_config(self):
+        """Reset the Config singleton after each test."""
+        yield
+        Config.reset()
+    
+    def test_engine_returns_stats(self, employees, previous_assignments):
+        """Test that stats come back with the assignments."""
+        config = Config()
+        config.use_sattolo_fast_path = False
+        engine = AssignmentEngine(config=config)
+        
+        assignments, stats = engine.create_assignments_with_stats(
+            employees, previous_assignments
+        )
+        
+        assert len(assignments) == len(employees)
+        assert stats.strategy == "RandomDerangementStrategy"
+        assert stats.attempts == len(stats.attempt_seconds) >= 1
+        assert len(stats.failure_positions) == stats.attempts - 1
+        assert stats.candidates_scanned >= len(employees)
+        assert set(stats.rejections) <= {'self', 'history'}
+        assert set(stats.phase_seconds) == {'constraints', 'feasibility', 'generate'}
+    
+    def test_failed_attempts_record_positions(self, employees):
+        """Test that every failed attempt records where it got stuck."""
+        config = Config()
+        config.max_assignment_attempts = 25
+        config.use_sattolo_fast_path = False
+        config.feasibility_precheck = False
+        pair = employees[:2]
+        strategy = RandomDerangementStrategy(config)
+        
+        with pytest.raises(NoValidAssignmentError):
+            strategy.generate(pair, {pair[0]: pair[1]})
+        
+        stats = strategy.last_stats
+        assert stats.attempts == 25
+        assert len(stats.failure_positions) == 25
+        assert all(position in (0, 1) for position in stats.failure_positions)
+        assert stats.rejections['history'] >= 25
+    
+    def test_fast_path_is_recorded(self, employees):
+        """Test that a fast-path success counts as one attempt."""
+        strategy = RandomDerangementStrategy()
+        
+        strategy.generate(employees, {})
+        
+        assert strategy.last_stats.fast_path is True
+        assert strategy.last_stats.attempts == 1
+    
+    def test_groups_are_merged(self, employees):
+        """Test that per-group counters add up across partitions."""
+        everyone = employees + [Employee(name="Frank", email="frank@example.com")]
+        staff = [
+            Employee(name=e.name, email=e.email, office=("A", "B")[i % 2])
+            for i, e in enumerate(everyone)
+        ]
+        config = Config()
+        config.group_rules = {'office': 'same'}
+        config.use_sattolo_fast_path = False
+        
+        _, stats = AssignmentEngine(config=config).create_assignments_with_stats(staff, [])
+        
+        assert stats.attempts >= 2
@@ -0,0 +1,110 @@
+"""Tests for multi-tenant batch mode."""
+
+import pytest
+import tempfile
+from pathlib import Path
+from src import batch
+from src.batch import BatchRunner
+from src.csv_handler import CSVHandler
+from src.exceptions import ValidationError
+
+
+@pytest.fixture
+def temp_dir():
+    """Create temporary directory for test files."""
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        yield Path(tmpdirname)
+
+
+@pytest.fixture
+def manifest(temp_dir):
+    """Create two good tenants and one with too few employees."""
+    (temp_dir / "acme.csv").write_text(
+        "Employee_Name,Employee_EmailID\n"
+        "Alice,alice@acme.com\n"
+        "Bob,bob@acme.com\n"
+        "Charlie,charlie@acme.com\n"
+    )
+    (temp_dir / "acme_previous.csv").write_text(
+        "Employee_Name,Employee_EmailID,Secret_Child_Name,Secret_Child_EmailID\n"
+        "Alice,alice@acme.com,Bob,bob@acme.com\n"
+    )
+    (temp_dir / "globex.csv").write_text(
+        "Employee_Name,Employee_EmailID\n"
+        "Hank,hank@globex.com\n"
+        "Ivy,ivy@globex.com\n"
+    )
+    (temp_dir / "initech.csv").write_text(
+        "Employee_Name,Employee_EmailID\n"
+        "Peter,peter@initech.com\n"
+    )
+    manifest_file = temp_dir / "tenants.csv"
+    manifest_file.write_text(
+        "Tenant,Employees_File,Previous_File,Output_File\n"
+        "acme,acme.csv,acme_previous.csv,out/acme.csv\n"
+        "globex,globex.csv,,out/globex.csv\n"
+        "initech,initech.csv,,out/initech.csv\n"
+    )
+    return manifest_file
+
+
+class TestBatchManifest:
+    """Test reading the batch manifest."""
+    
+    def test_paths_relative_to_manifest(self, manifest, temp_dir):
+        """Test that manifest paths resolve next to the manifest."""
+        jobs = CSVHandler().read_batch_manifest(manifest)
+        
+        assert [job.tenant for job in jobs] == ["acme", "globex", "initech"]
+        assert jobs[0].employees_file == temp_dir / "acme.csv"
+        assert jobs[0].previous_file == temp_dir / "acme_previous.csv"
+        assert jobs[1].previous_file is None
+    
+    def test_missing_required_value(self, temp_dir):
+        """Test that a row without an output file is rejected."""
+        manifest_file = temp_dir / "tenants.csv"
+        manifest_file.write_text(
+            "Tenant,Employees_File,Output_File\n"
+            "acme,acme.csv,\n"
+        )
+        
+        with pytest.raises(ValidationError, match="row 2"):
+            CSVHandler().read_batch_manifest(manifest_file)
+
+
+class TestBatchRunner:
+    """Test running many tenants in one invocation."""
+    
+    @pytest.mark.parametrize("workers", [1, 2])
+    def test_per_tenant_results(self, manifest, temp_dir, workers):
+        """Test that each tenant succeeds or fails on its own."""
+        report = temp_dir / "report.csv"
+        
+        results = BatchRunner(workers=workers).run_manifest(manifest, report)
+        
+        assert [r.tenant for r in results] == ["acme", "globex", "initech"]
+        assert [r.success for r in results] == [True, True, False]
+        assert "At least 2 employees" in results[2].error
+        assert all(r.seconds >= 0 for r in results)
+        assert (temp_dir / "out" / "acme.csv").exists()
+        assert (temp_dir / "out" / "globex.csv").exists()
+        
+        lines = report.read_text().strip().split('\n')
+        assert lines[0] == "Tenant,Status,Seconds,Error"
+        assert lines[3].startswith("initech,FAILED")
+    
+    def test_broken_tenant_does_not_stop_batch(self, manifest, monkeypatch):
+        """Test that a tenant failing outside its run is reported as FAILED."""
+        real_application = batch.SecretSantaApplication
+        
+        def application(employees_file, **kwargs):
+            if employees_file.name == "globex.csv":
+                raise KeyError("bad tenant config")
+            return real_application(employees_file=employees_file, **kwargs)
+        
+        monkeypatch.setattr(batch, 'SecretSantaApplication', application)
+        
+        results = BatchRunner(workers=1).run_manifest(manifest)
+        
+        assert [r.success for r in results] == [True, False, False]
+        assert results[1].error == "Unexpected error: 'bad tenant config'"
@@ -1,9 +1,12 @@
 """Tests for CSV handler."""
 
 import pytest
+import logging
 import tempfile
+from array import array
 from pathlib import Path
-from src.models import Employee, Assignment
+from src.models import Employee, EmployeeTable, Assignment, AssignmentBatch
+from src.config import Config
 from src.csv_handler import CSVHandler
 from src.exceptions import FileOperationError, ValidationError
 
@@ -294,4 +297,303 @@ class TestWriteAssignments:
         # Read back and verify
         content = output_file.read_text()
         lines = content.strip().split('\n')
-        assert len(lines) == 4  # 1 header + 3 data rows
\ No newline at end of file
+        assert len(lines) == 4  # 1 header + 3 data rows
+    
+    def test_write_assignment_batch(self, csv_handler, temp_dir):
+        """Test that a columnar batch writes the same file as a list."""
+        table = EmployeeTable()
+        for name in ("Alice", "Bob", "Charlie"):
+            table.add(name, f"{name.lower()}@example.com")
+        batch = AssignmentBatch(table, array('i', [0, 1, 2]), array('i', [1, 2, 0]))
+        
+        batch_file = temp_dir / "batch.csv"
+        list_file = temp_dir / "list.csv"
+        csv_handler.write_assignments(batch, batch_file)
+        csv_handler.write_assignments(list(batch), list_file)
+        
+        assert batch_file.read_text() == list_file.read_text()
+        assert "Charlie,charlie@example.com,Alice,alice@example.com" in (
+            batch_file.read_text()
+        )
+
+class TestReadAssignmentHistory:
+    """Test cases for reading several years of assignments."""
+    
+    def test_read_history_keeps_file_order(self, csv_handler, temp_dir):
+        """Test that each file becomes one year, in the order given."""
+        header = "Employee_Name,Employee_EmailID,Secret_Child_Name,Secret_Child_EmailID\n"
+        last_year = temp_dir / "last_year.csv"
+        last_year.write_text(header + "Alice,alice@example.com,Bob,bob@example.com\n")
+        two_years_ago = temp_dir / "two_years_ago.csv"
+        two_years_ago.write_text(header + "Bob,bob@example.com,Alice,alice@example.com\n")
+        
+        history = csv_handler.read_assignment_history(
+            [last_year, two_years_ago, temp_dir / "missing.csv"]
+        )
+        
+        assert len(history) == 3
+        assert history[0][0].employee.name == "Alice"
+        assert history[1][0].employee.name == "Bob"
+        assert history[2] == []
+
+
+class TestReadDoNotPair:
+    """Test cases for reading the do-not-pair list."""
+    
+    @pytest.fixture
+    def employees(self):
+        """Create employees the exclusions refer to."""
+        return [
+            Employee("Alice", "alice@example.com"),
+            Employee("Bob", "bob@example.com"),
+            Employee("Charlie", "charlie@example.com"),
+        ]
+    
+    def test_read_do_not_pair_is_symmetric(self, csv_handler, temp_dir, employees):
+        """Test that an exclusion applies in both directions."""
+        csv_file = temp_dir / "do_not_pair.csv"
+        csv_file.write_text(
+            "Employee_EmailID,Excluded_EmailID\n"
+            "ALICE@example.com,bob@example.com\n"
+            "alice@example.com,unknown@example.com\n"
+        )
+        
+        exclusions = csv_handler.read_do_not_pair(csv_file, employees)
+        
+        assert exclusions.pair_count == 1
+        assert exclusions.contains(0, 1)
+        assert exclusions.contains(1, 0)
+        assert not exclusions.contains(0, 2)
+        assert not exclusions.contains(2, 1)
+    
+    def test_read_do_not_pair_truncated_row(
+        self, csv_handler, temp_dir, employees, caplog
+    ):
+        """Test that a row missing its second email is skipped with a warning."""
+        csv_file = temp_dir / "do_not_pair.csv"
+        csv_file.write_text(
+            "Employee_EmailID,Excluded_EmailID\n"
+            "alice@example.com\n"
+            "bob@example.com,charlie@example.com\n"
+        )
+        
+        with caplog.at_level(logging.WARNING):
+            exclusions = csv_handler.read_do_not_pair(csv_file, employees)
+        
+        assert "Skipping incomplete do-not-pair row 2" in caplog.text
+        assert exclusions.pair_count == 1
+        assert exclusions.contains(1, 2)
+    
+    def test_read_do_not_pair_missing_file(self, csv_handler, temp_dir, employees):
+        """Test that a missing file yields no exclusions."""
+        exclusions = csv_handler.read_do_not_pair(temp_dir / "missing.csv", employees)
+        
+        assert exclusions.pair_count == 0
+        assert not exclusions.contains(0, 1)
+    
+    def test_read_do_not_pair_invalid_headers(self, csv_handler, temp_dir, employees):
+        """Test reading do-not-pair CSV with invalid headers."""
+        csv_file = temp_dir / "do_not_pair.csv"
+        csv_file.write_text("Email,Other\nalice@example.com,bob@example.com\n")
+        
+        with pytest.raises(ValidationError, match="Missing required CSV fields"):
+            csv_handler.read_do_not_pair(csv_file, employees)
+
+
+class TestReadEmployeeGroups:
+    """Test cases for the optional group columns."""
+    
+    def test_read_optional_columns(self, csv_handler, temp_dir):
+        """Test that Department and Office columns are loaded when present."""
+        csv_file = temp_dir / "employees.csv"
+        csv_file.write_text(
+            "Employee_Name,Employee_EmailID,Department,Office\n"
+            "Alice,alice@example.com,Sales,London\n"
+            "Bob,bob@example.com,,Paris\n"
+        )
+        
+        employees = csv_handler.read_employees(csv_file)
+        
+        assert employees[0].department == "Sales"
+        assert employees[0].office == "London"
+        assert employees[1].department is None
+        assert employees[1].office == "Paris"
+
+
+class TestStreamEmployees:
+    """Test cases for chunked employee reading."""
+    
+    def teardown_method(self):
+        """Reset config after each test."""
+        Config.reset()
+    
+    @pytest.fixture
+    def roster(self, temp_dir):
+        """Write a five-person employee file."""
+        csv_file = temp_dir / "employees.csv"
+        csv_file.write_text(
+            "Employee_Name,Employee_EmailID,Office\n" +
+            "".join(f"Employee {i},employee{i}@example.com,Oslo\n" for i in range(5))
+        )
+        return csv_file
+    
+    def test_chunks_are_bounded(self, csv_handler, roster):
+        """Test that employees arrive in chunks of at most chunk_size."""
+        chunks = list(csv_handler.iter_employee_chunks(roster, chunk_size=2))
+        
+        assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+        assert chunks[2][0].email == "employee4@example.com"
+    
+    def test_error_row_number_in_later_chunk(self, csv_handler, temp_dir):
+        """Test that row numbers count across chunks."""
+        csv_file = temp_dir / "employees.csv"
+        csv_file.write_text(
+            "Employee_Name,Employee_EmailID\n"
+            "Alice,alice@example.com\n"
+            "Bob,bob@example.com\n"
+            "Charlie,\n"
+        )
+        
+        with pytest.raises(ValidationError, match="Error in row 4"):
+            list(csv_handler.iter_employee_chunks(csv_file, chunk_size=1))
+    
+    def test_read_employee_table(self, csv_handler, roster):
+        """Test that the streamed table matches the list reader."""
+        csv_handler.config.employee_chunk_size = 2
+        
+        table = csv_handler.read_employee_table(roster)
+        
+        assert list(table) == csv_handler.read_employees(roster)
+        assert table.offices == ["Oslo"] * 5
+    
+    def test_duplicate_across_chunks(self, csv_handler, temp_dir):
+        """Test that duplicates are found even when chunks separate them."""
+        csv_file = temp_dir / "employees.csv"
+        csv_file.write_text(
+            "Employee_Name,Employee_EmailID\n"
+            "Alice,alice@example.com\n"
+            "Bob,bob@example.com\n"
+            "Alicia,ALICE@example.com\n"
+        )
+        csv_handler.config.employee_chunk_size = 1
+        
+        with pytest.raises(ValidationError, match="Duplicate email"):
+            csv_handler.read_employee_table(csv_file)
+
+
+class TestParallelRead:
+    """Test cases for byte-range parallel reading."""
+    
+    @pytest.fixture
+    def parallel_handler(self, csv_handler):
+        """Create a handler that splits even tiny files."""
+        csv_handler.PARALLEL_MIN_RANGE_BYTES = 16
+        return csv_handler
+    
+    @pytest.fixture
+    def roster(self, temp_dir):
+        """Write a forty-person employee file."""
+        csv_file = temp_dir / "employees.csv"
+        csv_file.write_text(
+            "Employee_Name,Employee_EmailID,Department\n" +
+            "".join(
+                f"Employee {i},employee{i}@example.com,D{i % 3}\n"
+                for i in range(40)
+            )
+        )
+        return csv_file
+    
+    def test_matches_single_pass(self, parallel_handler, roster, caplog):
+        """Test that ranges merge back in file order."""
+        with caplog.at_level(logging.INFO):
+            table = parallel_handler.read_employee_table(roster, workers=2)
+        
+        assert "in 8 byte ranges over 2 processes" in caplog.text
+        assert list(table) == parallel_handler.read_employees(roster)
+        assert table.departments == [f"D{i % 3}" for i in range(40)]
+    
+    def test_error_row_number_matches(self, parallel_handler, temp_dir):
+        """Test that a bad row deep in the file keeps its row number."""
+        csv_file = temp_dir / "employees.csv"
+        rows = [f"Employee {i},employee{i}@example.com\n" for i in range(40)]
+        rows[30] = "Employee 30,\n"
+        csv_file.write_text("Employee_Name,Employee_EmailID\n" + "".join(rows))
+        
+        with pytest.raises(ValidationError) as single:
+            parallel_handler.read_employees(csv_file)
+        with pytest.raises(ValidationError) as parallel:
+            parallel_handler.read_employee_table(csv_file, workers=2)
+        
+        assert "Error in row 32" in str(single.value)
+        assert str(parallel.value) == str(single.value)
+    
+    def test_duplicate_across_ranges(self, parallel_handler, temp_dir):
+        """Test that duplicates in different ranges are caught."""
+        csv_file = temp_dir / "employees.csv"
+        rows = [f"Employee {i},employee{i}@example.com\n" for i in range(40)]
+        rows[39] = "Someone Else,EMPLOYEE0@example.com\n"
+        csv_file.write_text("Employee_Name,Employee_EmailID\n" + "".join(rows))
+        
+        with pytest.raises(ValidationError, match="Duplicate email"):
+            parallel_handler.read_employee_table(csv_file, workers=2)
+    
+    def test_quoted_line_break_falls_back(self, parallel_handler, temp_dir):
+        """Test that a field spanning a range boundary is still read whole."""
+        csv_file = temp_dir / "employees.csv"
+        csv_file.write_text(
+            "Employee_Name,Employee_EmailID,Office\n"
+            "Alice,alice@example.com,\"Building 1\n" + "Floor 2\n" * 20 + "\"\n"
+            "Bob,bob@example.com,Oslo\n"
+        )
+        
+        table = parallel_handler.read_employee_table(csv_file, workers=2)
+        
+        assert table.names == ["Alice", "Bob"]
+        assert table.offices[0].count("Floor 2") == 20
+    
+    def test_stray_quote_falls_back(self, parallel_handler, temp_dir):
+        """Test that a quote inside an unquoted field is not taken for a pair."""
+        csv_file = temp_dir / "employees.csv"
+        csv_file.write_text(
+            "Employee_Name,Employee_EmailID,Office\n"
+            + "".join(f"Employee {i},employee{i}@example.com,Oslo\n" for i in range(20))
+            + "Pat O\"Brien,pat@example.com,\"Building 1\n" + "Floor 2\n" * 20 + "\"\n"
+            "Bob,bob@example.com,Oslo\n"
+        )
+        
+        table = parallel_handler.read_employee_table(csv_file, workers=2)
+        
+        assert list(table) == parallel_handler.read_employees(csv_file)
+        assert table.names[20:] == ['Pat O"Brien', "Bob"]
+        assert table.offices[20].count("Floor 2") == 20
+    
+    def test_worker_io_error_wrapped(self, parallel_handler, roster, monkeypatch):
+        """Test that an I/O error in a worker surfaces as FileOperationError."""
+        import src.csv_handler as csv_handler_module
+        
+        def failing_read(file_path, start, end):
+            raise OSError("disk went away")
+        
+        monkeypatch.setattr(csv_handler_module, "_read_range", failing_read)
+        
+        with pytest.raises(FileOperationError, match="File I/O error: disk went away"):
+            parallel_handler.read_employee_table(roster, workers=2)
+    
+    def test_previous_assignments(self, parallel_handler, temp_dir):
+        """Test that history files are read in parallel, skipping bad rows."""
+        csv_file = temp_dir / "previous.csv"
+        rows = [
+            f"Employee {i},employee{i}@example.com,"
+            f"Employee {i + 1},employee{i + 1}@example.com\n"
+            for i in range(30)
+        ]
+        rows[10] = "Employee 10,employee10@example.com,Employee 10,employee10@example.com\n"
+        csv_file.write_text(
+            "Employee_Name,Employee_EmailID,Secret_Child_Name,Secret_Child_EmailID\n"
+            + "".join(rows)
+        )
+        
+        parallel = parallel_handler.read_previous_assignments(csv_file, workers=2)
+        
+        assert parallel == parallel_handler.read_previous_assignments(csv_file)
+        assert len(parallel) == 29
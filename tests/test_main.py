@@ -121,4 +121,40 @@ class TestSecretSantaApplication:
         )
         
         success = app.run()
-        assert success is False
\ No newline at end of file
+        assert success is False
+    
+    def test_run_with_chain_strategy(self, temp_dir, sample_employees_csv):
+        """Test run with the single gift chain strategy."""
+        output_file = temp_dir / "output.csv"
+        
+        app = SecretSantaApplication(
+            employees_file=sample_employees_csv,
+            previous_file=temp_dir / "prev.csv",
+            output_file=output_file,
+            strategy='chain'
+        )
+        
+        success = app.run()
+        assert success is True
+        assert output_file.exists()
+    
+    def test_run_with_multiple_previous_files(
+        self, temp_dir, sample_employees_csv, sample_previous_csv
+    ):
+        """Test run avoiding pairs from several past years."""
+        older_csv = temp_dir / "older.csv"
+        older_csv.write_text(
+            "Employee_Name,Employee_EmailID,Secret_Child_Name,Secret_Child_EmailID\n"
+            "Alice,alice@example.com,Charlie,charlie@example.com\n"
+        )
+        output_file = temp_dir / "output.csv"
+        
+        app = SecretSantaApplication(
+            employees_file=sample_employees_csv,
+            output_file=output_file,
+            previous_files=[sample_previous_csv, older_csv]
+        )
+        
+        # Alice can give to neither Bob nor Charlie
+        success = app.run()
+        assert success is False
@@ -1,5 +1,18 @@
+import os
+import pickle
+import subprocess
+import sys
+from array import array
+from pathlib import Path
+
 import pytest
-from src.models import Employee, Assignment
+from src.models import (
+    Employee,
+    EmployeeTable,
+    Assignment,
+    AssignmentBatch,
+    AssignmentStats
+)
 
 
 class TestEmployee:
@@ -28,6 +41,49 @@ class TestEmployee:
         emp2 = Employee(name="Jane Doe", email="jane@example.com")
         employee_set = {emp1, emp2}
         assert len(employee_set) == 2
+    
+    def test_equal_employees_hash_alike(self):
+        """Test that case-insensitive equals share a hash and a set slot."""
+        emp1 = Employee(name="John Doe", email="john@example.com")
+        emp2 = Employee(name="JOHN DOE", email="John@Example.com")
+        assert hash(emp1) == hash(emp2)
+        assert len({emp1, emp2}) == 1
+    
+    def test_identity_key_is_unambiguous(self):
+        """Test that name/email boundaries cannot collide."""
+        emp1 = Employee(name="ab", email="c@example.com")
+        emp2 = Employee(name="a", email="bc@example.com")
+        assert emp1 != emp2
+    
+    def test_employee_is_slotted(self):
+        """Test that employees carry no per-instance dict."""
+        emp = Employee(name="John Doe", email="john@example.com")
+        assert not hasattr(emp, '__dict__')
+    
+    def test_employee_pickles(self):
+        """Test that employees survive pickling for worker processes."""
+        emp = Employee(name="John Doe", email="john@example.com", office="Oslo")
+        copy = pickle.loads(pickle.dumps(emp))
+        assert copy == emp
+        assert hash(copy) == hash(emp)
+        assert copy.office == "Oslo"
+    
+    def test_employee_pickle_rehashes(self):
+        """Test that an unpickled employee hashes by its new interpreter."""
+        emp = Employee(name="John Doe", email="john@example.com")
+        script = (
+            "import pickle, sys; from src.models import Employee; "
+            "copy = pickle.loads(sys.stdin.buffer.read()); "
+            "assert hash(copy) == hash(Employee('JOHN DOE', 'john@example.com'))"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", script],
+            input=pickle.dumps(emp),
+            env={**os.environ, "PYTHONHASHSEED": "12345"},
+            cwd=Path(__file__).resolve().parent.parent,
+            capture_output=True
+        )
+        assert result.returncode == 0, result.stderr.decode()
 
 
 class TestAssignment:
@@ -55,4 +111,114 @@ class TestAssignment:
         
         result = assignment.to_dict()
         assert result['Employee_Name'] == "John Doe"
-        assert result['Secret_Child_Name'] == "Jane Doe"
\ No newline at end of file
+        assert result['Secret_Child_Name'] == "Jane Doe"
+
+
+class TestEmployeeTable:
+    """Test cases for the integer-id employee table."""
+    
+    def test_ids_follow_row_order(self):
+        """Test that ids are dense and looked up case-insensitively."""
+        alice = Employee(name="Alice", email="alice@example.com")
+        bob = Employee(name="Bob", email="bob@example.com", office="Oslo")
+        table = EmployeeTable.from_employees([alice, bob])
+        
+        assert len(table) == 2
+        assert table.names == ["Alice", "Bob"]
+        assert table.column('office') == [None, "Oslo"]
+        assert table.id_of(Employee(name="BOB", email="Bob@Example.com")) == 1
+        assert table.id_of(Employee(name="Carol", email="carol@example.com")) is None
+    
+    def test_existing_employees_are_returned(self):
+        """Test that a table built from objects hands the same objects back."""
+        alice = Employee(name="Alice", email="alice@example.com")
+        table = EmployeeTable.from_employees([alice])
+        
+        assert table[0] is alice
+    
+    def test_added_rows_materialize_once(self):
+        """Test that raw rows become an Employee on first access only."""
+        table = EmployeeTable()
+        assert table.add("Alice", "alice@example.com", department="Sales") == 0
+        
+        employee = table[0]
+        assert employee == Employee(name="Alice", email="alice@example.com")
+        assert employee.department == "Sales"
+        assert table[0] is employee
+    
+    def test_subset_renumbers(self):
+        """Test that a subset keeps the chosen rows in order."""
+        table = EmployeeTable()
+        for i in range(4):
+            table.add(f"Employee {i}", f"employee{i}@example.com")
+        
+        sub = table.subset([3, 1])
+        
+        assert sub.names == ["Employee 3", "Employee 1"]
+        assert sub.id_of(Employee(name="Employee 1", email="employee1@example.com")) == 1
+
+
+class TestAssignmentBatch:
+    """Test cases for the columnar assignment result."""
+    
+    @pytest.fixture
+    def batch(self):
+        """Create a three-person loop over a raw table."""
+        table = EmployeeTable()
+        for name in ("Alice", "Bob", "Charlie"):
+            table.add(name, f"{name.lower()}@example.com")
+        return AssignmentBatch(table, array('i', [0, 1, 2]), array('i', [1, 2, 0]))
+    
+    def test_views_are_assignments(self, batch):
+        """Test that indexing and iterating yield Assignment views."""
+        assert len(batch) == 3
+        assert isinstance(batch[0], Assignment)
+        assert batch[-1].employee.name == "Charlie"
+        assert batch[-1].secret_child.name == "Alice"
+        assert [a.secret_child.name for a in batch] == ["Bob", "Charlie", "Alice"]
+    
+    def test_equals_list_of_same_assignments(self, batch):
+        """Test that a batch compares equal to the list it stands for."""
+        assert batch == list(batch)
+        assert batch[1:] == list(batch)[1:]
+    
+    def test_dicts_match_assignment_rows(self, batch):
+        """Test that column rows match Assignment.to_dict()."""
+        assert list(batch.iter_dicts()) == [a.to_dict() for a in batch]
+
+
+class TestAssignmentStats:
+    """Test cases for AssignmentStats."""
+    
+    def test_merge_adds_counters(self):
+        """Test that merging sums counts and concatenates per-attempt data."""
+        first = AssignmentStats(strategy="Random", attempts=2, candidates_scanned=10)
+        first.attempt_seconds.extend([0.1, 0.2])
+        first.failure_positions.append(3)
+        first.reject('history')
+        second = AssignmentStats(attempts=1, candidates_scanned=5, fast_path=True)
+        second.attempt_seconds.append(0.3)
+        second.reject('history')
+        second.reject('self')
+        
+        first.merge(second)
+        
+        assert first.strategy == "Random"
+        assert first.attempts == 3
+        assert first.attempt_seconds == [0.1, 0.2, 0.3]
+        assert first.failure_positions == [3]
+        assert first.rejections == {'history': 2, 'self': 1}
+        assert first.candidates_scanned == 15
+        assert first.fast_path is True
+    
+    def test_summary(self):
+        """Test the one-line log digest."""
+        stats = AssignmentStats(attempts=2, candidates_scanned=7)
+        stats.attempt_seconds.extend([0.001, 0.003])
+        stats.failure_positions.append(4)
+        stats.reject('self')
+        
+        assert stats.summary() == (
+            "2 attempts (2.000 ms each), 1 failed, 7 candidates scanned, "
+            "rejections: self=1"
+        )
@@ -0,0 +1,66 @@
+"""Tests for assignment scores."""
+
+import pytest
+from src.models import Employee, EmployeeTable
+from src.scoring import AttributeDistanceScore, InteractionScore
+
+
+@pytest.fixture
+def staff():
+    """Employees in two offices, one without an office."""
+    return [
+        Employee(name="Alice", email="alice@example.com", office="Oslo"),
+        Employee(name="Bob", email="bob@example.com", office="oslo"),
+        Employee(name="Charlie", email="charlie@example.com", office="Lima"),
+        Employee(name="Diana", email="diana@example.com"),
+    ]
+
+
+class TestAttributeDistanceScore:
+    """Test attribute-to-attribute distance costs."""
+    
+    def test_distances_are_symmetric_and_case_insensitive(self, staff):
+        """Test that one listed distance covers both directions."""
+        score = AttributeDistanceScore('office', {("OSLO", "lima"): 4.0})
+        
+        assert score.cost(staff[0], staff[2]) == 4.0
+        assert score.cost(staff[2], staff[1]) == 4.0
+        assert score.cost(staff[0], staff[1]) == 0.0
+    
+    def test_unknown_pairs_use_default(self, staff):
+        """Test that unlisted distinct values cost the default."""
+        score = AttributeDistanceScore('office', default=2.5)
+        
+        assert score.cost(staff[0], staff[3]) == 2.5
+    
+    def test_cost_matrix_matches_pairwise_cost(self, staff):
+        """Test that the grouped matrix equals per-pair costs."""
+        score = AttributeDistanceScore('office', {("Oslo", "Lima"): 4.0}, default=9.0)
+        
+        matrix = score.cost_matrix(staff)
+        
+        for g, giver in enumerate(staff):
+            for c, child in enumerate(staff):
+                assert matrix[g][c] == score.cost(giver, child)
+    
+    def test_group_costs_from_table(self, staff):
+        """Test that a table's column gives the same groups as Employees."""
+        score = AttributeDistanceScore('office', {("Oslo", "Lima"): 4.0})
+        
+        groups, costs = score.group_costs(EmployeeTable.from_employees(staff))
+        
+        assert groups == [0, 0, 1, 2]
+        assert (groups, costs) == score.group_costs(staff)
+        assert costs[0][1] == 4.0
+
+
+class TestInteractionScore:
+    """Test interaction-count costs."""
+    
+    def test_counts_are_symmetric(self, staff):
+        """Test that counts apply in both directions and default to zero."""
+        score = InteractionScore({("Alice@example.com", "bob@example.com"): 12})
+        
+        assert score.cost(staff[0], staff[1]) == 12
+        assert score.cost(staff[1], staff[0]) == 12
+        assert score.cost(staff[0], staff[2]) == 0.0